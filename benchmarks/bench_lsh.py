@@ -0,0 +1,115 @@
+"""Recall/latency benchmark for approximate (MinHash/LSH) match retrieval.
+
+Builds a synthetic board with a Zipf-like skill popularity, then compares
+`Matchmaker.find_matches(..., approximate=True, limit=...)` against the exact
+top matches for a sample of users at several band settings. Both sides use
+the same `limit`: without one, persisting every match dominates either way.
+
+    python benchmarks/bench_lsh.py --users 2000 --queries 25
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_handler import DatabaseHandler
+from src.models.user import User
+from src.utils.matchmaker import Matchmaker
+
+
+def build_board(db, num_users, num_skills, skills_per_user, seed):
+    rng = random.Random(seed)
+    skills = [f"Skill {i}" for i in range(num_skills)]
+    weights = [1.0 / (rank + 1) for rank in range(num_skills)]
+
+    def pick():
+        chosen = set()
+        while len(chosen) < skills_per_user:
+            chosen.add(rng.choices(skills, weights)[0])
+        return sorted(chosen)
+
+    for i in range(num_users):
+        db.add_user(User(
+            name=f"User {i}",
+            email=f"user{i}@example.com",
+            skills_offered=pick(),
+            skills_needed=pick()
+        ))
+
+
+def recall(exact, approximate, top_k=None):
+    expected = [user_id for user_id, _ in exact]
+    if top_k:
+        expected = expected[:top_k]
+    if not expected:
+        return 1.0
+    found = {user_id for user_id, _ in approximate}
+    return sum(1 for user_id in expected if user_id in found) / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--skills', type=int, default=300)
+    parser.add_argument('--skills-per-user', type=int, default=4)
+    parser.add_argument('--queries', type=int, default=25)
+    parser.add_argument('--num-perm', type=int, default=192)
+    parser.add_argument('--bands', type=int, nargs='+', default=[32, 48, 64, 96])
+    parser.add_argument('--limit', type=int, default=10, help='top-k returned per query')
+    parser.add_argument('--min-score', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        db = DatabaseHandler(path)
+        db.initialize_database()
+        build_board(db, args.users, args.skills, args.skills_per_user, args.seed)
+
+        matchmaker = Matchmaker(db)
+        query_ids = random.Random(args.seed).sample(range(1, args.users + 1), args.queries)
+
+        exact = {}
+        started = time.perf_counter()
+        for user_id in query_ids:
+            exact[user_id] = matchmaker.find_matches(user_id, min_score=args.min_score,
+                                                     limit=args.limit)
+        exact_ms = (time.perf_counter() - started) * 1000 / len(query_ids)
+
+        print(f"{args.users} users, {args.queries} queries, min_score={args.min_score}, "
+              f"limit={args.limit}")
+        print(f"exact: {exact_ms:.1f} ms/query")
+        print(f"{'bands':>5} {'rows':>4} {'recall':>7} "
+              f"{'candidates':>10} {'ms/query':>9} {'speedup':>7} {'build ms':>9}")
+
+        for bands in args.bands:
+            started = time.perf_counter()
+            index = matchmaker.build_lsh_index(num_perm=args.num_perm, bands=bands)
+            build_ms = (time.perf_counter() - started) * 1000
+
+            total_recall = total_candidates = 0.0
+            started = time.perf_counter()
+            for user_id in query_ids:
+                approximate = matchmaker.find_matches(
+                    user_id, min_score=args.min_score, approximate=True, limit=args.limit)
+                total_recall += recall(exact[user_id], approximate)
+            query_ms = (time.perf_counter() - started) * 1000 / len(query_ids)
+
+            for user_id in query_ids:
+                total_candidates += len(index.query(db.get_user(user_id)))
+
+            n = len(query_ids)
+            print(f"{bands:>5} {index.rows:>4} {total_recall / n:>7.3f} "
+                  f"{total_candidates / n:>10.1f} "
+                  f"{query_ms:>9.1f} {exact_ms / query_ms:>6.1f}x {build_ms:>9.1f}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Throughput of the prefork server for different worker counts.
+
+    python benchmarks/bench_server.py --workers 1 2 4 --threads 4 --clients 16
+"""
+import argparse
+import http.client
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.database.db_handler import DatabaseHandler
+from src.models.user import User
+
+
+def start_server(db_path, workers, threads):
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'src.server', '--port', '0', '--no-access-log',
+         '--workers', str(workers), '--threads', str(threads)],
+        cwd=ROOT, env=dict(os.environ, DATABASE_PATH=db_path),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    port = int(re.search(r':(\d+) ', proc.stdout.readline()).group(1))
+    for _ in range(workers):
+        proc.stdout.readline()
+    return proc, port
+
+
+def hammer(port, path, clients, seconds):
+    done = [0] * clients
+    deadline = time.monotonic() + seconds
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.monotonic() < deadline:
+            conn.request('GET', path)
+            conn.getresponse().read()
+            done[index] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(done) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--path', default='/api/users/1/matches?limit=10')
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        db = DatabaseHandler(db_path)
+        db.initialize_database()
+        skills = [f"Skill {i}" for i in range(50)]
+        db.add_users([User(name=f"User {i}", email=f"user{i}@example.com",
+                           skills_offered=skills[i % 50:i % 50 + 3],
+                           skills_needed=skills[(i * 7) % 50:(i * 7) % 50 + 3])
+                      for i in range(args.users)])
+
+        print(f"{os.cpu_count()} CPUs, GET {args.path}, {args.clients} clients")
+        for workers in args.workers:
+            proc, port = start_server(db_path, workers, args.threads)
+            try:
+                hammer(port, args.path, args.clients, 1)  # warm up every worker
+                rate = hammer(port, args.path, args.clients, args.seconds)
+            finally:
+                proc.terminate()
+                proc.wait()
+            print(f"  {workers} workers x {args.threads} threads: {rate:8.0f} req/s")
+    finally:
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
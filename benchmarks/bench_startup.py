@@ -0,0 +1,78 @@
+"""Import-to-first-request time for the web API, measured in fresh interpreters.
+
+    python benchmarks/bench_startup.py --users 5000 --runs 10
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.database.db_handler import DatabaseHandler
+from src.models.user import User
+
+# Flask itself is imported before the clock starts; only our own startup is timed.
+# CPU time is used because wall-clock startup times are too noisy to compare.
+PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+import flask
+started = time.process_time()
+import src.api as api
+app = api.create_app() if hasattr(api, 'create_app') else api.app
+imported = time.process_time()
+response = app.test_client().get({path!r})
+assert response.status_code == 200, response.status_code
+done = time.process_time()
+print((imported - started) * 1000, (done - imported) * 1000)
+"""
+
+
+def populate(path, users, seed):
+    rng = random.Random(seed)
+    skills = [f"Skill {i}" for i in range(300)]
+    db = DatabaseHandler(path)
+    db.initialize_database()
+    db.add_users([User(name=f"User {i}", email=f"user{i}@example.com",
+                       skills_offered=rng.sample(skills, 3), skills_needed=rng.sample(skills, 3))
+                  for i in range(users)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/api/users?ids=1')
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        populate(db_path, args.users, args.seed)
+        env = dict(os.environ, DATABASE_PATH=db_path)
+        probe = PROBE.format(root=ROOT, path=args.path)
+        imports, firsts = [], []
+        for _ in range(args.runs):
+            output = subprocess.run([sys.executable, '-c', probe], env=env, check=True,
+                                    capture_output=True, text=True).stdout
+            import_ms, first_ms = map(float, output.split())
+            imports.append(import_ms)
+            firsts.append(first_ms)
+    finally:
+        os.unlink(db_path)
+
+    totals = [a + b for a, b in zip(imports, firsts)]
+    print(f"{args.users} users, GET {args.path}, median of {args.runs} runs")
+    print(f"  import + app setup: {statistics.median(imports):7.1f} ms")
+    print(f"  first request:      {statistics.median(firsts):7.1f} ms")
+    print(f"  total:              {statistics.median(totals):7.1f} ms (best {min(totals):.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
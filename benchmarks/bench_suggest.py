@@ -0,0 +1,67 @@
+"""Latency benchmark for skill autocomplete (SkillTrie.suggest).
+
+    python benchmarks/bench_suggest.py --skills 100000 --queries 20000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.skill_trie import SkillTrie
+
+
+def random_skill(rng):
+    words = rng.randint(1, 3)
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))).capitalize()
+        for _ in range(words)
+    )
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--skills', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    counts = {}
+    while len(counts) < args.skills:
+        counts[random_skill(rng)] = int(rng.paretovariate(1.2))
+    skills = list(counts)
+
+    started = time.perf_counter()
+    trie = SkillTrie.from_counts(counts)
+    build_s = time.perf_counter() - started
+
+    samples = []
+    for _ in range(args.queries):
+        skill = rng.choice(skills)
+        prefix = skill[:rng.randint(1, min(6, len(skill)))]
+        started = time.perf_counter()
+        trie.suggest(prefix)
+        samples.append((time.perf_counter() - started) * 1e6)
+
+    updates = []
+    for _ in range(1000):
+        started = time.perf_counter()
+        trie.add([rng.choice(skills)])
+        updates.append((time.perf_counter() - started) * 1e6)
+
+    print(f"{len(trie)} skills, build {build_s:.2f} s")
+    print(f"suggest: p50 {percentile(samples, 50):.1f} us, p99 {percentile(samples, 99):.1f} us")
+    print(f"update:  p50 {percentile(updates, 50):.1f} us, p99 {percentile(updates, 99):.1f} us")
+
+
+if __name__ == '__main__':
+    main()
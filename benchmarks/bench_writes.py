@@ -0,0 +1,70 @@
+"""Write throughput under thread contention, with and without the write queue.
+
+    python benchmarks/bench_writes.py --threads 16 --writes 200
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_handler import DatabaseHandler
+from src.models.match import Match
+from src.models.user import User
+
+
+def run(db, threads, writes):
+    errors = []
+    start = threading.Barrier(threads + 1)
+
+    def writer(worker):
+        start.wait()
+        for i in range(writes):
+            try:
+                if i % 2:
+                    db.save_match(Match(user1_id=worker + 1, user2_id=i + 1, compatibility_score=0.5,
+                                        matching_skills=["Python"]))
+                else:
+                    db.add_user(User(name=f"User {worker}-{i}", email=f"u{worker}-{i}@example.com",
+                                     skills_offered=["Python"], skills_needed=["Go"]))
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200, help='writes per thread')
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--delay-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    total = args.threads * args.writes
+    with tempfile.TemporaryDirectory() as tmp:
+        for queued in (False, True):
+            db = DatabaseHandler(os.path.join(tmp, f"bench-{queued}.db"))
+            db.initialize_database()
+            if queued:
+                db.start_write_queue(max_batch=args.batch, max_delay=args.delay_ms / 1000)
+            elapsed, errors = run(db, args.threads, args.writes)
+            groups = db.write_queue.groups_committed if queued else total - errors
+            db.close()
+            print(f"{'queued' if queued else 'direct':>6}: {total / elapsed:8.0f} writes/s, "
+                  f"{groups} commits, {errors} lock errors")
+
+
+if __name__ == '__main__':
+    main()
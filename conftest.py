@@ -16,7 +16,11 @@ def temp_db():
 
     yield db_handler
 
-    os.unlink(path)
+    db_handler.close()
+    # WAL mode keeps -wal and -shm files next to the database while it is open.
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
 
 @pytest.fixture
 def sample_user():
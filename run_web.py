@@ -3,10 +3,11 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.api import app
+from src.api import create_app
 
 if __name__ == '__main__':
-    print("Starting server at http://localhost:5001")
-    app.run(debug=True, port=5001)
-
-
+    # Development only: a single process, with the debugger when FLASK_DEBUG=1.
+    # Serve real traffic with `python -m src.server`.
+    debug = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
+    print("Starting development server at http://localhost:5001")
+    create_app().run(debug=debug, port=5001)
@@ -1,79 +1,1025 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, current_app, g, request, jsonify
+import functools
+import hmac
+import json
+import math
 import os
 import sys
+import threading
+import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.database.change_log import ChangeLogCompacted
 from src.database.db_handler import DatabaseHandler
+from src.database.tracing import QueryTracer
 from src.utils.matchmaker import Matchmaker
-from src.models.user import User
+from src.utils.skill_trie import SkillTrie
+from src.utils.compression import (StaticAssetCache, compress, is_compressible,
+                                   negotiate_encoding, supported_encodings)
+from src.utils.admission import AdmissionController, Rejected
+from src.utils.match_stream import MatchSnapshot, MatchStream
+from src.utils.jobs import JobRunner
+from src.utils.metrics import MetricsRegistry, instrument_methods
+from src.utils.profiler import ProfileSession
+from src.utils.single_flight import SingleFlight, SingleFlightTimeout
+from src.utils.skill_canonicalizer import default_canonicalizer
+from src.models.job import JOB_STATUSES
+from src.models.user import User, USER_FIELDS
 
-app = Flask(__name__, static_folder='../static', static_url_path='/static')
-static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
 
-db_path = os.environ.get('DATABASE_PATH', 'peer_exchange.db')
-db = DatabaseHandler(db_path)
-db.initialize_database()
-matchmaker = Matchmaker(db)
+DEFAULT_CONFIG = {
+    'DATABASE_PATH': 'peer_exchange.db',
+    'MATCH_WEIGHTING': 'uniform',
+    'FUZZY_MATCH_THRESHOLD': None,
+    # MinHash/LSH index behind ?approximate=1: LSH_NUM_PERM / LSH_BANDS rows
+    # per band. See MinHashLSH for the measured trade-off.
+    'LSH_NUM_PERM': 192,
+    'LSH_BANDS': 64,
+    'COMPRESSION_MIN_SIZE': 1024,
+    'COMPRESSION_LEVEL': 6,
+    'BULK_MAX_BATCH': 1000,
+    'BATCH_MAX_IDS': 1000,
+    # Admin endpoints are disabled unless a token is configured.
+    'ADMIN_TOKEN': None,
+    # Metrics are on unless disabled; when off nothing is wrapped or timed.
+    'METRICS_ENABLED': True,
+    # SQL tracing is opt-in: SQL_TRACE, or setting a slow-query threshold, enables it.
+    'SQL_TRACE': False,
+    'SLOW_QUERY_MS': None,
+    'SLOW_QUERY_LOG': 'slow_queries.jsonl',
+    # Build indexes and caches in create_app instead of on first use.
+    'WARM_UP': False,
+    # Seconds a match request waits for an identical in-flight computation.
+    'MATCH_COALESCE_TIMEOUT': 30.0,
+    # Admission control per endpoint. `concurrency` requests run at once and
+    # up to `queue` more wait at most `queue_timeout` seconds (then 503);
+    # `rate`/`burst` add a per-client token bucket (then 429).
+    'ADMISSION_LIMITS': {
+        'get_matches': {'concurrency': 4, 'queue': 32, 'queue_timeout': 5.0},
+        'create_pairings': {'concurrency': 1, 'queue': 2, 'queue_timeout': 5.0},
+        'create_users_bulk': {'concurrency': 2, 'queue': 4, 'queue_timeout': 5.0},
+    },
+    # Request threads per process, when the server has a fixed pool (src/server.py
+    # sets it). Limited endpoints then hold at most WEB_THREADS minus
+    # ADMISSION_RESERVED_THREADS of them, running or queued, so the rest
+    # always serve other endpoints.
+    'WEB_THREADS': None,
+    'ADMISSION_RESERVED_THREADS': 2,
+    # Larger cohorts are paired by a background job instead of inline: POST
+    # /api/pairings then answers 202 with the job to poll.
+    'PAIRING_SYNC_MAX_USERS': 200,
+    # Seconds between keepalives on idle match streams; each one also
+    # checks for writes made by other worker processes.
+    'MATCH_STREAM_HEARTBEAT': 15.0,
+    # Serialize writes through one writer thread that commits them in groups
+    # of up to DB_WRITE_BATCH, waiting up to DB_WRITE_DELAY_MS for a group to fill.
+    'DB_WRITE_QUEUE': False,
+    'DB_WRITE_BATCH': 100,
+    'DB_WRITE_DELAY_MS': 0.0,
+    # Background jobs (/api/jobs): worker threads per process, and how long
+    # finished jobs and their results are kept.
+    'JOB_WORKERS': 2,
+    'JOB_RETENTION_SECONDS': 86400,
+    # Thread pools of the ASGI front end (src/asgi.py). Endpoints listed in
+    # ASYNC_ROUTE_LIMITS share the smaller pool, each capped at its limit.
+    'ASYNC_THREADS': 16,
+    'ASYNC_LIMITED_THREADS': 4,
+    'ASYNC_ROUTE_LIMITS': {
+        'get_matches': 4,
+        'create_pairings': 1,
+        'create_users_bulk': 1,
+    },
+    # Cache-Control per endpoint; responses still carry ETags for revalidation.
+    'CACHE_CONTROL': {
+        'get_users': 'no-cache',
+        'get_matches': 'private, no-cache',
+        'suggest_skills': 'public, max-age=60',
+        'home': 'no-cache',
+        'static': 'public, max-age=300',
+    },
+}
 
-@app.route('/')
+def _flag(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def config_from_env(environ=None):
+    """Settings taken from environment variables, converted to config types"""
+    environ = os.environ if environ is None else environ
+    config = {}
+    for key in ('DATABASE_PATH', 'MATCH_WEIGHTING', 'ADMIN_TOKEN', 'SLOW_QUERY_LOG'):
+        if environ.get(key):
+            config[key] = environ[key]
+    for key in ('FUZZY_MATCH_THRESHOLD', 'SLOW_QUERY_MS', 'MATCH_COALESCE_TIMEOUT',
+                'MATCH_STREAM_HEARTBEAT', 'DB_WRITE_DELAY_MS'):
+        if environ.get(key):
+            config[key] = float(environ[key])
+    for key in ('ASYNC_THREADS', 'ASYNC_LIMITED_THREADS', 'JOB_WORKERS', 'JOB_RETENTION_SECONDS',
+                'DB_WRITE_BATCH', 'PAIRING_SYNC_MAX_USERS', 'WEB_THREADS',
+                'ADMISSION_RESERVED_THREADS', 'LSH_NUM_PERM', 'LSH_BANDS'):
+        if environ.get(key):
+            config[key] = int(environ[key])
+    for key in ('METRICS_ENABLED', 'SQL_TRACE', 'WARM_UP', 'DB_WRITE_QUEUE'):
+        if environ.get(key):
+            config[key] = _flag(environ[key])
+    return config
+
+DB_TIMED_METHODS = ('get_board_version', 'get_skill_stats', 'add_user', 'add_users',
+                    'get_user', 'get_user_by_email', 'get_users', 'get_all_users',
+                    'get_all_skills', 'get_users_by_skill', 'update_user', 'delete_user',
+                    'save_match', 'get_matches_for_user')
+
+class AppResources:
+    """The database handler, matchmaker and caches behind one app.
+
+    Everything is built on first use rather than at import or create_app
+    time, and rebuilt when accessed from a different process, so forked
+    workers each open their own database handler instead of inheriting the
+    parent's.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.metrics = MetricsRegistry() if app.config['METRICS_ENABLED'] else None
+        if self.metrics is not None:
+            self._register_metrics()
+        self.tracer = None
+        if app.config['SQL_TRACE'] or app.config['SLOW_QUERY_MS'] is not None:
+            slow_query_ms = app.config['SLOW_QUERY_MS']
+            self.tracer = QueryTracer(slow_query_ms=100 if slow_query_ms is None else slow_query_ms,
+                                      slow_log_path=app.config['SLOW_QUERY_LOG'])
+        self.profile_session = None
+        self.admission = AdmissionController(app.config['ADMISSION_LIMITS'],
+                                             threads=app.config['WEB_THREADS'],
+                                             reserved=app.config['ADMISSION_RESERVED_THREADS'])
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.match_flights = SingleFlight()
+        self._db = None
+        self._matchmaker = None
+        self._static_assets = None
+        self._jobs = None
+        self.skill_trie = None
+        self._skill_trie_seq = 0
+        self._trie_lock = threading.Lock()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    @property
+    def db(self):
+        self._check_pid()
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    self._db = self._build_db()
+        return self._db
+
+    @property
+    def matchmaker(self):
+        self._check_pid()
+        if self._matchmaker is None:
+            db = self.db
+            with self._lock:
+                if self._matchmaker is None:
+                    self._matchmaker = self._build_matchmaker(db)
+        return self._matchmaker
+
+    @property
+    def static_assets(self):
+        self._check_pid()
+        if self._static_assets is None:
+            self._static_assets = StaticAssetCache(STATIC_DIR)
+        return self._static_assets
+
+    @property
+    def jobs(self):
+        self._check_pid()
+        if self._jobs is None:
+            db = self.db
+            with self._lock:
+                if self._jobs is None:
+                    self._jobs = self._build_jobs(db)
+        return self._jobs
+
+    def _build_jobs(self, db):
+        runner = JobRunner(db, workers=self.app.config['JOB_WORKERS'],
+                           retention_seconds=self.app.config['JOB_RETENTION_SECONDS'])
+        runner.register('recompute_matches', functools.partial(run_recompute_matches, self),
+                        _validate_user_ids)
+        runner.register('pairings', functools.partial(run_pairings, self), _validate_pairing_params)
+        return runner
+
+    def _build_db(self):
+        db = DatabaseHandler(self.app.config['DATABASE_PATH'], tracer=self.tracer)
+        db.initialize_database()
+        if self.app.config['DB_WRITE_QUEUE']:
+            db.start_write_queue(max_batch=self.app.config['DB_WRITE_BATCH'],
+                                 max_delay=self.app.config['DB_WRITE_DELAY_MS'] / 1000)
+        if self.metrics is not None:
+            instrument_methods(db, DB_TIMED_METHODS, self.metrics.get('db_query_duration_seconds'))
+        return db
+
+    def _build_matchmaker(self, db):
+        matchmaker = Matchmaker(db, weighting=self.app.config['MATCH_WEIGHTING'],
+                                lsh_options={'num_perm': self.app.config['LSH_NUM_PERM'],
+                                             'bands': self.app.config['LSH_BANDS']})
+        if self.app.config['FUZZY_MATCH_THRESHOLD'] is not None:
+            matchmaker.enable_fuzzy_matching(threshold=self.app.config['FUZZY_MATCH_THRESHOLD'])
+        self._observe_stages(matchmaker)
+        return matchmaker
+
+    def _observe_stages(self, matchmaker):
+        if self.metrics is not None:
+            stages = self.metrics.get('matchmaker_stage_duration_seconds')
+            matchmaker.stage_observer = lambda stage, seconds: stages.observe(seconds, stage=stage)
+
+    def attach(self, db_handler, match_maker):
+        """Use an existing database handler and matchmaker, e.g. in tests"""
+        self.tracer = db_handler.tracer
+        if self.metrics is not None:
+            instrument_methods(db_handler, DB_TIMED_METHODS,
+                               self.metrics.get('db_query_duration_seconds'))
+        self._observe_stages(match_maker)
+        self._reset()
+        self._db = db_handler
+        self._matchmaker = match_maker
+
+    def get_skill_trie(self):
+        """The autocomplete trie: built from skill_stats on first use, then
+        kept current by replaying the change log, including writes made by
+        other processes"""
+        self._check_pid()
+        db = self.db
+        with self._trie_lock:
+            if self.skill_trie is not None and not self._apply_skill_changes(db):
+                self.skill_trie = None
+            if self.skill_trie is None:
+                seq, _, stats = db.get_skill_stats_with_seq()
+                self.skill_trie = SkillTrie.from_counts(
+                    {skill: offered + needed for skill, (offered, needed) in stats.items()})
+                self._skill_trie_seq = seq
+        return self.skill_trie
+
+    def _apply_skill_changes(self, db, batch=1000):
+        """Replay new changes onto the trie; False if it has to be rebuilt instead"""
+        while True:
+            try:
+                changes = db.changes_since(self._skill_trie_seq, limit=batch)
+            except ChangeLogCompacted:
+                return False
+            for change in changes:
+                if change.entity == 'board':
+                    return False
+                self.skill_trie.add(change.offered_added + change.needed_added)
+                self.skill_trie.add(change.offered_removed + change.needed_removed, delta=-1)
+                self._skill_trie_seq = change.seq
+            if len(changes) < batch:
+                return True
+
+    def warm_up(self):
+        """Build everything a first request would otherwise wait for"""
+        self.static_assets
+        self.matchmaker.refresh_skill_weights()
+        self.matchmaker.refresh_lsh_index()
+        self.get_skill_trie()
+
+    def _cache_counts(self):
+        counts = {
+            'skill_canonicalizer': (default_canonicalizer.hits, default_canonicalizer.misses),
+            'etag': (self.metrics.get('http_conditional_requests_total').value(result='hit'),
+                     self.metrics.get('http_conditional_requests_total').value(result='miss')),
+        }
+        if self._matchmaker is not None:
+            counts['skill_weights'] = (self._matchmaker.weight_cache_hits,
+                                       self._matchmaker.weight_cache_misses)
+        if self._db is not None and self._db._canonicalizer is not None:
+            counts['db_skill_canonicalizer'] = (self._db._canonicalizer.hits,
+                                                self._db._canonicalizer.misses)
+        return counts
+
+    def _cache_hit_ratios(self):
+        return {(name,): hits / (hits + misses)
+                for name, (hits, misses) in self._cache_counts().items() if hits + misses}
+
+    def _register_metrics(self):
+        metrics = self.metrics
+        metrics.histogram('http_request_duration_seconds', 'HTTP request latency by endpoint',
+                          ('endpoint', 'method'))
+        metrics.counter('http_requests_total', 'HTTP requests by endpoint and status',
+                        ('endpoint', 'method', 'status'))
+        metrics.counter('http_conditional_requests_total',
+                        'Conditional GETs answered with 304 (hit) or a full body (miss)', ('result',))
+        metrics.histogram('db_query_duration_seconds', 'DatabaseHandler call latency', ('method',))
+        metrics.histogram('matchmaker_stage_duration_seconds', 'find_matches time per stage', ('stage',))
+        metrics.collected('cache_hits_total', 'Cache hits', lambda: {
+            (name,): hits for name, (hits, _) in self._cache_counts().items()}, ('cache',), kind='counter')
+        metrics.collected('cache_misses_total', 'Cache misses', lambda: {
+            (name,): misses for name, (_, misses) in self._cache_counts().items()}, ('cache',), kind='counter')
+        metrics.collected('cache_hit_ratio', 'Cache hits over lookups', self._cache_hit_ratios, ('cache',))
+        metrics.counter('http_requests_rejected_total',
+                        'Requests turned away by admission control', ('endpoint', 'reason'))
+        metrics.collected('admission_active_requests', 'Requests holding a concurrency slot',
+                          lambda: self.admission.counts('active'), ('endpoint',))
+        metrics.collected('admission_queued_requests', 'Requests waiting for a concurrency slot',
+                          lambda: self.admission.counts('waiting'), ('endpoint',))
+        metrics.collected('match_computations_total',
+                          'find_matches runs by match requests; coalesced ones reused a concurrent run',
+                          lambda: {('computed',): self.match_flights.leaders,
+                                   ('coalesced',): self.match_flights.coalesced},
+                          ('result',), kind='counter')
+        metrics.collected('match_streams_open', 'Connected match event streams',
+                          lambda: {(): self._db.change_feed.subscriber_count() if self._db is not None else 0})
+        metrics.collected('db_connections_opened_total', 'SQLite connections opened',
+                          lambda: {(): self._db.connections_opened if self._db is not None else 0},
+                          kind='counter')
+        metrics.collected('db_write_groups_total', 'Transactions committed by the write queue',
+                          lambda: {(): self._write_queue_count('groups_committed')}, kind='counter')
+        metrics.collected('db_queued_writes_total', 'Writes committed by the write queue',
+                          lambda: {(): self._write_queue_count('writes_committed')}, kind='counter')
+
+    def _write_queue_count(self, attr):
+        write_queue = self._db.write_queue if self._db is not None else None
+        return getattr(write_queue, attr) if write_queue is not None else 0
+
+def create_app(config=None):
+    """Build the web app: defaults, then environment variables, then `config`.
+    
+    No database or file I/O happens here unless WARM_UP is set; resources
+    are created by the first request that needs them.
+    """
+    app = Flask(__name__, static_folder=None)
+    app.config.from_mapping(DEFAULT_CONFIG)
+    app.config['CACHE_CONTROL'] = dict(DEFAULT_CONFIG['CACHE_CONTROL'])
+    app.config['ASYNC_ROUTE_LIMITS'] = dict(DEFAULT_CONFIG['ASYNC_ROUTE_LIMITS'])
+    app.config['ADMISSION_LIMITS'] = dict(DEFAULT_CONFIG['ADMISSION_LIMITS'])
+    app.config.from_mapping(config_from_env())
+    if config:
+        app.config.from_mapping(config)
+    
+    resources = AppResources(app)
+    app.extensions['peer_exchange'] = resources
+    app.register_blueprint(bp)
+    if app.config['WARM_UP']:
+        resources.warm_up()
+    return app
+
+bp = Blueprint('api', __name__)
+
+def _resources():
+    return current_app.extensions['peer_exchange']
+
+def _endpoint():
+    """The view name without the blueprint prefix, e.g. 'get_users'"""
+    return (request.endpoint or '').rpartition('.')[2] or None
+
+ADMIN_ENDPOINTS = ('start_profile', 'get_profile')
+
+# Registered before the other after_request hooks so it runs last and
+# includes their time (compression in particular).
+@bp.before_app_request
+def start_request_timer():
+    if _resources().metrics is not None:
+        g.request_started = time.perf_counter()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics = _resources().metrics
+        endpoint = _endpoint() or 'unmatched'
+        metrics.get('http_request_duration_seconds').observe(
+            time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        metrics.get('http_requests_total').inc(endpoint=endpoint, method=request.method,
+                                               status=response.status_code)
+    return response
+
+# After the request timer so rejected requests are still timed and counted.
+@bp.before_app_request
+def admit_request():
+    resources = _resources()
+    endpoint = _endpoint()
+    try:
+        g.admission_slot = resources.admission.admit(endpoint, request.remote_addr)
+    except Rejected as rejection:
+        if resources.metrics is not None:
+            resources.metrics.get('http_requests_rejected_total').inc(endpoint=endpoint,
+                                                                     reason=rejection.reason)
+        status = 429 if rejection.reason == 'rate_limited' else 503
+        response = jsonify({'error': 'Too many requests' if status == 429 else 'Server busy, try again shortly'})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(rejection.retry_after)))
+        return response
+
+@bp.teardown_app_request
+def release_admission_slot(exc):
+    slot = g.pop('admission_slot', None)
+    if slot is not None:
+        slot.release()
+
+@bp.before_app_request
+def start_profiling_request():
+    session = _resources().profile_session
+    if session is not None and _endpoint() not in ADMIN_ENDPOINTS:
+        g.profiled = session.begin_request()
+
+@bp.teardown_app_request
+def finish_profiling_request(exc):
+    session = _resources().profile_session
+    if g.pop('profiled', False) and session is not None:
+        session.end_request()
+
+@bp.before_app_request
+def start_query_summary():
+    tracer = _resources().tracer
+    if tracer is not None:
+        tracer.start_request()
+
+@bp.after_app_request
+def add_server_timing(response):
+    tracer = _resources().tracer
+    summary = tracer.finish_request() if tracer is not None else None
+    if summary is not None:
+        response.headers.add('Server-Timing', summary.server_timing())
+    return response
+
+@bp.after_app_request
+def apply_cache_control(response):
+    cache_control = current_app.config['CACHE_CONTROL'].get(_endpoint())
+    if cache_control and 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+@bp.after_app_request
+def compress_response(response):
+    """Compress large textual responses for clients that accept it"""
+    if (response.status_code < 200 or response.status_code in (204, 304) or
+            response.direct_passthrough or response.is_streamed or
+            'Content-Encoding' in response.headers or
+            not is_compressible(response.mimetype)):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None or len(data) < current_app.config['COMPRESSION_MIN_SIZE']:
+        return response
+    
+    response.set_data(compress(data, encoding, current_app.config['COMPRESSION_LEVEL']))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # Each encoding is a different representation and needs its own strong ETag.
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    metrics = _resources().metrics
+    if metrics is None:
+        return jsonify({'error': 'Not found'}), 404
+    return current_app.response_class(metrics.render(), mimetype=MetricsRegistry.CONTENT_TYPE)
+
+def _not_modified(etag):
+    """A 304 response if the client already holds `etag`, otherwise None"""
+    metrics = _resources().metrics
+    for candidate in (etag,) + tuple(f"{etag}-{encoding}" for encoding in supported_encodings()):
+        if request.if_none_match.contains_weak(candidate):
+            if metrics is not None:
+                metrics.get('http_conditional_requests_total').inc(result='hit')
+            response = current_app.response_class(status=304)
+            response.set_etag(candidate)
+            return response
+    if metrics is not None and request.if_none_match:
+        metrics.get('http_conditional_requests_total').inc(result='miss')
+    return None
+
+def _serve_asset(name):
+    asset = _resources().static_assets.get(name)
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+    
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding not in asset.encoded:
+        encoding = None
+    etag = f"{asset.etag}-{encoding}" if encoding else asset.etag
+    
+    not_modified = _not_modified(asset.etag)
+    if not_modified:
+        return not_modified
+    
+    response = current_app.response_class(asset.encoded[encoding] if encoding else asset.body,
+                                          mimetype=asset.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if asset.encoded:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    return response
+
+@bp.route('/')
 def home():
-    with open(os.path.join(static_dir, 'index.html')) as f:
-        return f.read()
+    return _serve_asset('index.html')
+
+@bp.route('/static/<path:filename>')
+def static(filename):
+    return _serve_asset(filename)
 
-@app.route('/api/users', methods=['GET'])
+@bp.route('/api/users', methods=['GET'])
 def get_users():
+    if 'ids' in request.args:
+        try:
+            ids = [int(part) for part in request.args['ids'].split(',') if part.strip()]
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+        return _get_users_by_ids(ids)
+    
+    db = _resources().db
+    etag = f"users-{db.get_board_version()}"
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    
     users = db.get_all_users()
     result = []
     for u in users:
         result.append(u.to_dict())
-    return jsonify(result)
+    response = jsonify(result)
+    response.set_etag(etag)
+    return response
 
-@app.route('/api/users', methods=['POST'])
+@bp.route('/api/users/batch', methods=['POST'])
+def get_users_batch():
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return jsonify({'error': 'ids must be a list of integers'}), 400
+    return _get_users_by_ids(ids)
+
+def _get_users_by_ids(ids):
+    max_ids = current_app.config['BATCH_MAX_IDS']
+    if len(ids) > max_ids:
+        return jsonify({'error': f'At most {max_ids} ids per request'}), 413
+    
+    users = _resources().db.get_users(ids)
+    found = {u.user_id for u in users}
+    return jsonify({
+        'users': [u.to_dict() for u in users],
+        'missing': [user_id for user_id in dict.fromkeys(ids) if user_id not in found]
+    })
+
+@bp.route('/api/users', methods=['POST'])
 def create_user():
     data = request.json
     
-    if not data.get('name'):
-        return jsonify({'error': 'Name is required'}), 400
-    if not data.get('email'):
-        return jsonify({'error': 'Email is required'}), 400
-    
     try:
-        new_user = User(
-            name=data['name'],
-            email=data['email'],
-            skills_offered=data.get('skills_offered', []),
-            skills_needed=data.get('skills_needed', [])
-        )
-        user_id = db.add_user(new_user)
+        new_user = _user_from_payload(data)
+        user_id = _resources().db.add_user(new_user)
         new_user.user_id = user_id
+        _index_new_users([new_user])
         return jsonify(new_user.to_dict()), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/users/<int:user_id>/matches', methods=['GET'])
-def get_matches(user_id):
-    user = db.get_user(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+def _user_from_payload(data):
+    """Validate one user payload, raising ValueError with a client-facing message"""
+    if not isinstance(data, dict):
+        raise ValueError('User must be a JSON object')
+    for key, label in (('name', 'Name'), ('email', 'Email')):
+        if not data.get(key):
+            raise ValueError(f'{label} is required')
+        if not isinstance(data[key], str):
+            raise ValueError(f'{label} must be a string')
+    skills = {}
+    for key in ('skills_offered', 'skills_needed'):
+        value = data.get(key)
+        if value is None:
+            value = []
+        if not isinstance(value, list) or not all(isinstance(skill, str) for skill in value):
+            raise ValueError(f'{key} must be a list of strings')
+        skills[key] = value
+    
+    return User(
+        name=data['name'],
+        email=data['email'],
+        skills_offered=skills['skills_offered'],
+        skills_needed=skills['skills_needed']
+    )
+
+def _index_new_users(users):
+    resources = _resources()
+    for user in users:
+        resources.matchmaker.index_user(user)
+
+def _read_bulk_rows(max_rows):
+    """Rows from a JSON array body or an NDJSON stream; unparseable lines become errors.
+
+    An NDJSON stream is read only up to `max_rows` + 1 rows, enough to tell
+    that it is too large without buffering the rest.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        rows = []
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(ValueError('Invalid JSON'))
+            if len(rows) > max_rows:
+                break
+        return rows
     
-    matches = matchmaker.find_matches(user_id)
+    rows = request.get_json(silent=True)
+    if not isinstance(rows, list):
+        raise ValueError('Body must be a JSON array or NDJSON')
+    return rows
+
+@bp.route('/api/users/bulk', methods=['POST'])
+def create_users_bulk():
+    max_batch = current_app.config['BULK_MAX_BATCH']
+    try:
+        rows = _read_bulk_rows(max_batch)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if len(rows) > max_batch:
+        return jsonify({'error': f'At most {max_batch} users per request'}), 413
+    
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        try:
+            if isinstance(row, Exception):
+                raise row
+            valid.append((index, _user_from_payload(row)))
+        except ValueError as e:
+            results[index] = {'index': index, 'error': str(e)}
+    
+    inserted = _resources().db.add_users([user for _, user in valid])
+    for (index, user), (user_id, error) in zip(valid, inserted):
+        if error:
+            results[index] = {'index': index, 'error': error}
+        else:
+            results[index] = {'index': index, 'user_id': user_id}
+    _index_new_users([user for _, user in valid if user.user_id])
+    
+    created = sum(1 for result in results if 'user_id' in result)
+    return jsonify({
+        'created': created,
+        'failed': len(results) - created,
+        'results': results
+    }), 201 if created else 400
+
+def _match_query_params():
+    """Parse the matches endpoint's filters; returns (params, error_response)"""
+    args = request.args
+    params = {
+        'approximate': args.get('approximate', '').lower() in ('1', 'true', 'yes'),
+        'mutual_only': args.get('mutual_only', '').lower() in ('1', 'true', 'yes'),
+        'limit': None,
+        'min_score': 0.1,
+        'fields': None,
+    }
+    try:
+        if 'limit' in args:
+            params['limit'] = int(args['limit'])
+        if 'min_score' in args:
+            params['min_score'] = float(args['min_score'])
+    except ValueError:
+        return None, (jsonify({'error': 'limit must be an integer and min_score a number'}), 400)
+    if params['limit'] is not None and params['limit'] < 1:
+        return None, (jsonify({'error': 'limit must be at least 1'}), 400)
+    if not 0.0 <= params['min_score'] <= 1.0:
+        return None, (jsonify({'error': 'min_score must be between 0 and 1'}), 400)
+    
+    if 'fields' in args:
+        fields = [name.strip() for name in args['fields'].split(',') if name.strip()]
+        unknown = [name for name in fields if name not in USER_FIELDS]
+        if unknown or not fields:
+            return None, (jsonify({'error': f"fields must be a comma separated subset of {', '.join(USER_FIELDS)}"}), 400)
+        params['fields'] = fields
+    return params, None
+
+def _find_matches(resources, user_id, board_version, params, timeout):
+    """find_matches through the app's SingleFlight, so concurrent identical
+    requests share one run (and one rewrite of the matches rows)"""
+    matchmaker = resources.matchmaker
+    flight_key = (user_id, board_version, params['approximate'], params['mutual_only'],
+                  params['limit'], params['min_score'])
+    return resources.match_flights.do(
+        flight_key,
+        lambda: matchmaker.find_matches(user_id, min_score=params['min_score'],
+                                        approximate=params['approximate'],
+                                        limit=params['limit'],
+                                        mutual_only=params['mutual_only']),
+        timeout=timeout)
+
+def _match_entries(resources, user, matches, fields):
+    db = resources.db
+    matchmaker = resources.matchmaker
     match_list = []
     
+    match_users = {u.user_id: u for u in db.get_users([match_id for match_id, _ in matches])}
+    
     for match_id, score in matches:
-        match_user = db.get_user(match_id)
-        match_details = matchmaker.get_match_details(user_id, match_id)
-        
+        match_user = match_users.get(match_id)
+        if match_user is None:
+            continue  # deleted after the matches were computed
+        can_learn = matchmaker.skills_learnable(user, match_user)
+        can_teach = matchmaker.skills_learnable(match_user, user)
+    
         match_list.append({
-            'user': match_user.to_dict(),
+            'user': match_user.to_dict(fields),
             'score': score,
-            'can_learn': match_details['user1_can_learn'],
-            'can_teach': match_details['user2_can_learn'],
-            'mutual': match_details['is_mutual_exchange']
+            'can_learn': can_learn,
+            'can_teach': can_teach,
+            'mutual': bool(can_learn and can_teach)
         })
+    return match_list
+
+@bp.route('/api/users/<int:user_id>/matches', methods=['GET'])
+def get_matches(user_id):
+    params, error = _match_query_params()
+    if error:
+        return error
     
-    return jsonify(match_list)
+    resources = _resources()
+    db = resources.db
+    # Matches depend on every profile on the board, so the board version keys them.
+    board_version = db.get_board_version()
+    etag = (f"matches-{user_id}-{board_version}-{current_app.config['MATCH_WEIGHTING']}-"
+            f"{int(params['approximate'])}-{int(params['mutual_only'])}-{params['limit']}-"
+            f"{params['min_score']}-{','.join(params['fields'] or ['all'])}")
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    
+    user = db.get_user(user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    try:
+        matches = _find_matches(resources, user_id, board_version, params,
+                                current_app.config['MATCH_COALESCE_TIMEOUT'])
+    except SingleFlightTimeout:
+        response = jsonify({'error': 'Match computation is taking too long, try again shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
+    response = jsonify(_match_entries(resources, user, matches, params['fields']))
+    response.set_etag(etag)
+    return response
 
-if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+def open_match_stream(user_id, notify=None):
+    """Validate a stream request in the current request context.
+    
+    Returns (MatchStream, subscription, None), subscribed before the first
+    snapshot so no change is missed, or (None, None, error_response).
+    `notify` is passed on to ChangeFeed.subscribe.
+    """
+    params, error = _match_query_params()
+    if error:
+        return None, None, error
+    
+    resources = _resources()
+    db = resources.db
+    if not db.get_user(user_id):
+        return None, None, (jsonify({'error': 'User not found'}), 404)
+    timeout = current_app.config['MATCH_COALESCE_TIMEOUT']
+    
+    def compute():
+        board_version = db.get_board_version()
+        user = db.get_user(user_id)
+        if user is None:
+            return MatchSnapshot(board_version, None, [])
+        matches = _find_matches(resources, user_id, board_version, params, timeout)
+        return MatchSnapshot(board_version, frozenset(user.skills_offered + user.skills_needed),
+                             _match_entries(resources, user, matches, params['fields']))
+    
+    return MatchStream(user_id, compute), db.change_feed.subscribe(notify), None
+
+@bp.route('/api/users/<int:user_id>/matches/stream', methods=['GET'])
+def stream_matches(user_id):
+    """Server-Sent Events: the current matches, then changes as users are written"""
+    stream, subscription, error = open_match_stream(user_id)
+    if error:
+        return error
+    
+    db = _resources().db
+    response = current_app.response_class(
+        stream.iter_events(subscription, current_app.config['MATCH_STREAM_HEARTBEAT'],
+                           db.get_board_version),
+        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(subscription.close)
+    return response
+
+@bp.route('/api/skills/suggest', methods=['GET'])
+def suggest_skills():
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    trie = _resources().get_skill_trie()
+    limit = max(1, min(limit, trie.top_k))
+    suggestions = trie.suggest(query, limit=limit)
+    return jsonify({
+        'query': query,
+        'suggestions': [{'skill': skill, 'popularity': popularity}
+                        for skill, popularity in suggestions]
+    })
+
+def _skill_search(skill, role):
+    try:
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if not 1 <= limit <= 100 or offset < 0:
+        return jsonify({'error': 'limit must be between 1 and 100 and offset must not be negative'}), 400
+    
+    db = _resources().db
+    users, total = db.get_users_by_skill(skill, role=role, limit=limit, offset=offset)
+    return jsonify({
+        'skill': db.canonicalizer.canonicalize(skill),
+        'total': total,
+        'limit': limit,
+        'offset': offset,
+        'users': [u.to_dict() for u in users]
+    })
+
+@bp.route('/api/skills/<path:skill>/teachers', methods=['GET'])
+def get_skill_teachers(skill):
+    return _skill_search(skill, 'offered')
+
+@bp.route('/api/skills/<path:skill>/learners', methods=['GET'])
+def get_skill_learners(skill):
+    return _skill_search(skill, 'needed')
+
+@bp.route('/api/pairings', methods=['POST'])
+def create_pairings():
+    try:
+        params = _validate_pairing_params(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    resources = _resources()
+    user_ids = params['user_ids']
+    cohort_size = len(user_ids) if user_ids is not None else resources.db.get_user_count()
+    if cohort_size > current_app.config['PAIRING_SYNC_MAX_USERS']:
+        return _job_accepted(resources.jobs.submit('pairings', params))
+    return jsonify(run_pairings(resources, None, params))
+
+def _validate_user_ids(params):
+    user_ids = params.get('user_ids')
+    if user_ids is not None and (not isinstance(user_ids, list) or
+                                 not all(isinstance(i, int) and not isinstance(i, bool) for i in user_ids)):
+        raise ValueError('user_ids must be a list of integers')
+    return {'user_ids': user_ids}
+
+def _validate_pairing_params(params):
+    # Imported here: the blossom solver is the heaviest import and only pairing needs it.
+    from src.utils.cohort import CohortPairer
+    
+    mode = params.get('mode', 'auto')
+    if mode not in CohortPairer.MODES:
+        raise ValueError(f"Mode must be one of {', '.join(CohortPairer.MODES)}")
+    return dict(_validate_user_ids(params), mode=mode)
+
+def run_pairings(resources, context, params):
+    """Pair a cohort (the whole board unless user_ids is given); also the 'pairings' job"""
+    from src.utils.cohort import CohortPairer
+    
+    # Pair from one snapshot so the users and skill weights read along the
+    # way agree, and concurrent writes neither block nor skew the run.
+    with resources.db.open_snapshot() as snapshot:
+        matchmaker = resources._build_matchmaker(snapshot)
+        result = CohortPairer(matchmaker).pair(user_ids=params['user_ids'], mode=params['mode'])
+    return result.to_dict()
+
+def run_recompute_matches(resources, context, params):
+    """The 'recompute_matches' job: refresh stored matches for every user, or user_ids"""
+    db = resources.db
+    user_ids = params['user_ids']
+    if user_ids is None:
+        user_ids = [user.user_id for user in db.get_all_users()]
+    matchmaker = resources.matchmaker
+    matches = 0
+    for done, user_id in enumerate(user_ids, 1):
+        matches += len(matchmaker.find_matches(user_id))
+        context.progress(done / len(user_ids), f"{done} of {len(user_ids)} users")
+    return {'users': len(user_ids), 'matches': matches}
 
+@bp.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    status = request.args.get('status')
+    if status is not None and status not in JOB_STATUSES:
+        return jsonify({'error': f"status must be one of {', '.join(JOB_STATUSES)}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 1000)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify([job.to_dict() for job in _resources().db.list_jobs(status=status, limit=limit)])
+
+@bp.route('/api/jobs/<kind>', methods=['POST'])
+def create_job(kind):
+    """Queue a background job; poll the returned Location for progress and the result"""
+    jobs = _resources().jobs
+    if kind not in jobs.kinds:
+        return jsonify({'error': f"Unknown job kind; available: {', '.join(jobs.kinds)}"}), 404
+    params = request.get_json(silent=True)
+    if params is not None and not isinstance(params, dict):
+        return jsonify({'error': 'Job parameters must be a JSON object'}), 400
+    try:
+        job = jobs.submit(kind, params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _job_accepted(job)
+
+def _job_accepted(job):
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job.job_id}"
+    return response
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = _resources().db.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    resources = _resources()
+    if not resources.jobs.cancel(job_id):
+        job = resources.db.get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'error': f"Job already {job.status}"}), 409
+    return jsonify(resources.db.get_job(job_id).to_dict()), 202
+
+def _require_admin():
+    """An error response unless the request carries the admin token"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Not found'}), 404
+    supplied = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+@bp.route('/admin/profile', methods=['POST'])
+def start_profile():
+    denied = _require_admin()
+    if denied:
+        return denied
+    resources = _resources()
+    session = resources.profile_session
+    if session is not None and not session.done:
+        return jsonify({'error': 'A profile is already running', **session.status()}), 409
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        requests = int(data['requests']) if 'requests' in data else None
+        seconds = float(data['seconds']) if 'seconds' in data else None
+        interval = float(data.get('interval_ms', 5)) / 1000
+    except (TypeError, ValueError):
+        return jsonify({'error': 'requests, seconds and interval_ms must be numbers'}), 400
+    if ((requests is None) == (seconds is None) or
+            (requests is not None and not 1 <= requests <= 10000) or
+            (seconds is not None and not 0 < seconds <= 300) or
+            not 0.001 <= interval <= 1):
+        return jsonify({'error': 'Give either requests (1-10000) or seconds (up to 300), '
+                                 'and interval_ms between 1 and 1000'}), 400
+    
+    resources.profile_session = ProfileSession(requests=requests, seconds=seconds, interval=interval)
+    return jsonify(resources.profile_session.status()), 202
+
+@bp.route('/admin/profile', methods=['GET'])
+def get_profile():
+    """Collapsed stacks of the last profile, ready for flamegraph.pl or speedscope"""
+    denied = _require_admin()
+    if denied:
+        return denied
+    session = _resources().profile_session
+    if session is None:
+        return jsonify({'error': 'No profile has been started'}), 404
+    if not session.done:
+        return jsonify(session.status()), 202
+    
+    response = current_app.response_class(session.result(), mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(session.profiler.samples)
+    return response
+
+if __name__ == '__main__':
+    create_app().run(debug=True, port=5001)
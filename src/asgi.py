@@ -0,0 +1,263 @@
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from werkzeug.exceptions import HTTPException
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import create_app, open_match_stream
+from src.utils.match_stream import KEEPALIVE
+
+
+class AsgiApp:
+    """ASGI front end for the Flask app with per-route thread pools and limits.
+
+    Every route of src/api.py is served unchanged, but the blocking SQLite
+    and matchmaking work runs on thread pools instead of the event loop.
+    Endpoints named in ASYNC_ROUTE_LIMITS run on their own small pool and at
+    most `limit` of each run at once; extra requests wait on the event loop
+    without holding a thread. Everything else uses the general pool, so a
+    burst of slow match requests can't starve cheap lookups.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.route_limits: Dict[str, int] = dict(app.config['ASYNC_ROUTE_LIMITS'])
+        self._adapter = app.url_map.bind('localhost')
+        self._pools: Optional[Dict[str, ThreadPoolExecutor]] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self.waiting: Dict[str, int] = {}
+        metrics = app.extensions['peer_exchange'].metrics
+        if metrics is not None:
+            # Scraped from a request thread while the event loop updates `waiting`:
+            # iterate over a copy, which is taken in one step.
+            metrics.collected('asgi_requests_waiting', 'Requests queued behind a route concurrency limit',
+                              lambda: {(endpoint,): count for endpoint, count in dict(self.waiting).items()},
+                              ('endpoint',))
+
+    def _pool(self, name: str) -> ThreadPoolExecutor:
+        # Created on first use so each worker process gets its own threads.
+        if self._pools is None:
+            config = self.app.config
+            self._pools = {
+                'default': ThreadPoolExecutor(config['ASYNC_THREADS'], thread_name_prefix='asgi'),
+                'limited': ThreadPoolExecutor(config['ASYNC_LIMITED_THREADS'],
+                                              thread_name_prefix='asgi-limited'),
+            }
+        return self._pools[name]
+
+    def route(self, path: str, method: str) -> Tuple[Optional[str], dict]:
+        """The view name (without the blueprint prefix) and URL arguments for a request"""
+        try:
+            endpoint, args = self._adapter.match(path, method)
+        except HTTPException:
+            return None, {}
+        return endpoint.rpartition('.')[2], args
+
+    def endpoint_for(self, path: str, method: str) -> Optional[str]:
+        return self.route(path, method)[0]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.app.config['WARM_UP']:
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._pool('default'), self.app.extensions['peer_exchange'].warm_up)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def close(self) -> None:
+        if self._pools is not None:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False)
+            self._pools = None
+
+    async def handle_http(self, scope, receive, send):
+        body = await _read_body(receive)
+        endpoint, args = self.route(scope['path'], scope['method'])
+        if endpoint == 'stream_matches':
+            await self.stream_matches(scope, body, receive, send, args['user_id'])
+            return
+        limit = self.route_limits.get(endpoint)
+        if limit is None:
+            await self._run(self._pool('default'), scope, body, send)
+            return
+
+        semaphore = self._limits.get(endpoint)
+        if semaphore is None:
+            semaphore = self._limits[endpoint] = asyncio.Semaphore(limit)
+        self.waiting[endpoint] = self.waiting.get(endpoint, 0) + 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[endpoint] -= 1
+        try:
+            await self._run(self._pool('limited'), scope, body, send)
+        finally:
+            semaphore.release()
+
+    async def stream_matches(self, scope, body, receive, send, user_id):
+        """Serve a match stream on the event loop, so an idle stream holds no thread.
+
+        Only the snapshot and recomputations run on the pool; writes in this
+        process wake the stream through the database change feed.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._pool('default')
+        resources = self.app.extensions['peer_exchange']
+        environ = build_environ(scope, body)
+        wake = asyncio.Event()
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # the loop is gone; the subscription is about to be closed
+
+        def open_stream():
+            with self.app.request_context(environ):
+                stream, subscription, _ = open_match_stream(user_id, notify=notify)
+                return stream, subscription
+
+        stream, subscription = await loop.run_in_executor(pool, open_stream)
+        if stream is None:
+            # Invalid parameters or unknown user: let the view render the error.
+            await self._run(pool, scope, body, send)
+            return
+
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            message = await loop.run_in_executor(pool, stream.start)
+            await send({'type': 'http.response.body', 'body': message, 'more_body': True})
+            heartbeat = self.app.config['MATCH_STREAM_HEARTBEAT']
+            while not stream.closed:
+                woken = asyncio.ensure_future(wake.wait())
+                await asyncio.wait({woken, disconnected}, timeout=heartbeat,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                woken.cancel()
+                if disconnected.done():
+                    return
+                wake.clear()
+                changes, overflowed = subscription.drain()
+                if changes or overflowed:
+                    message = await loop.run_in_executor(pool, stream.on_changes, changes, overflowed)
+                else:
+                    message = await loop.run_in_executor(
+                        pool, lambda: stream.check_version(resources.db.get_board_version()))
+                await send({'type': 'http.response.body', 'body': message or KEEPALIVE,
+                            'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            subscription.close()
+            disconnected.cancel()
+
+    async def _run(self, pool, scope, body, send):
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, body)
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                  for name, value in headers]
+
+        def call_app():
+            chunks = self.app(environ, start_response)
+            # Most Flask responses are a single buffered chunk; only streams need more hops.
+            if isinstance(chunks, (list, tuple)):
+                return chunks, None
+            iterator = iter(chunks)
+            return [], iterator
+
+        chunks, iterator = await loop.run_in_executor(pool, call_app)
+        await send({'type': 'http.response.start', 'status': started['status'],
+                    'headers': started['headers']})
+        for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        if iterator is not None:
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(pool, next, iterator, None)
+                    if chunk is None:
+                        break
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            finally:
+                close = getattr(iterator, 'close', None)
+                if close is not None:
+                    await loop.run_in_executor(pool, close)
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+async def _wait_for_disconnect(receive) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _read_body(receive) -> bytes:
+    parts = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        parts.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    return b''.join(parts)
+
+
+def build_environ(scope, body: bytes) -> dict:
+    """The WSGI environ for an ASGI HTTP scope whose body has been read"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server_name),
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    if body and 'CONTENT_LENGTH' not in environ:
+        environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def create_asgi_app(config=None) -> AsgiApp:
+    """Build the ASGI app, e.g. `uvicorn --factory src.asgi:create_asgi_app`"""
+    return AsgiApp(create_app(config))
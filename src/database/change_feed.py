@@ -0,0 +1,105 @@
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class UserChange:
+    """One committed user write: 'insert', 'update' or 'delete'.
+
+    `skills` holds the user's offered and needed skills both before and
+    after the write, so a subscriber can tell whether it might be affected.
+    `board_version` is the version the write produced and `seq` its
+    sequence number in the `changes` table.
+    """
+    op: str
+    user_id: int
+    skills: FrozenSet[str]
+    board_version: int
+    seq: Optional[int] = None
+
+
+class Subscription:
+    """Changes published since the last drain, up to `max_pending` of them.
+
+    If more pile up the oldest are dropped and `overflowed` is set, telling
+    the subscriber to treat everything as changed.
+    """
+
+    def __init__(self, feed: 'ChangeFeed', max_pending: int,
+                 notify: Optional[Callable[[], None]] = None):
+        self._feed = feed
+        self._pending: deque = deque(maxlen=max_pending)
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._notify = notify
+        self.overflowed = False
+
+    def _push(self, change: UserChange) -> None:
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.overflowed = True
+            self._pending.append(change)
+        self._ready.set()
+        if self._notify is not None:
+            self._notify()
+
+    def drain(self) -> Tuple[List[UserChange], bool]:
+        """Take the pending changes and the overflow flag, resetting both"""
+        with self._lock:
+            changes, overflowed = list(self._pending), self.overflowed
+            self._pending.clear()
+            self.overflowed = False
+            self._ready.clear()
+        return changes, overflowed
+
+    def wait(self, timeout: Optional[float] = None) -> Tuple[List[UserChange], bool]:
+        """Block until something is published (or `timeout`), then drain"""
+        self._ready.wait(timeout)
+        return self.drain()
+
+    def close(self) -> None:
+        self._feed._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ChangeFeed:
+    """In-process fan-out of committed user writes to subscribers.
+
+    Publishing is a no-op without subscribers. Only writes made through
+    this process's DatabaseHandler are seen.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, notify: Optional[Callable[[], None]] = None) -> Subscription:
+        """Start receiving changes; `notify` is also called, from the writing thread, on each one"""
+        subscription = Subscription(self, self.max_pending, notify)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    def publish(self, change: UserChange) -> None:
+        # The list is replaced, never mutated, so it can be iterated without the lock.
+        for subscription in self._subscribers:
+            subscription._push(change)
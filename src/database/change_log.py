@@ -0,0 +1,55 @@
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+class ChangeLogCompacted(Exception):
+    """Changes a reader asked for were already compacted away; it has to rescan"""
+
+    def __init__(self, requested_seq: int, compacted_through: int):
+        super().__init__(f"changes up to seq {compacted_through} were compacted; "
+                         f"cannot read from seq {requested_seq}")
+        self.requested_seq = requested_seq
+        self.compacted_through = compacted_through
+
+
+@dataclass(frozen=True)
+class ChangeRecord:
+    """One row of the `changes` table.
+
+    `entity` is 'user' for user inserts, updates and deletes, carrying the
+    skills each one added and removed, or 'board' with op 'rebuild' when
+    a migration rewrote stored skills wholesale.
+    """
+    seq: int
+    entity: str
+    entity_id: Optional[int]
+    op: str
+    offered_added: Tuple[str, ...] = ()
+    offered_removed: Tuple[str, ...] = ()
+    needed_added: Tuple[str, ...] = ()
+    needed_removed: Tuple[str, ...] = ()
+    created_at: str = ''
+
+    @classmethod
+    def from_row(cls, row) -> 'ChangeRecord':
+        delta = json.loads(row["skills_delta"])
+        return cls(seq=row["seq"], entity=row["entity"], entity_id=row["entity_id"], op=row["op"],
+                   offered_added=tuple(delta.get("offered_added", ())),
+                   offered_removed=tuple(delta.get("offered_removed", ())),
+                   needed_added=tuple(delta.get("needed_added", ())),
+                   needed_removed=tuple(delta.get("needed_removed", ())),
+                   created_at=row["created_at"])
+
+
+def skills_delta(old_skills, new_skills) -> str:
+    """JSON for the skills_delta column from (offered, needed) before and after"""
+    delta = {}
+    for role, old, new in (("offered", old_skills[0], new_skills[0]),
+                           ("needed", old_skills[1], new_skills[1])):
+        old, new = set(old), set(new)
+        if new - old:
+            delta[f"{role}_added"] = sorted(new - old)
+        if old - new:
+            delta[f"{role}_removed"] = sorted(old - new)
+    return json.dumps(delta)
@@ -1,21 +1,122 @@
 import sqlite3
 import json
-from typing import List, Optional
+import pathlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from src.models.user import User
 from src.models.match import Match
+from src.models.job import FINISHED_STATUSES, Job
+from src.database.change_feed import ChangeFeed, UserChange
+from src.database.change_log import ChangeLogCompacted, ChangeRecord, skills_delta
+from src.database.tracing import QueryTracer
+from src.database.write_queue import WriteQueue
+from src.utils.skill_canonicalizer import DEFAULT_SYNONYMS, SkillCanonicalizer, skill_key
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 class DatabaseHandler:
-    def __init__(self, db_path: str = "peer_exchange.db"):
+    # Stays under SQLite's default limit on bound parameters per statement.
+    QUERY_CHUNK_SIZE = 500
+    # The change log keeps at least this many rows; older ones are deleted
+    # every CHANGE_LOG_COMPACT_EVERY changes.
+    CHANGE_LOG_RETENTION = 100000
+    CHANGE_LOG_COMPACT_EVERY = 1000
+    # Job columns update_job may set.
+    JOB_UPDATE_COLUMNS = ('status', 'progress', 'message', 'result', 'error', 'owner_pid',
+                          'started_at', 'finished_at')
+
+    def __init__(self, db_path: str = "peer_exchange.db", tracer: Optional[QueryTracer] = None):
         self.db_path = db_path
+        self.tracer = tracer
+        self._canonicalizer: Optional[SkillCanonicalizer] = None
+        self.connections_opened = 0
+        self.change_feed = ChangeFeed()
+        self.write_queue: Optional[WriteQueue] = None
 
     def get_connection(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        self.connections_opened += 1
+        if self.tracer is not None:
+            conn = self.tracer.connect(self.db_path)
+        else:
+            conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_read_connection(self) -> sqlite3.Connection:
+        """A connection opened with mode=ro: any write through it fails"""
+        self.connections_opened += 1
+        uri = pathlib.Path(self.db_path).absolute().as_uri() + "?mode=ro"
+        if self.tracer is not None:
+            conn = self.tracer.connect(uri, uri=True)
+        else:
+            conn = sqlite3.connect(uri, uri=True)
         conn.row_factory = sqlite3.Row
         return conn
 
+    def open_snapshot(self) -> 'DatabaseSnapshot':
+        """A read-only, point-in-time view of the database for long reads.
+
+        Close it (or use it as a context manager) when done: while it is
+        open, SQLite cannot checkpoint past it and the WAL keeps growing.
+        """
+        from src.database.snapshot import DatabaseSnapshot
+
+        return DatabaseSnapshot(self)
+
+    def start_write_queue(self, max_batch: int = 100, max_delay: float = 0.0) -> None:
+        """Send every write through one writer thread that commits them in groups.
+
+        Concurrent writers then queue in-process instead of contending for
+        SQLite's write lock, and a group of writes shares one commit. Reads
+        keep using their own connections.
+        """
+        if self.write_queue is None:
+            self.write_queue = WriteQueue(self.get_connection, max_batch=max_batch,
+                                          max_delay=max_delay, finish=self._finish_write)
+
+    def close(self) -> None:
+        """Stop the writer thread, if any, once its queued writes are committed"""
+        if self.write_queue is not None:
+            self.write_queue.close()
+            self.write_queue = None
+
+    def _write(self, fn: Callable[[sqlite3.Cursor], Tuple[Any, tuple]]) -> Future:
+        """Run `fn(cursor)` in a write transaction.
+
+        `fn` returns (result, changes). The future resolves to the result
+        once the write is committed, after the changes are published. With
+        the write queue on, that happens when the writer commits the write's
+        group; otherwise the write commits before this returns.
+        """
+        if self.write_queue is not None and not self.write_queue.on_writer_thread:
+            return self.write_queue.submit(fn)
+        future = Future()
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # IMMEDIATE takes the write lock up front, waiting out other
+                # writers. A deferred BEGIN would let a write that reads first
+                # fail its lock upgrade at once with "database is locked".
+                cursor.execute("BEGIN IMMEDIATE")
+                value = fn(cursor)
+                conn.commit()
+            future.set_result(self._finish_write(value))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _finish_write(self, value: Tuple[Any, tuple]) -> Any:
+        result, changes = value
+        self._publish(*changes)
+        return result
+
     def initialize_database(self) -> None:
         with self.get_connection() as conn:
+            # WAL lets readers, including long-lived snapshots, run alongside a writer.
+            conn.execute("PRAGMA journal_mode=WAL")
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -63,40 +164,436 @@ class DatabaseHandler:
                 )
             """)
 
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_skills_offered_skill ON skills_offered (skill, user_id)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_skills_needed_skill ON skills_needed (skill, user_id)"
+            )
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS skill_synonyms (
+                    alias TEXT PRIMARY KEY,
+                    canonical TEXT NOT NULL
+                )
+            """)
+
+            cursor.executemany(
+                "INSERT OR IGNORE INTO skill_synonyms (alias, canonical) VALUES (?, ?)",
+                DEFAULT_SYNONYMS.items()
+            )
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS skill_stats (
+                    skill TEXT PRIMARY KEY,
+                    offered_count INTEGER NOT NULL DEFAULT 0,
+                    needed_count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS board_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+
+            # Append-only log of every mutation, for consumers that update incrementally.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entity TEXT NOT NULL,
+                    entity_id INTEGER,
+                    op TEXT NOT NULL,
+                    skills_delta TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    owner_pid INTEGER,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, finished_at)"
+            )
+
+            cursor.execute("SELECT value FROM board_meta WHERE key = 'user_count'")
+            if cursor.fetchone() is None:
+                self._rebuild_skill_stats(cursor)
+
             conn.commit()
+        self._canonicalizer = None
+
+    @property
+    def canonicalizer(self) -> SkillCanonicalizer:
+        """Synonym table loaded from SQLite once and kept in memory"""
+        if self._canonicalizer is None:
+            with self.get_connection() as conn:
+                rows = conn.execute("SELECT alias, canonical FROM skill_synonyms").fetchall()
+            self._canonicalizer = SkillCanonicalizer(
+                {row["alias"]: row["canonical"] for row in rows})
+        return self._canonicalizer
+
+    def add_synonym(self, alias: str, canonical: str) -> None:
+        """Map `alias` onto `canonical` for all future writes"""
+        canonical = self.canonicalizer.canonicalize(canonical)
+
+        def write(cursor):
+            cursor.execute(
+                "INSERT OR REPLACE INTO skill_synonyms (alias, canonical) VALUES (?, ?)",
+                (skill_key(alias), canonical)
+            )
+            return None, ()
+
+        self._write(write).result()
+        self.canonicalizer.add_synonym(alias, canonical)
+
+    def _canonicalize_skills(self, cursor: sqlite3.Cursor, skills: List[str]) -> List[str]:
+        """Canonicalize skills on write, registering the first spelling seen of a new skill"""
+        canonicalizer = self.canonicalizer
+        result = canonicalizer.canonicalize_all(skills)
+        for skill in result:
+            if skill not in canonicalizer:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO skill_synonyms (alias, canonical) VALUES (?, ?)",
+                    (skill_key(skill), skill)
+                )
+                cursor.execute(
+                    "SELECT canonical FROM skill_synonyms WHERE alias = ?", (skill_key(skill),)
+                )
+                canonicalizer.add_synonym(skill, cursor.fetchone()["canonical"])
+        return canonicalizer.canonicalize_all(result)
 
-    def add_user(self, user: User) -> int:
-        """Insert a new user into the database and return its ID"""
+    def canonicalize_existing_skills(self) -> int:
+        """One-shot migration: re-canonicalize stored skills and merge duplicates.
+
+        Returns the number of skill rows that were renamed or merged away.
+        """
+        changed = 0
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            for table in ("skills_offered", "skills_needed"):
+                cursor.execute(f"SELECT id, user_id, skill FROM {table} ORDER BY id")
+                rows = [(row, self._canonicalize_skills(cursor, [row["skill"]]))
+                        for row in cursor.fetchall()]
+                # Rows already stored under their canonical name stay; an alias
+                # of one of them is merged into it rather than renamed onto it.
+                kept = {(row["user_id"], row["skill"]) for row, canonical in rows
+                        if canonical == [row["skill"]]}
+                for row, canonical in rows:
+                    if canonical == [row["skill"]]:
+                        continue
+                    key = (row["user_id"], canonical[0] if canonical else None)
+                    if key in kept or not canonical:
+                        cursor.execute(f"DELETE FROM {table} WHERE id = ?", (row["id"],))
+                        changed += 1
+                        continue
+                    kept.add(key)
+                    cursor.execute(f"UPDATE {table} SET skill = ? WHERE id = ?",
+                                   (canonical[0], row["id"]))
+                    changed += 1
+            if changed:
+                self._rebuild_skill_stats(cursor)
+                self._append_change(cursor, "board", None, "rebuild")
+            conn.commit()
+        return changed
+
+    def _rebuild_skill_stats(self, cursor: sqlite3.Cursor) -> None:
+        """Recompute skill_stats from scratch; only needed for pre-existing databases"""
+        cursor.execute("DELETE FROM skill_stats")
+        cursor.execute("""
+            INSERT INTO skill_stats (skill, offered_count, needed_count)
+            SELECT skill, SUM(offered), SUM(needed) FROM (
+                SELECT skill, 1 AS offered, 0 AS needed FROM skills_offered
+                UNION ALL
+                SELECT skill, 0 AS offered, 1 AS needed FROM skills_needed
+            )
+            GROUP BY skill
+        """)
+        cursor.execute("""
+            INSERT OR REPLACE INTO board_meta (key, value)
+            SELECT 'user_count', COUNT(*) FROM users
+        """)
+        self._bump_board_version(cursor)
+
+    def _bump_board_version(self, cursor: sqlite3.Cursor, user_delta: int = 0) -> None:
+        cursor.execute("""
+            INSERT INTO board_meta (key, value) VALUES ('version', 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1
+        """)
+        if user_delta:
+            cursor.execute("UPDATE board_meta SET value = value + ? WHERE key = 'user_count'",
+                           (user_delta,))
+
+    def _update_skill_stats(self, cursor: sqlite3.Cursor,
+                            old_skills: Tuple[List[str], List[str]],
+                            new_skills: Tuple[List[str], List[str]],
+                            user_delta: int = 0) -> None:
+        """Apply one user's skill changes to skill_stats in the caller's transaction"""
+        for column, old, new in (("offered_count", old_skills[0], new_skills[0]),
+                                 ("needed_count", old_skills[1], new_skills[1])):
+            old, new = set(old), set(new)
+            for skill in new - old:
+                cursor.execute(f"""
+                    INSERT INTO skill_stats (skill, {column}) VALUES (?, 1)
+                    ON CONFLICT(skill) DO UPDATE SET {column} = {column} + 1
+                """, (skill,))
+            for skill in old - new:
+                cursor.execute(f"UPDATE skill_stats SET {column} = {column} - 1 WHERE skill = ?",
+                               (skill,))
+                cursor.execute("""
+                    DELETE FROM skill_stats
+                    WHERE skill = ? AND offered_count <= 0 AND needed_count <= 0
+                """, (skill,))
+        self._bump_board_version(cursor, user_delta)
+
+    def _log_change(self, cursor: sqlite3.Cursor, op: str, user_id: int,
+                    old_skills: Tuple[List[str], List[str]] = ([], []),
+                    new_skills: Tuple[List[str], List[str]] = ([], [])) -> Optional[UserChange]:
+        """Append a user change to the change log in the caller's transaction.
+
+        Returns the change to publish on the in-process feed once the caller
+        commits, or None if nobody is subscribed.
+        """
+        seq = self._append_change(cursor, "user", user_id, op, skills_delta(old_skills, new_skills))
+        if not self.change_feed.active:
+            return None
+        cursor.execute("SELECT value FROM board_meta WHERE key = 'version'")
+        skills = frozenset(old_skills[0]) | frozenset(old_skills[1]) | \
+            frozenset(new_skills[0]) | frozenset(new_skills[1])
+        return UserChange(op, user_id, skills, cursor.fetchone()["value"], seq)
+
+    def _append_change(self, cursor: sqlite3.Cursor, entity: str, entity_id: Optional[int],
+                       op: str, delta: str = "{}") -> int:
+        cursor.execute("""
+            INSERT INTO changes (entity, entity_id, op, skills_delta, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (entity, entity_id, op, delta, datetime.now().isoformat()))
+        seq = cursor.lastrowid
+        # Amortized compaction: one range delete on the primary key every so often.
+        if seq % self.CHANGE_LOG_COMPACT_EVERY == 0:
+            self._compact_changes(cursor, seq - self.CHANGE_LOG_RETENTION)
+        return seq
+
+    def _compact_changes(self, cursor: sqlite3.Cursor, through_seq: int) -> int:
+        if through_seq <= 0:
+            return 0
+        cursor.execute("DELETE FROM changes WHERE seq <= ?", (through_seq,))
+        deleted = cursor.rowcount
+        cursor.execute("""
+            INSERT INTO board_meta (key, value) VALUES ('changes_compacted_through', ?)
+            ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+        """, (through_seq,))
+        return deleted
+
+    def compact_changes(self, keep_last: Optional[int] = None) -> int:
+        """Delete all but the newest `keep_last` change log rows (default
+        CHANGE_LOG_RETENTION); returns the number of rows deleted"""
+        keep_last = self.CHANGE_LOG_RETENTION if keep_last is None else keep_last
+
+        def write(cursor):
+            return self._compact_changes(cursor, self._latest_change_seq(cursor) - keep_last), ()
+
+        return self._write(write).result()
+
+    def _latest_change_seq(self, cursor: sqlite3.Cursor) -> int:
+        # sqlite_sequence survives compaction, unlike MAX(seq) over an emptied table.
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'")
+        row = cursor.fetchone()
+        return row["seq"] if row else 0
+
+    def latest_change_seq(self) -> int:
+        """Sequence number of the newest change, 0 if there has been none"""
+        with self.get_connection() as conn:
+            return self._latest_change_seq(conn.cursor())
 
-            cursor.execute("""
-                INSERT INTO users (name, email, location, bio, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                user.name,
-                user.email,
-                user.location,
-                user.bio,
-                user.created_at.isoformat()
-            ))
+    def changes_since(self, seq: int, limit: int = 1000) -> List[ChangeRecord]:
+        """Up to `limit` changes with a sequence number above `seq`, oldest first.
+
+        Raises ChangeLogCompacted if some of those changes were compacted
+        away; the reader must then rebuild from the tables.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM board_meta WHERE key = 'changes_compacted_through'")
+            row = cursor.fetchone()
+            if row and seq < row["value"]:
+                raise ChangeLogCompacted(seq, row["value"])
+            cursor.execute("SELECT * FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit))
+            return [ChangeRecord.from_row(row) for row in cursor.fetchall()]
+
+    def _publish(self, *changes: Optional[UserChange]) -> None:
+        for change in changes:
+            if change is not None:
+                self.change_feed.publish(change)
+
+    def _get_user_skills(self, cursor: sqlite3.Cursor, user_id: int) -> Tuple[List[str], List[str]]:
+        cursor.execute("SELECT skill FROM skills_offered WHERE user_id = ? ORDER BY skill", (user_id,))
+        skills_offered = [row["skill"] for row in cursor.fetchall()]
+        cursor.execute("SELECT skill FROM skills_needed WHERE user_id = ? ORDER BY skill", (user_id,))
+        skills_needed = [row["skill"] for row in cursor.fetchall()]
+        return skills_offered, skills_needed
+
+    def _hydrate_users(self, cursor: sqlite3.Cursor, user_rows: List[sqlite3.Row],
+                       all_users: bool = False) -> List[User]:
+        """Build User objects for many rows with one skill query per table and chunk"""
+        skills = {row["user_id"]: ([], []) for row in user_rows}
+        for position, table in enumerate(("skills_offered", "skills_needed")):
+            if all_users:
+                cursor.execute(f"SELECT user_id, skill FROM {table} ORDER BY user_id, skill")
+                skill_rows = cursor.fetchall()
+            else:
+                skill_rows = []
+                for chunk in _chunks(list(skills), self.QUERY_CHUNK_SIZE):
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(f"""
+                        SELECT user_id, skill FROM {table}
+                        WHERE user_id IN ({placeholders})
+                        ORDER BY user_id, skill
+                    """, chunk)
+                    skill_rows.extend(cursor.fetchall())
+            for row in skill_rows:
+                if row["user_id"] in skills:
+                    skills[row["user_id"]][position].append(row["skill"])
+
+        return [
+            User(
+                user_id=row["user_id"],
+                name=row["name"],
+                email=row["email"],
+                location=row["location"],
+                bio=row["bio"],
+                created_at=datetime.fromisoformat(row["created_at"]),
+                skills_offered=skills[row["user_id"]][0],
+                skills_needed=skills[row["user_id"]][1]
+            )
+            for row in user_rows
+        ]
 
-            user_id = cursor.lastrowid
+    def get_board_version(self) -> int:
+        """Counter bumped by every user mutation; cheap to poll for cache invalidation"""
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT value FROM board_meta WHERE key = 'version'").fetchone()
+            return row["value"] if row else 0
 
-            for skill in user.skills_offered:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO skills_offered (user_id, skill)
-                    VALUES (?, ?)
-                """, (user_id, skill))
+    def get_user_count(self) -> int:
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT value FROM board_meta WHERE key = 'user_count'").fetchone()
+            return row["value"] if row else 0
 
-            for skill in user.skills_needed:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO skills_needed (user_id, skill)
-                    VALUES (?, ?)
-                """, (user_id, skill))
+    def get_skill_stats(self) -> Tuple[int, Dict[str, Tuple[int, int]]]:
+        """Return (user_count, {skill: (offered_count, needed_count)})"""
+        with self.get_connection() as conn:
+            return self._read_skill_stats(conn.cursor())
 
+    def get_skill_stats_with_seq(self) -> Tuple[int, int, Dict[str, Tuple[int, int]]]:
+        """Return (change seq, user_count, stats) read in one transaction, so a
+        consumer can build from the stats and then follow changes_since(seq)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            seq = self._latest_change_seq(cursor)
+            user_count, stats = self._read_skill_stats(cursor)
             conn.commit()
-            return user_id
+            return seq, user_count, stats
+
+    def _read_skill_stats(self, cursor: sqlite3.Cursor) -> Tuple[int, Dict[str, Tuple[int, int]]]:
+        cursor.execute("SELECT value FROM board_meta WHERE key = 'user_count'")
+        row = cursor.fetchone()
+        user_count = row["value"] if row else 0
+        cursor.execute("SELECT skill, offered_count, needed_count FROM skill_stats")
+        stats = {
+            row["skill"]: (row["offered_count"], row["needed_count"])
+            for row in cursor.fetchall()
+        }
+        return user_count, stats
+
+    def add_user(self, user: User) -> int:
+        """Insert a new user into the database and return its ID"""
+        return self.add_user_async(user).result()
+
+    def add_user_async(self, user: User) -> Future:
+        """Queue a user insert; the future resolves to the new user's ID"""
+        def write(cursor):
+            user.skills_offered = self._canonicalize_skills(cursor, user.skills_offered)
+            user.skills_needed = self._canonicalize_skills(cursor, user.skills_needed)
+            user_id = self._insert_user(cursor, user)
+            change = self._log_change(cursor, "insert", user_id,
+                                      new_skills=(user.skills_offered, user.skills_needed))
+            return user_id, (change,)
+
+        return self._write(write)
+
+    def add_users(self, users: List[User]) -> List[Tuple[Optional[int], Optional[str]]]:
+        """Insert many users in one transaction.
+
+        Returns one (user_id, error) pair per user, in order. A row that violates
+        a constraint (e.g. a duplicate email) is rolled back to its savepoint and
+        reported without affecting the rest of the batch.
+        """
+        def write(cursor):
+            results = []
+            changes = []
+            for user in users:
+                # Canonicalize outside the savepoint so learned aliases survive a failed row.
+                user.skills_offered = self._canonicalize_skills(cursor, user.skills_offered)
+                user.skills_needed = self._canonicalize_skills(cursor, user.skills_needed)
+                cursor.execute("SAVEPOINT bulk_row")
+                try:
+                    user.user_id = self._insert_user(cursor, user)
+                    results.append((user.user_id, None))
+                    changes.append(self._log_change(cursor, "insert", user.user_id,
+                                                    new_skills=(user.skills_offered, user.skills_needed)))
+                except sqlite3.IntegrityError as e:
+                    cursor.execute("ROLLBACK TO bulk_row")
+                    results.append((None, str(e)))
+                cursor.execute("RELEASE bulk_row")
+            return results, changes
+
+        return self._write(write).result()
+
+    def _insert_user(self, cursor: sqlite3.Cursor, user: User) -> int:
+        """Insert a user whose skills the caller has already canonicalized"""
+        cursor.execute("""
+            INSERT INTO users (name, email, location, bio, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            user.name,
+            user.email,
+            user.location,
+            user.bio,
+            user.created_at.isoformat()
+        ))
+
+        user_id = cursor.lastrowid
+
+        cursor.executemany("""
+            INSERT OR IGNORE INTO skills_offered (user_id, skill)
+            VALUES (?, ?)
+        """, [(user_id, skill) for skill in user.skills_offered])
+
+        cursor.executemany("""
+            INSERT OR IGNORE INTO skills_needed (user_id, skill)
+            VALUES (?, ?)
+        """, [(user_id, skill) for skill in user.skills_needed])
+
+        self._update_skill_stats(cursor, ([], []),
+                                 (user.skills_offered, user.skills_needed), user_delta=1)
+        return user_id
 
     def get_user(self, user_id: int) -> Optional[User]:
         with self.get_connection() as conn:
@@ -107,11 +604,7 @@ class DatabaseHandler:
             if not user_row:
                 return None
 
-            cursor.execute("SELECT skill FROM skills_offered WHERE user_id = ?", (user_id,))
-            skills_offered = [row["skill"] for row in cursor.fetchall()]
-
-            cursor.execute("SELECT skill FROM skills_needed WHERE user_id = ?", (user_id,))
-            skills_needed = [row["skill"] for row in cursor.fetchall()]
+            skills_offered, skills_needed = self._get_user_skills(cursor, user_id)
 
             return User(
                 user_id=user_row["user_id"],
@@ -133,37 +626,87 @@ class DatabaseHandler:
                 return self.get_user(result["user_id"])
             return None
 
+    def get_users(self, user_ids: List[int]) -> List[User]:
+        """Fetch many users by id, in the order requested; unknown ids are skipped"""
+        user_ids = list(dict.fromkeys(user_ids))
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            rows = []
+            for chunk in _chunks(user_ids, self.QUERY_CHUNK_SIZE):
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT * FROM users WHERE user_id IN ({placeholders})", chunk)
+                rows.extend(cursor.fetchall())
+
+            position = {user_id: i for i, user_id in enumerate(user_ids)}
+            rows.sort(key=lambda row: position[row["user_id"]])
+            return self._hydrate_users(cursor, rows)
+
     def get_all_users(self) -> List[User]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT user_id FROM users ORDER BY created_at")
+            cursor.execute("SELECT * FROM users ORDER BY created_at")
             rows = cursor.fetchall()
-            
-            user_ids = []
-            for row in rows:
-                user_ids.append(row["user_id"])
-            
-            all_users = []
-            for user_id in user_ids:
-                user = self.get_user(user_id)
-                if user:
-                    all_users.append(user)
-            
-            return all_users
+            return self._hydrate_users(cursor, rows, all_users=True)
 
-    def update_user(self, user: User) -> bool:
-        if not user.user_id:
-            return False
+    def get_all_skills(self) -> List[str]:
+        """Distinct skill names currently offered or needed by anyone"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT skill FROM skills_offered
+                UNION
+                SELECT skill FROM skills_needed
+            """)
+            return [row["skill"] for row in cursor.fetchall()]
+
+    def get_users_by_skill(self, skill: str, role: str = "offered", limit: int = 20,
+                           offset: int = 0) -> Tuple[List[User], int]:
+        """Page through the users offering (role="offered") or needing a skill.
+
+        Returns (users, total). The page is read through the skill index and the
+        total comes from skill_stats, so neither touches unrelated users.
+        """
+        if role not in ("offered", "needed"):
+            raise ValueError("role must be 'offered' or 'needed'")
+        table = f"skills_{role}"
+        skill = self.canonicalizer.canonicalize(skill)
 
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT user_id FROM {table}
+                WHERE skill = ?
+                ORDER BY user_id
+                LIMIT ? OFFSET ?
+            """, (skill, limit, offset))
+            user_ids = [row["user_id"] for row in cursor.fetchall()]
+
+            cursor.execute(f"SELECT {role}_count FROM skill_stats WHERE skill = ?", (skill,))
+            row = cursor.fetchone()
+            total = row[0] if row else 0
+
+        return self.get_users(user_ids), total
+
+    def update_user(self, user: User) -> bool:
+        return self.update_user_async(user).result()
+
+    def update_user_async(self, user: User) -> Future:
+        """Queue a user update; the future resolves to whether the user existed"""
+        def write(cursor):
+            if not user.user_id:
+                return False, ()
+            user.skills_offered = self._canonicalize_skills(cursor, user.skills_offered)
+            user.skills_needed = self._canonicalize_skills(cursor, user.skills_needed)
 
             cursor.execute("""
                 UPDATE users
                 SET name = ?, email = ?, location = ?, bio = ?
                 WHERE user_id = ?
             """, (user.name, user.email, user.location, user.bio, user.user_id))
+            if cursor.rowcount == 0:
+                return False, ()
 
+            old_skills = self._get_user_skills(cursor, user.user_id)
             cursor.execute("DELETE FROM skills_offered WHERE user_id = ?", (user.user_id,))
             cursor.execute("DELETE FROM skills_needed WHERE user_id = ?", (user.user_id,))
 
@@ -175,26 +718,41 @@ class DatabaseHandler:
                 cursor.execute("INSERT INTO skills_needed (user_id, skill) VALUES (?, ?)",
                                (user.user_id, skill))
 
-            conn.commit()
-            return cursor.rowcount > 0
+            self._update_skill_stats(cursor, old_skills,
+                                     (user.skills_offered, user.skills_needed))
+            change = self._log_change(cursor, "update", user.user_id, old_skills,
+                                      (user.skills_offered, user.skills_needed))
+            return True, (change,)
+
+        return self._write(write)
 
     def delete_user(self, user_id: int) -> bool:
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        return self.delete_user_async(user_id).result()
 
+    def delete_user_async(self, user_id: int) -> Future:
+        """Queue a user delete; the future resolves to whether the user existed"""
+        def write(cursor):
+            old_skills = self._get_user_skills(cursor, user_id)
             cursor.execute("DELETE FROM skills_offered WHERE user_id = ?", (user_id,))
             cursor.execute("DELETE FROM skills_needed WHERE user_id = ?", (user_id,))
             cursor.execute("DELETE FROM matches WHERE user1_id = ? OR user2_id = ?", (user_id, user_id))
             cursor.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+            if cursor.rowcount == 0:
+                return False, ()
 
-            conn.commit()
-            return cursor.rowcount > 0
+            self._update_skill_stats(cursor, old_skills, ([], []), user_delta=-1)
+            change = self._log_change(cursor, "delete", user_id, old_skills)
+            return True, (change,)
+
+        return self._write(write)
 
 
     def save_match(self, match: Match) -> int:
+        return self.save_match_async(match).result()
 
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+    def save_match_async(self, match: Match) -> Future:
+        """Queue a match upsert; the future resolves to its row ID"""
+        def write(cursor):
             cursor.execute("""
                 INSERT OR REPLACE INTO matches
                 (user1_id, user2_id, compatibility_score, matching_skills, created_at)
@@ -206,8 +764,9 @@ class DatabaseHandler:
                 json.dumps(match.matching_skills),
                 match.created_at.isoformat()
             ))
-            conn.commit()
-            return cursor.lastrowid
+            return cursor.lastrowid, ()
+
+        return self._write(write)
 
     def get_matches_for_user(self, user_id: int) -> List[Match]:
         with self.get_connection() as conn:
@@ -233,3 +792,101 @@ class DatabaseHandler:
                 matches.append(match)
             
             return matches
+
+    def create_job(self, job: Job) -> None:
+        def write(cursor):
+            cursor.execute("""
+                INSERT INTO jobs (job_id, kind, params, status, progress, owner_pid, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (job.job_id, job.kind, json.dumps(job.params), job.status, job.progress,
+                  job.owner_pid, job.created_at.isoformat()))
+            return None, ()
+
+        self._write(write).result()
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return self._job_from_row(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recently created jobs first, optionally only those with `status`"""
+        with self.get_connection() as conn:
+            if status is None:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?",
+                                    (limit,)).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                                    (status, limit)).fetchall()
+            return [self._job_from_row(row) for row in rows]
+
+    def update_job(self, job_id: str, only_if_status: Optional[Tuple[str, ...]] = None, **fields) -> bool:
+        """Set job columns; with `only_if_status`, only while the job is in one of
+        those states. Returns whether a row was updated."""
+        unknown = set(fields) - set(self.JOB_UPDATE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot update job columns: {', '.join(sorted(unknown))}")
+        values = []
+        for name, value in fields.items():
+            if name == 'result':
+                value = json.dumps(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        sql = f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE job_id = ?"
+        values.append(job_id)
+        if only_if_status:
+            sql += f" AND status IN ({', '.join('?' for _ in only_if_status)})"
+            values.extend(only_if_status)
+        def write(cursor):
+            cursor.execute(sql, values)
+            return cursor.rowcount > 0, ()
+
+        return self._write(write).result()
+
+    def request_job_cancel(self, job_id: str) -> bool:
+        """Flag an unfinished job for cancellation; False if it is unknown or already finished"""
+        def write(cursor):
+            cursor.execute(f"""
+                UPDATE jobs SET cancel_requested = 1
+                WHERE job_id = ? AND status NOT IN ({', '.join('?' for _ in FINISHED_STATUSES)})
+            """, (job_id, *FINISHED_STATUSES))
+            return cursor.rowcount > 0, ()
+
+        return self._write(write).result()
+
+    def is_job_cancel_requested(self, job_id: str) -> bool:
+        with self.get_connection() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return bool(row and row["cancel_requested"])
+
+    def delete_finished_jobs(self, finished_before: datetime) -> int:
+        """Drop finished jobs (and their results) that ended before `finished_before`"""
+        def write(cursor):
+            cursor.execute(f"""
+                DELETE FROM jobs
+                WHERE status IN ({', '.join('?' for _ in FINISHED_STATUSES)}) AND finished_at < ?
+            """, (*FINISHED_STATUSES, finished_before.isoformat()))
+            return cursor.rowcount, ()
+
+        return self._write(write).result()
+
+    def _job_from_row(self, row: sqlite3.Row) -> Job:
+        def timestamp(value):
+            return datetime.fromisoformat(value) if value else None
+
+        return Job(
+            job_id=row["job_id"],
+            kind=row["kind"],
+            params=json.loads(row["params"]),
+            status=row["status"],
+            progress=row["progress"],
+            message=row["message"],
+            result=json.loads(row["result"]) if row["result"] is not None else None,
+            error=row["error"],
+            cancel_requested=bool(row["cancel_requested"]),
+            owner_pid=row["owner_pid"],
+            created_at=timestamp(row["created_at"]),
+            started_at=timestamp(row["started_at"]),
+            finished_at=timestamp(row["finished_at"])
+        )
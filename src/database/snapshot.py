@@ -0,0 +1,90 @@
+import sqlite3
+from concurrent.futures import Future
+
+from src.database.db_handler import DatabaseHandler
+
+
+class _PinnedConnection:
+    """The snapshot's connection as handed to DatabaseHandler's read methods.
+
+    Those methods use the connection as a context manager, which would
+    commit on exit and so end the read transaction holding the snapshot.
+    Here leaving the block, or committing, does nothing.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def commit(self) -> None:
+        pass
+
+
+class DatabaseSnapshot(DatabaseHandler):
+    """A DatabaseHandler pinned to one point in time.
+
+    It holds a single read-only connection inside one read transaction.
+    Under WAL that transaction sees the database as of its first read, so
+    every read method returns data from that moment however long the
+    snapshot stays open. Writes go on meanwhile without blocking it or
+    being blocked by it. Write methods raise.
+
+    `board_version` and `change_seq` are the database's state at that
+    moment, so a reader can catch up afterwards with `changes_since`.
+    """
+
+    def __init__(self, handler: DatabaseHandler):
+        super().__init__(handler.db_path, tracer=handler.tracer)
+        self._conn = handler.get_read_connection()
+        try:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN")
+            # The first read starts the snapshot, not BEGIN.
+            cursor.execute("SELECT value FROM board_meta WHERE key = 'version'")
+            row = cursor.fetchone()
+            self.board_version = row["value"] if row else 0
+            self.change_seq = self._latest_change_seq(cursor)
+        except Exception:
+            self._conn.close()
+            raise
+        self.closed = False
+
+    def get_connection(self):
+        if self.closed:
+            raise sqlite3.ProgrammingError("Cannot read from a closed snapshot.")
+        return _PinnedConnection(self._conn)
+
+    def get_read_connection(self):
+        return self.get_connection()
+
+    def open_snapshot(self) -> 'DatabaseSnapshot':
+        raise sqlite3.ProgrammingError("A snapshot cannot open another snapshot.")
+
+    def start_write_queue(self, max_batch: int = 100, max_delay: float = 0.0) -> None:
+        raise sqlite3.OperationalError("attempt to write a readonly database")
+
+    def _write(self, fn) -> Future:
+        future = Future()
+        future.set_exception(sqlite3.OperationalError("attempt to write a readonly database"))
+        return future
+
+    def close(self) -> None:
+        """End the read transaction and release the snapshot"""
+        if not self.closed:
+            self.closed = True
+            self._conn.rollback()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
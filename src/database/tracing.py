@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+_THIS_FILE = os.path.normcase(os.path.abspath(__file__))
+
+
+@dataclass
+class QueryRecord:
+    sql: str
+    duration_ms: float
+    caller: str
+    vm_steps: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'sql': self.sql,
+            'duration_ms': round(self.duration_ms, 3),
+            'caller': self.caller,
+            'vm_steps': self.vm_steps,
+        }
+
+
+@dataclass
+class QuerySummary:
+    count: int = 0
+    total_ms: float = 0.0
+    queries: List[QueryRecord] = field(default_factory=list)
+
+    def server_timing(self) -> str:
+        """The summary as a Server-Timing header value"""
+        return f'db;dur={self.total_ms:.3f};desc="{self.count} queries"'
+
+
+def _caller() -> str:
+    """Outermost function of the first module above the tracing code.
+
+    For DatabaseHandler that is the public method, e.g. get_all_users, even
+    when the statement itself ran in a helper such as _hydrate_users.
+    """
+    frame = sys._getframe(1)
+    while frame is not None and os.path.normcase(frame.f_code.co_filename) == _THIS_FILE:
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+
+    filename = frame.f_code.co_filename
+    name = frame.f_code.co_name
+    while frame is not None and frame.f_code.co_filename == filename:
+        name = frame.f_code.co_name
+        frame = frame.f_back
+    return name
+
+
+class QueryTracer:
+    """Times every SQL statement run through a traced connection.
+
+    Statements slower than `slow_query_ms` are appended to `slow_log_path` as
+    JSON lines. Between `start_request()` and `finish_request()` the current
+    thread's statements are also collected into a QuerySummary.
+    """
+
+    def __init__(self, slow_query_ms: Optional[float] = None, slow_log_path: Optional[str] = None,
+                 progress_steps: int = 1000, keep_queries: bool = False):
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_path = slow_log_path
+        self.progress_steps = progress_steps
+        self.keep_queries = keep_queries
+        self._local = threading.local()
+        self._log_lock = threading.Lock()
+
+    def start_request(self) -> None:
+        self._local.summary = QuerySummary()
+
+    def finish_request(self) -> Optional[QuerySummary]:
+        summary = getattr(self._local, 'summary', None)
+        self._local.summary = None
+        return summary
+
+    def record(self, record: QueryRecord) -> None:
+        summary = getattr(self._local, 'summary', None)
+        if summary is not None:
+            summary.count += 1
+            summary.total_ms += record.duration_ms
+            if self.keep_queries:
+                summary.queries.append(record)
+
+        if (self.slow_log_path and self.slow_query_ms is not None and
+                record.duration_ms >= self.slow_query_ms):
+            entry = dict(record.to_dict(), ts=datetime.now(timezone.utc).isoformat())
+            line = json.dumps(entry) + '\n'
+            with self._log_lock:
+                with open(self.slow_log_path, 'a', encoding='utf-8') as log:
+                    log.write(line)
+
+    def connect(self, db_path: str, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(db_path, factory=TracedConnection, **kwargs)
+        conn.tracer = self
+        if self.progress_steps:
+            conn.set_progress_handler(conn.count_steps, self.progress_steps)
+        return conn
+
+
+class TracedCursor(sqlite3.Cursor):
+    """A cursor that times each statement from execute until its rows are fetched"""
+
+    _pending: Optional[list] = None
+
+    def _begin(self) -> Tuple[float, int]:
+        self._finish()
+        return time.perf_counter(), self.connection.vm_steps
+
+    def _started(self, sql: str, begun: Tuple[float, int]) -> None:
+        started, steps_before = begun
+        duration_ms = (time.perf_counter() - started) * 1000
+        self._pending = [' '.join(sql.split()), duration_ms, _caller(), steps_before]
+        self.connection.open_cursors.add(self)
+
+    def _finish(self) -> None:
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, duration_ms, caller, steps_before = pending
+        conn = self.connection
+        conn.open_cursors.discard(self)
+        conn.tracer.record(QueryRecord(sql=sql, duration_ms=duration_ms, caller=caller,
+                                       vm_steps=conn.vm_steps - steps_before))
+
+    def _fetched(self, started: float, exhausted: bool) -> None:
+        if self._pending is not None:
+            self._pending[1] += (time.perf_counter() - started) * 1000
+            if exhausted:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        begun = self._begin()
+        super().execute(sql, parameters)
+        self._started(sql, begun)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        begun = self._begin()
+        super().executemany(sql, seq_of_parameters)
+        self._started(sql, begun)
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors report to a QueryTracer"""
+
+    tracer: QueryTracer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        self.open_cursors = weakref.WeakSet()
+
+    def count_steps(self) -> int:
+        # Progress handler: called every `progress_steps` VM instructions.
+        self.vm_steps += self.tracer.progress_steps
+        return 0
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def _finish_cursors(self) -> None:
+        for cursor in list(self.open_cursors):
+            cursor._finish()
+
+    def commit(self):
+        self._finish_cursors()
+        if not self.in_transaction:
+            return super().commit()
+        started = time.perf_counter()
+        super().commit()
+        self.tracer.record(QueryRecord(sql='COMMIT', caller=_caller(),
+                                       duration_ms=(time.perf_counter() - started) * 1000))
+
+    def rollback(self):
+        self._finish_cursors()
+        return super().rollback()
+
+    def close(self):
+        self._finish_cursors()
+        return super().close()
@@ -0,0 +1,125 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class WriteQueueClosed(RuntimeError):
+    """A write was submitted after the queue was closed"""
+
+
+class WriteQueue:
+    """Runs all writes on one thread and commits them in groups.
+
+    A write is a function `fn(cursor)` that runs on the writer's own
+    connection inside a savepoint. If it raises, only that write is rolled
+    back and its future gets the exception; the rest of the group still
+    commits. A group closes when it holds `max_batch` writes, or when no
+    more arrive within `max_delay` seconds of the first one. After the group
+    commits, each future gets its write's return value, passed through
+    `finish`.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], max_batch: int = 100,
+                 max_delay: float = 0.0, finish: Optional[Callable[[Any], Any]] = None):
+        self._connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._finish = finish
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.groups_committed = 0
+        self.writes_committed = 0
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def on_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn: Callable[[sqlite3.Cursor], Any]) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise WriteQueueClosed("the write queue is closed")
+            self._queue.put((fn, future))
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting writes; those already queued are still committed"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            closing = False
+            while not closing:
+                group, closing = self._collect()
+                if group:
+                    self._commit(conn, group)
+        finally:
+            conn.close()
+
+    def _collect(self) -> Tuple[List[Tuple[Callable, Future]], bool]:
+        """Block for one write, then take whatever else arrives in time"""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        group = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return group, True
+            group.append(item)
+        return group, False
+
+    def _commit(self, conn: sqlite3.Connection, group: List[Tuple[Callable, Future]]) -> None:
+        written = []
+        try:
+            cursor = conn.cursor()
+            # IMMEDIATE takes the write lock up front, waiting out other processes.
+            cursor.execute("BEGIN IMMEDIATE")
+            for fn, future in group:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute("SAVEPOINT queued_write")
+                try:
+                    value = fn(cursor)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO queued_write")
+                    future.set_exception(e)
+                else:
+                    written.append((future, value))
+                cursor.execute("RELEASE queued_write")
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.groups_committed += 1
+        self.writes_committed += len(written)
+        for future, value in written:
+            try:
+                result = value if self._finish is None else self._finish(value)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
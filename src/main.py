@@ -1,15 +1,27 @@
+import argparse
 import os
 from src.database.db_handler import DatabaseHandler
 from src.utils.matchmaker import Matchmaker
+from src.utils.cohort import CohortPairer
 from src.models.user import User
 
-def main():
-    print("Welcome to the Peer Skill Exchange Platform!\n")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peer Skill Exchange Platform")
+    parser.add_argument('--migrate-skills', action='store_true',
+                        help="re-canonicalize stored skills, merge duplicates and exit")
+    args = parser.parse_args(argv)
     
     db_path = os.environ.get('DATABASE_PATH', 'peer_exchange.db')
     db_handler = DatabaseHandler(db_path)
     db_handler.initialize_database()
     
+    if args.migrate_skills:
+        changed = db_handler.canonicalize_existing_skills()
+        print(f"Canonicalized skills: {changed} rows renamed or merged.")
+        return
+    
+    print("Welcome to the Peer Skill Exchange Platform!\n")
+    
     matchmaker = Matchmaker(db_handler)
     
     print("You can add users, find matches, or list all users.\n")
@@ -20,6 +32,7 @@ def interactive_mode(db_handler: DatabaseHandler, matchmaker: Matchmaker):
     print("  add            -> Add a new user")
     print("  find <user_id> -> Find matches for a user")
     print("  list           -> Show all users")
+    print("  pair [mode]    -> Pair the whole board (mode: auto, exact, greedy)")
     print("  quit           -> Exit the program")
     
     while True:
@@ -138,8 +151,29 @@ def interactive_mode(db_handler: DatabaseHandler, matchmaker: Matchmaker):
                 except (ValueError, IndexError):
                     print("Usage: find <user_id>")
             
+            elif command == 'pair' or command.startswith('pair '):
+                parts = command.split()
+                mode = parts[1] if len(parts) > 1 else 'auto'
+                if mode not in CohortPairer.MODES:
+                    print("Usage: pair [auto|exact|greedy]")
+                    continue
+                
+                result = CohortPairer(matchmaker).pair(mode=mode)
+                print(f"\nCohort pairing ({result.mode}): {len(result.pairs)} pairs, "
+                      f"total compatibility {result.total_score:.2f}")
+                
+                for user1_id, user2_id, score in result.pairs:
+                    print(f"  {user1_id} <-> {user2_id} - Compatibility: {score:.2f}")
+                
+                if result.unpaired:
+                    print(f"  Unpaired: {', '.join(str(user_id) for user_id in result.unpaired)}")
+                
+                print(f"  Timing: load {result.timings['load']:.1f} ms, "
+                      f"graph {result.timings['graph']:.1f} ms, "
+                      f"solve {result.timings['solve']:.1f} ms")
+            
             else:
-                print("Unknown command. Try 'add', 'find <id>', 'list', or 'quit'.")
+                print("Unknown command. Try 'add', 'find <id>', 'list', 'pair', or 'quit'.")
         
         except KeyboardInterrupt:
             print("\nGoodbye!")
@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+@dataclass
+class Job:
+
+    job_id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = 'queued'
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    owner_pid: Optional[int] = None
+    created_at: datetime = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def __post_init__(self):
+        if self.status not in JOB_STATUSES:
+            raise ValueError(f"Unknown job status: {self.status}")
+        if self.created_at is None:
+            self.created_at = datetime.now()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> dict:
+        """Convert job to dictionary"""
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
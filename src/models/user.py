@@ -1,6 +1,18 @@
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from datetime import datetime
+from src.utils.skill_canonicalizer import default_canonicalizer
+
+USER_FIELDS = ('user_id', 'name', 'email', 'skills_offered', 'skills_needed',
+               'created_at', 'location', 'bio')
+
+def _skill_list(skills: Iterable[str], field_name: str) -> List[str]:
+    if skills is None or isinstance(skills, str):
+        raise ValueError(f"{field_name} must be a list of strings")
+    skills = list(skills)
+    if not all(isinstance(skill, str) for skill in skills):
+        raise ValueError(f"{field_name} must be a list of strings")
+    return skills
 
 @dataclass
 class User:
@@ -22,12 +34,18 @@ class User:
             
         if self.created_at is None:
             self.created_at = datetime.now()
+        
+        self.skills_offered = default_canonicalizer.canonicalize_all(
+            _skill_list(self.skills_offered, "skills_offered"))
+        self.skills_needed = default_canonicalizer.canonicalize_all(
+            _skill_list(self.skills_needed, "skills_needed"))
     
     def add_skill_offered(self, skill: str) -> None:
         if skill and skill.strip():
+            skill = default_canonicalizer.canonicalize(skill)
             skill_already_exists = False
             for existing_skill in self.skills_offered:
-                if existing_skill == skill:
+                if existing_skill.casefold() == skill.casefold():
                     skill_already_exists = True
                     break
             
@@ -36,9 +54,10 @@ class User:
     
     def add_skill_needed(self, skill: str) -> None:
         if skill and skill.strip():
+            skill = default_canonicalizer.canonicalize(skill)
             skill_already_exists = False
             for existing_skill in self.skills_needed:
-                if existing_skill == skill:
+                if existing_skill.casefold() == skill.casefold():
                     skill_already_exists = True
                     break
             
@@ -46,19 +65,21 @@ class User:
                 self.skills_needed.append(skill)
     
     def remove_skill_offered(self, skill: str) -> None:
+        skill = default_canonicalizer.canonicalize(skill)
         for i in range(len(self.skills_offered)):
             if self.skills_offered[i] == skill:
                 self.skills_offered.pop(i)
                 break
     
     def remove_skill_needed(self, skill: str) -> None:
+        skill = default_canonicalizer.canonicalize(skill)
         for i in range(len(self.skills_needed)):
             if self.skills_needed[i] == skill:
                 self.skills_needed.pop(i)
                 break
     
-    def to_dict(self) -> dict:
-        return {
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> dict:
+        data = {
             'user_id': self.user_id,
             'name': self.name,
             'email': self.email,
@@ -67,4 +88,7 @@ class User:
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'location': self.location,
             'bio': self.bio
-        }
\ No newline at end of file
+        }
+        if fields is None:
+            return data
+        return {name: data[name] for name in fields}
\ No newline at end of file
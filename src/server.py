@@ -0,0 +1,249 @@
+import argparse
+import importlib
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class PooledRequestHandler(WSGIRequestHandler):
+    # Keep-alive connections hold a pool thread, so idle ones are dropped quickly.
+    protocol_version = "HTTP/1.1"
+    timeout = 5
+    access_log = True
+
+    def log_request(self, code="-", size="-"):
+        if self.access_log:
+            super().log_request(code, size)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug's WSGI server with a fixed-size thread pool instead of a thread per connection"""
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, host, port, app, threads: int = 8, handler=PooledRequestHandler, fd=None,
+                 parent_pid: Optional[int] = None):
+        super().__init__(host, port, app, handler=handler, fd=fd)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self.parent_pid = parent_pid
+        self.stopping = False
+
+    def stop(self) -> None:
+        """Ask serve_forever to return; safe to call from a signal handler or the loop itself"""
+        if not self.stopping:
+            self.stopping = True
+            # shutdown() blocks until serve_forever returns, so it can't run on the loop's thread.
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def service_actions(self):
+        # Called every poll interval; exit if the master died without stopping us.
+        if self.parent_pid is not None and os.getppid() != self.parent_pid:
+            self.stop()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def drain(self) -> None:
+        """Wait for in-flight requests after serve_forever has returned"""
+        self.pool.shutdown(wait=True)
+
+
+def load_app_factory(spec: str) -> Callable:
+    """Resolve 'package.module:callable' to the callable"""
+    module_name, _, attribute = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attribute or 'create_app')
+
+
+def run_worker(listener: socket.socket, app_factory: str, threads: int, access_log: bool = True,
+               parent_pid: Optional[int] = None) -> None:
+    """Body of a forked worker: build the app, serve until SIGTERM, then drain"""
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Tells the app its pool size, so admission control can keep threads free.
+    os.environ['WEB_THREADS'] = str(threads)
+    # The factory is imported after fork, so a reload picks up new code.
+    app = load_app_factory(app_factory)()
+    host, port = listener.getsockname()[:2]
+    handler = type('WorkerRequestHandler', (PooledRequestHandler,), {'access_log': access_log})
+    server = PooledWSGIServer(host, port, app, threads=threads, handler=handler,
+                              fd=listener.fileno(), parent_pid=parent_pid)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    server.serve_forever()
+    server.drain()
+
+
+class PreforkServer:
+    """Binds once, then forks `workers` processes that accept on the shared socket.
+
+    SIGHUP starts a fresh set of workers and then gracefully stops the old
+    ones (a zero-downtime reload of code and configuration). SIGTERM or
+    SIGINT stops every worker gracefully, killing any still busy after
+    `graceful_timeout` seconds. Workers that die are replaced.
+    """
+
+    SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD)
+
+    def __init__(self, app_factory: str = 'src.api:create_app', host: str = '127.0.0.1',
+                 port: int = 5001, workers: int = 2, threads: int = 8, backlog: int = 128,
+                 graceful_timeout: float = 30.0, access_log: bool = True):
+        self.app_factory = app_factory
+        self.workers = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.access_log = access_log
+        self.listener = socket.create_server((host, port), backlog=backlog)
+        self.listener.set_inheritable(True)
+        # Every worker is woken for each connection; losers must not block in accept().
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()[:2]
+        self.children: Dict[int, int] = {}  # pid -> generation
+        self.generation = 0
+        self._signals = []
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_write, False)
+
+    def spawn_worker(self) -> int:
+        master_pid = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                for signum in self.SIGNALS:
+                    signal.signal(signum, signal.SIG_DFL)
+                os.close(self._wakeup_read)
+                os.close(self._wakeup_write)
+                run_worker(self.listener, self.app_factory, self.threads, self.access_log,
+                           parent_pid=master_pid)
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+        self.children[pid] = self.generation
+        print(f"Booted worker {pid} (generation {self.generation})", flush=True)
+        return pid
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+        try:
+            os.write(self._wakeup_write, b'.')
+        except BlockingIOError:
+            pass
+
+    def serve_forever(self) -> None:
+        for signum in self.SIGNALS:
+            signal.signal(signum, self._on_signal)
+        print(f"Listening on http://{self.address[0]}:{self.address[1]} "
+              f"({self.workers} workers x {self.threads} threads)", flush=True)
+        for _ in range(self.workers):
+            self.spawn_worker()
+
+        try:
+            while True:
+                readable, _, _ = select.select([self._wakeup_read], [], [], 1.0)
+                if readable:
+                    os.read(self._wakeup_read, 1024)
+                signals, self._signals = self._signals, []
+                if signal.SIGTERM in signals or signal.SIGINT in signals:
+                    break
+                if signal.SIGHUP in signals:
+                    self.reload()
+                self.reap_workers(respawn=True)
+        finally:
+            self.stop()
+
+    def reap_workers(self, respawn: bool) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self.children.pop(pid, None)
+            if respawn and generation == self.generation:
+                print(f"Worker {pid} exited with status {status}; replacing it", flush=True)
+                self.spawn_worker()
+
+    def reload(self) -> None:
+        old = [pid for pid, generation in self.children.items() if generation == self.generation]
+        self.generation += 1
+        print(f"Reloading: starting generation {self.generation}", flush=True)
+        for _ in range(self.workers):
+            self.spawn_worker()
+        for pid in old:
+            self._kill(pid, signal.SIGTERM)
+
+    def stop(self) -> None:
+        for pid in list(self.children):
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap_workers(respawn=False)
+            time.sleep(0.05)
+        for pid in list(self.children):
+            self._kill(pid, signal.SIGKILL)
+        while self.children:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self.children.pop(pid, None)
+        self.listener.close()
+        print("Stopped", flush=True)
+
+    @staticmethod
+    def _kill(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Prefork production server for the web API")
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5001)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', os.cpu_count() or 1)),
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 8)),
+                        help="request threads per worker")
+    parser.add_argument('--graceful-timeout', type=float, default=30.0,
+                        help="seconds to let workers finish requests on shutdown")
+    parser.add_argument('--app', default='src.api:create_app', help="app factory as module:callable")
+    parser.add_argument('--no-access-log', action='store_true')
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.threads < 1:
+        parser.error("--workers and --threads must be at least 1")
+
+    PreforkServer(app_factory=args.app, host=args.host, port=args.port, workers=args.workers,
+                  threads=args.threads, graceful_timeout=args.graceful_timeout,
+                  access_log=not args.no_access_log).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
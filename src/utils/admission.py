@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class Rejected(Exception):
+    """A request was turned away; `reason` is a metric label, `retry_after` in seconds"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket per client: `rate` requests per second with bursts up to `burst`.
+
+    Only the `max_clients` most recently seen clients keep a bucket; a
+    forgotten client starts again with a full one.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000, clock=time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: 'OrderedDict[Hashable, list]' = OrderedDict()  # client -> [tokens, updated]
+
+    def acquire(self, client: Hashable) -> None:
+        """Take a token for `client` or raise Rejected('rate_limited')"""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                raise Rejected('rate_limited', (1 - bucket[0]) / self.rate)
+            bucket[0] -= 1
+
+
+class ConcurrencyLimiter:
+    """At most `limit` holders at once, with a bounded queue of waiters.
+
+    A caller that finds `queue_size` others already waiting is rejected at
+    once ('queue_full'); one that waits longer than `queue_timeout` seconds
+    is rejected too ('queue_timeout'). Either way it never holds a slot.
+
+    With a `budget` (a limiter shared between endpoints, with no queue),
+    running and waiting callers each hold one of its slots as well, and a
+    caller that finds the budget spent is rejected as 'queue_full'.
+    """
+
+    def __init__(self, limit: int, queue_size: int = 0, queue_timeout: float = 5.0,
+                 budget: Optional['ConcurrencyLimiter'] = None):
+        if limit < 1 or queue_size < 0:
+            raise ValueError("limit must be at least 1 and queue_size non-negative")
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.budget = budget
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        if self.budget is None:
+            return self._acquire()
+        try:
+            self.budget.acquire()
+        except Rejected:
+            raise Rejected('queue_full', self.queue_timeout) from None
+        try:
+            self._acquire()
+        except BaseException:
+            self.budget.release()
+            raise
+
+    def _acquire(self) -> None:
+        with self._condition:
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                return
+            if self.waiting >= self.queue_size:
+                raise Rejected('queue_full', self.queue_timeout)
+            self.waiting += 1
+            try:
+                if not self._condition.wait_for(lambda: self.active < self.limit, self.queue_timeout):
+                    raise Rejected('queue_timeout', self.queue_timeout)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+        if self.budget is not None:
+            self.budget.release()
+
+
+class AdmissionController:
+    """Rate and concurrency limits per endpoint, built from a config mapping.
+
+    `limits` maps an endpoint name to a dict with any of `concurrency`,
+    `queue`, `queue_timeout` (a ConcurrencyLimiter) and `rate`, `burst`
+    (a per-client RateLimiter). Endpoints not listed are always admitted.
+
+    Queued requests wait on a server thread. When the server runs `threads`
+    request threads, the limited endpoints together may hold at most
+    `threads - reserved` of them, running or queued, and each endpoint's
+    limit and queue are cut to fit. The other `reserved` threads stay free
+    for endpoints that are not limited.
+    """
+
+    def __init__(self, limits: dict, threads: Optional[int] = None, reserved: int = 0):
+        self.concurrency = {}
+        self.rates = {}
+        self.budget = None
+        if threads is not None:
+            self.budget = ConcurrencyLimiter(max(1, threads - reserved))
+        for endpoint, settings in limits.items():
+            if settings.get('concurrency'):
+                limit, queue = settings['concurrency'], settings.get('queue', 0)
+                if self.budget is not None:
+                    limit = min(limit, self.budget.limit)
+                    queue = min(queue, self.budget.limit - limit)
+                self.concurrency[endpoint] = ConcurrencyLimiter(
+                    limit, queue, settings.get('queue_timeout', 5.0), budget=self.budget)
+            if settings.get('rate'):
+                self.rates[endpoint] = RateLimiter(
+                    settings['rate'], settings.get('burst', settings['rate']))
+
+    def admit(self, endpoint: Optional[str], client: Hashable) -> Optional[ConcurrencyLimiter]:
+        """Admit a request or raise Rejected; release the returned limiter when done"""
+        rate_limiter = self.rates.get(endpoint)
+        if rate_limiter is not None:
+            rate_limiter.acquire(client)
+        limiter = self.concurrency.get(endpoint)
+        if limiter is not None:
+            limiter.acquire()
+        return limiter
+
+    def counts(self, attribute: str) -> dict:
+        return {(endpoint,): getattr(limiter, attribute) for endpoint, limiter in self.concurrency.items()}
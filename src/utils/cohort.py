@@ -0,0 +1,130 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from src.models.user import User
+from src.utils.matchmaker import Matchmaker
+from src.utils.skill_index import SkillIndex
+from src.utils.weighted_matching import max_weight_matching
+
+# Scores are floats in [0, 1]; the blossom solver works on integers.
+WEIGHT_SCALE = 1_000_000
+
+
+@dataclass
+class PairingResult:
+    pairs: List[Tuple[int, int, float]]
+    unpaired: List[int]
+    mode: str
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_score(self) -> float:
+        return sum(score for _, _, score in self.pairs)
+
+    def to_dict(self) -> dict:
+        return {
+            'mode': self.mode,
+            'pairs': [
+                {'user1_id': u1, 'user2_id': u2, 'score': score}
+                for u1, u2, score in self.pairs
+            ],
+            'unpaired': self.unpaired,
+            'total_score': self.total_score,
+            'timings_ms': self.timings
+        }
+
+
+class CohortPairer:
+    """Pairs a whole cohort at once so that total compatibility is maximized.
+
+    Only users sharing a teachable skill (per the SkillIndex) get an edge, and
+    the resulting graph is solved either exactly with the blossom algorithm or
+    with a greedy 1/2-approximation for cohorts too large for the exact solver.
+    """
+
+    MODES = ('auto', 'exact', 'greedy')
+    EXACT_LIMIT = 500
+
+    def __init__(self, matchmaker: Matchmaker, min_score: float = 0.0):
+        self.matchmaker = matchmaker
+        self.min_score = min_score
+
+    def build_graph(self, users: List[User]) -> Dict[Tuple[int, int], float]:
+        index = SkillIndex(users)
+        graph = {}
+        for user1_id, user2_id in index.candidate_edges():
+            score, _ = self.matchmaker.calculate_compatibility_score(
+                index.users[user1_id], index.users[user2_id])
+            if score > self.min_score:
+                graph[(user1_id, user2_id)] = score
+        return graph
+
+    def pair(self, user_ids: Optional[List[int]] = None, mode: str = 'auto') -> PairingResult:
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown pairing mode '{mode}'")
+
+        timings = {}
+        started = time.perf_counter()
+
+        users = self.matchmaker.db_handler.get_all_users()
+        if user_ids is not None:
+            wanted = set(user_ids)
+            users = [u for u in users if u.user_id in wanted]
+        timings['load'] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        self.matchmaker.refresh_skill_weights()
+        graph = self.build_graph(users)
+        timings['graph'] = _elapsed_ms(started)
+
+        if mode == 'auto':
+            mode = 'exact' if len(users) <= self.EXACT_LIMIT else 'greedy'
+
+        started = time.perf_counter()
+        if mode == 'exact':
+            pairs = self._solve_exact(graph)
+        else:
+            pairs = self._solve_greedy(graph)
+        timings['solve'] = _elapsed_ms(started)
+        timings['total'] = sum(timings.values())
+
+        paired = set()
+        for user1_id, user2_id, _ in pairs:
+            paired.add(user1_id)
+            paired.add(user2_id)
+        unpaired = [u.user_id for u in users if u.user_id not in paired]
+
+        pairs.sort(key=lambda pair: pair[2], reverse=True)
+        return PairingResult(pairs=pairs, unpaired=unpaired, mode=mode, timings=timings)
+
+    def _solve_exact(self, graph: Dict[Tuple[int, int], float]) -> List[Tuple[int, int, float]]:
+        vertex_ids = sorted({user_id for edge in graph for user_id in edge})
+        vertex_of = {user_id: i for i, user_id in enumerate(vertex_ids)}
+
+        edges = [
+            (vertex_of[u1], vertex_of[u2], int(round(score * WEIGHT_SCALE)))
+            for (u1, u2), score in graph.items()
+        ]
+        mate = max_weight_matching(edges)
+
+        pairs = []
+        for v, w in enumerate(mate):
+            if w > v:
+                u1, u2 = vertex_ids[v], vertex_ids[w]
+                pairs.append((u1, u2, graph[(min(u1, u2), max(u1, u2))]))
+        return pairs
+
+    def _solve_greedy(self, graph: Dict[Tuple[int, int], float]) -> List[Tuple[int, int, float]]:
+        paired = set()
+        pairs = []
+        for (u1, u2), score in sorted(graph.items(), key=lambda item: item[1], reverse=True):
+            if u1 in paired or u2 in paired:
+                continue
+            paired.add(u1)
+            paired.add(u2)
+            pairs.append((u1, u2, score))
+        return pairs
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip from the stdlib is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript',
+                      'application/x-ndjson', 'image/svg+xml')
+
+
+def supported_encodings():
+    """Content codings we can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best content coding allowed by an Accept-Encoding header"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    if encoding == 'gzip':
+        # mtime=0 keeps the output deterministic, which matters for ETags.
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=min(level, 11))
+    raise ValueError(f"Unsupported encoding '{encoding}'")
+
+
+@dataclass
+class StaticAsset:
+    body: bytes
+    mimetype: str
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+class StaticAssetCache:
+    """Static files read once, hashed for ETags and precompressed in memory"""
+
+    def __init__(self, directory: str, min_size: int = 512, level: int = 9):
+        self.directory = directory
+        self.min_size = min_size
+        self.level = level
+        self._assets: Dict[str, StaticAsset] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        assets = {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                assets[name] = self._load(path)
+        self._assets = assets
+
+    def _load(self, path: str) -> StaticAsset:
+        with open(path, 'rb') as f:
+            body = f.read()
+
+        # The response class adds '; charset=utf-8' to text types itself.
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        asset = StaticAsset(body=body, mimetype=mimetype,
+                            etag=hashlib.sha1(body).hexdigest()[:16])
+        if is_compressible(mimetype) and len(body) >= self.min_size:
+            for encoding in supported_encodings():
+                encoded = compress(body, encoding, self.level)
+                if len(encoded) < len(body):
+                    asset.encoded[encoding] = encoded
+        return asset
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        return self._assets.get(name)
@@ -0,0 +1,120 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from src.utils.skill_canonicalizer import skill_key
+
+_SEPARATORS = re.compile(r"[\s\-_./]+")
+
+
+def trigrams(skill: str) -> FrozenSet[str]:
+    """Character trigrams of a skill, ignoring case and separator punctuation"""
+    padded = "  " + _SEPARATORS.sub(" ", skill_key(skill)).strip() + " "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Fuzzy skill lookup over the skill dictionary using a trigram inverted index.
+
+    Similarity is the Jaccard index of two skills' trigram sets, so lookups only
+    touch skills sharing at least one trigram with the query. Each known skill's
+    neighbours above `threshold` are precomputed and kept up to date as skills
+    are added, which keeps pair scoring down to set intersections. Neighbours
+    of skills outside the dictionary are memoized too, for at most
+    `cache_size` skills, until the next addition.
+
+    Additions are serialized by a lock. Lookups take no lock: posting sets are
+    replaced rather than mutated, so a reader never sees one change size.
+    """
+
+    def __init__(self, skills: Iterable[str] = (), threshold: float = 0.5,
+                 max_neighbours: int = 5, cache_size: int = 10000):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+
+        self.threshold = threshold
+        self.max_neighbours = max_neighbours
+        self.cache_size = cache_size
+        self._grams: Dict[str, FrozenSet[str]] = {}
+        self._postings: Dict[str, FrozenSet[str]] = {}
+        self._neighbours: Dict[str, FrozenSet[str]] = {}
+        self._unknown: Dict[str, FrozenSet[str]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+
+        postings: Dict[str, Set[str]] = defaultdict(set)
+        for skill in skills:
+            grams = self._grams[skill] = trigrams(skill)
+            for gram in grams:
+                postings[gram].add(skill)
+        self._postings = {gram: frozenset(skills) for gram, skills in postings.items()}
+        for skill in self._grams:
+            self._neighbours[skill] = self._compute_neighbours(skill)
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def __contains__(self, skill: str) -> bool:
+        return skill in self._grams
+
+    def _index(self, skill: str) -> None:
+        grams = trigrams(skill)
+        self._grams[skill] = grams
+        for gram in grams:
+            self._postings[gram] = self._postings.get(gram, frozenset()) | {skill}
+
+    def similar(self, skill: str, threshold: Optional[float] = None,
+                limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return dictionary skills similar to `skill`, best first"""
+        threshold = self.threshold if threshold is None else threshold
+        grams = self._grams.get(skill) or trigrams(skill)
+
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += 1
+
+        results = []
+        for candidate, count in shared.items():
+            if candidate == skill:
+                continue
+            similarity = count / (len(grams) + len(self._grams[candidate]) - count)
+            if similarity >= threshold:
+                results.append((candidate, similarity))
+
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:limit] if limit else results
+
+    def _compute_neighbours(self, skill: str) -> FrozenSet[str]:
+        similar = self.similar(skill, limit=self.max_neighbours)
+        return frozenset([skill] + [candidate for candidate, _ in similar])
+
+    def add(self, skill: str) -> None:
+        with self._lock:
+            if skill in self._grams:
+                return
+
+            self._index(skill)
+            self._neighbours[skill] = self._compute_neighbours(skill)
+            # Similarity is symmetric, so the skills that may now list the new one
+            # are all those above the threshold, not just its own top neighbours.
+            for similar, _ in self.similar(skill):
+                self._neighbours[similar] = self._compute_neighbours(similar)
+            # Memoized neighbours of unknown skills may now be missing this one.
+            with self._cache_lock:
+                self._generation += 1
+                self._unknown = {}
+
+    def neighbours(self, skill: str) -> FrozenSet[str]:
+        """The skill itself plus its precomputed near-miss spellings"""
+        neighbours = self._neighbours.get(skill) or self._unknown.get(skill)
+        if neighbours is None:
+            generation = self._generation
+            neighbours = self._compute_neighbours(skill)
+            with self._cache_lock:
+                if generation == self._generation:
+                    if len(self._unknown) >= self.cache_size:
+                        self._unknown.pop(next(iter(self._unknown)))
+                    self._unknown[skill] = neighbours
+        return neighbours
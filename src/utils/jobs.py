@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from src.models.job import Job
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class JobContext:
+    """Handed to a running job to report progress and notice cancellation.
+
+    Progress is written to the jobs table at most every `interval` seconds;
+    the cancellation flag is re-read from the table just as often, so a
+    cancel request made through another worker process is noticed too.
+    """
+
+    def __init__(self, runner: 'JobRunner', job: Job, interval: float):
+        self.runner = runner
+        self.job_id = job.job_id
+        self.params = job.params
+        self.interval = interval
+        self._cancel = runner._cancel_events[job.job_id]
+        self._last_write = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.job_id)
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        """Record progress in [0, 1]; raises JobCancelled if the job should stop"""
+        now = time.monotonic()
+        if now - self._last_write >= self.interval:
+            self._last_write = now
+            db = self.runner.db
+            db.update_job(self.job_id, progress=min(max(fraction, 0.0), 1.0), message=message)
+            if db.is_job_cancel_requested(self.job_id):
+                self._cancel.set()
+        self.check_cancelled()
+
+
+class JobRunner:
+    """Runs registered job kinds on a thread pool, keeping their state in SQLite.
+
+    A job kind is a function `run(context, params)` returning a JSON-able
+    result, plus an optional `validate(params)` that returns normalized
+    params or raises ValueError before anything is queued. Finished jobs
+    and their results are kept for `retention_seconds`.
+    """
+
+    def __init__(self, db_handler, workers: int = 2, retention_seconds: float = 86400,
+                 progress_interval: float = 0.5):
+        self.db = db_handler
+        self.retention_seconds = retention_seconds
+        self.progress_interval = progress_interval
+        self._kinds: Dict[str, tuple] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.fail_orphaned_jobs()
+
+    def register(self, kind: str, run: Callable[[JobContext, dict], Any],
+                 validate: Optional[Callable[[dict], dict]] = None) -> None:
+        self._kinds[kind] = (run, validate)
+
+    @property
+    def kinds(self) -> List[str]:
+        return sorted(self._kinds)
+
+    def submit(self, kind: str, params: Optional[dict] = None) -> Job:
+        """Queue a job; raises KeyError for an unknown kind and ValueError for bad params"""
+        run, validate = self._kinds[kind]
+        params = dict(params or {})
+        if validate is not None:
+            params = validate(params)
+
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, params=params, owner_pid=os.getpid())
+        self._cancel_events[job.job_id] = threading.Event()
+        self.db.create_job(job)
+        self._pool.submit(self._execute, job)
+        self.prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.db.get_job(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a job to stop; False if it is unknown or already finished"""
+        if not self.db.request_job_cancel(job_id):
+            return False
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        return True
+
+    def prune(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        return self.db.delete_finished_jobs(datetime.now() - timedelta(seconds=self.retention_seconds))
+
+    def fail_orphaned_jobs(self) -> int:
+        """Mark unfinished jobs whose owning process is gone as failed"""
+        orphaned = 0
+        for status in ('queued', 'running'):
+            for job in self.db.list_jobs(status=status, limit=1000):
+                if job.owner_pid != os.getpid() and not _process_alive(job.owner_pid):
+                    orphaned += self.db.update_job(job.job_id, only_if_status=(status,), status='failed',
+                                                   error='Interrupted: the worker running it exited',
+                                                   finished_at=datetime.now())
+        return orphaned
+
+    def shutdown(self, wait: bool = True) -> None:
+        for event in self._cancel_events.values():
+            event.set()
+        self._pool.shutdown(wait=wait)
+
+    def _execute(self, job: Job) -> None:
+        try:
+            if not self.db.update_job(job.job_id, only_if_status=('queued',), status='running',
+                                      started_at=datetime.now()):
+                return
+            run, _ = self._kinds[job.kind]
+            context = JobContext(self, job, self.progress_interval)
+            try:
+                if self.db.is_job_cancel_requested(job.job_id):
+                    raise JobCancelled(job.job_id)
+                result = run(context, job.params)
+            except JobCancelled:
+                self._finish(job.job_id, status='cancelled')
+            except Exception as e:
+                traceback.print_exc(file=sys.stderr)
+                self._finish(job.job_id, status='failed', error=f"{type(e).__name__}: {e}")
+            else:
+                self._finish(job.job_id, status='succeeded', progress=1.0, result=result)
+        finally:
+            self._cancel_events.pop(job.job_id, None)
+
+    def _finish(self, job_id: str, **fields) -> None:
+        self.db.update_job(job_id, finished_at=datetime.now(), **fields)
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,131 @@
+import random
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from src.models.user import User
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class MinHashLSH:
+    """Approximate candidate retrieval with MinHash signatures and LSH banding.
+
+    Each user gets one signature for the skills they offer and one for the
+    skills they need. A user's "needed" signature is looked up against everyone's
+    "offered" buckets (and vice versa), so partners whose skill sets overlap a
+    lot collide in at least one band with high probability.
+
+    `bands` and `rows` (num_perm / bands) are the recall/latency knobs: more
+    rows per band means fewer collisions and smaller candidate sets, more
+    bands means more chances to collide and higher recall. The defaults, 64
+    bands of 3 rows, retrieved about a fifth of the board in
+    `benchmarks/bench_lsh.py` and found 87-91% of the exact top 10 matches,
+    1.9x faster than exact matching at 800 users and 2.5x at 2000. With 2
+    rows most of the board shares a band with any user (recall 1.0, 1.3x);
+    with 4, recall falls to about 0.5.
+    """
+
+    def __init__(self, num_perm: int = 192, bands: int = 64, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+        self._offered_buckets: List[Dict[Tuple[int, ...], Set[int]]] = [
+            defaultdict(set) for _ in range(bands)
+        ]
+        self._needed_buckets: List[Dict[Tuple[int, ...], Set[int]]] = [
+            defaultdict(set) for _ in range(bands)
+        ]
+        self._signatures: Dict[int, Tuple[Optional[tuple], Optional[tuple]]] = {}
+        self._hash_cache: Dict[str, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._signatures
+
+    def _skill_hashes(self, skill: str) -> Tuple[int, ...]:
+        # Boards reuse a small vocabulary, so each skill is hashed once.
+        hashes = self._hash_cache.get(skill)
+        if hashes is None:
+            h = zlib.crc32(skill.encode('utf-8'))
+            hashes = tuple(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for a, b in self._perms)
+            self._hash_cache[skill] = hashes
+        return hashes
+
+    def signature(self, skills: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        hashes = [self._skill_hashes(skill) for skill in set(skills)]
+        if not hashes:
+            return None
+        if len(hashes) == 1:
+            return hashes[0]
+        return tuple(map(min, *hashes))
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def add_user(self, user: User) -> None:
+        if user.user_id in self._signatures:
+            self.remove_user(user.user_id)
+
+        offered = self.signature(user.skills_offered)
+        needed = self.signature(user.skills_needed)
+        self._signatures[user.user_id] = (offered, needed)
+
+        if offered:
+            for band, key in self._band_keys(offered):
+                self._offered_buckets[band][key].add(user.user_id)
+        if needed:
+            for band, key in self._band_keys(needed):
+                self._needed_buckets[band][key].add(user.user_id)
+
+    def add_users(self, users: Iterable[User]) -> None:
+        for user in users:
+            self.add_user(user)
+
+    def remove_user(self, user_id: int) -> None:
+        signatures = self._signatures.pop(user_id, None)
+        if not signatures:
+            return
+
+        offered, needed = signatures
+        for buckets, signature in ((self._offered_buckets, offered),
+                                   (self._needed_buckets, needed)):
+            if not signature:
+                continue
+            for band, key in self._band_keys(signature):
+                members = buckets[band].get(key)
+                if members:
+                    members.discard(user_id)
+                    if not members:
+                        del buckets[band][key]
+
+    def query(self, user: User) -> Set[int]:
+        """Return ids of users likely to teach `user` or learn from them"""
+        candidates = set()
+
+        needed = self.signature(user.skills_needed)
+        if needed:
+            for band, key in self._band_keys(needed):
+                candidates.update(self._offered_buckets[band].get(key, ()))
+
+        offered = self.signature(user.skills_offered)
+        if offered:
+            for band, key in self._band_keys(offered):
+                candidates.update(self._needed_buckets[band].get(key, ()))
+
+        candidates.discard(user.user_id)
+        return candidates
@@ -0,0 +1,103 @@
+import json
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def format_event(event: str, data, event_id=None) -> bytes:
+    """One Server-Sent Events message with a JSON payload"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class MatchSnapshot(NamedTuple):
+    """What `compute` returns: None for `skills` means the user no longer exists"""
+    board_version: int
+    skills: Optional[FrozenSet[str]]
+    entries: List[dict]
+
+
+class MatchStream:
+    """Turns one user's successive match lists into SSE messages.
+
+    `compute()` returns a MatchSnapshot. The first message is the full list
+    ('matches'); after that only differences are sent: 'match' for a new or
+    changed entry and 'unmatch' for a partner that dropped out. Changes from
+    the feed only trigger a recomputation when they involve the user, one
+    of their current partners or one of their skills; `check_version`
+    catches writes made by other processes.
+    """
+
+    def __init__(self, user_id: int, compute: Callable[[], MatchSnapshot], retry_ms: int = 5000):
+        self.user_id = user_id
+        self.compute = compute
+        self.retry_ms = retry_ms
+        self.version_seen = -1
+        self.skills: FrozenSet[str] = frozenset()
+        self.entries: Dict[int, dict] = {}
+        self.closed = False
+
+    def start(self) -> bytes:
+        snapshot = self._load()
+        if snapshot.skills is None:
+            return self._end()
+        self.entries = {entry['user']['user_id']: entry for entry in snapshot.entries}
+        return (f"retry: {self.retry_ms}\n\n".encode("ascii") +
+                format_event('matches', snapshot.entries, snapshot.board_version))
+
+    def is_relevant(self, change) -> bool:
+        return (change.user_id == self.user_id or change.user_id in self.entries or
+                not self.skills.isdisjoint(change.skills))
+
+    def on_changes(self, changes: Iterable, overflowed: bool = False) -> bytes:
+        """Messages for a batch of feed changes; empty if none of them matter"""
+        relevant = overflowed
+        for change in changes:
+            self.version_seen = max(self.version_seen, change.board_version)
+            relevant = relevant or self.is_relevant(change)
+        return self.refresh() if relevant else b""
+
+    def check_version(self, board_version: int) -> bytes:
+        """Refresh if the board moved on without the feed telling us, else a keepalive"""
+        if board_version > self.version_seen:
+            return self.refresh() or KEEPALIVE
+        return KEEPALIVE
+
+    def refresh(self) -> bytes:
+        snapshot = self._load()
+        if snapshot.skills is None:
+            return self._end()
+        current = {entry['user']['user_id']: entry for entry in snapshot.entries}
+        messages = [format_event('match', entry, snapshot.board_version)
+                    for partner_id, entry in current.items() if self.entries.get(partner_id) != entry]
+        messages += [format_event('unmatch', {'user_id': partner_id}, snapshot.board_version)
+                     for partner_id in self.entries if partner_id not in current]
+        self.entries = current
+        return b"".join(messages)
+
+    def _load(self) -> MatchSnapshot:
+        snapshot = self.compute()
+        self.version_seen = max(self.version_seen, snapshot.board_version)
+        self.skills = snapshot.skills or frozenset()
+        return snapshot
+
+    def _end(self) -> bytes:
+        self.closed = True
+        return format_event('end', {'error': 'User not found'})
+
+    def iter_events(self, subscription, heartbeat: float, board_version: Callable[[], int]) -> Iterator[bytes]:
+        """Blocking event loop for a WSGI response; yields until the user is deleted"""
+        try:
+            yield self.start()
+            while not self.closed:
+                changes, overflowed = subscription.wait(heartbeat)
+                if changes or overflowed:
+                    message = self.on_changes(changes, overflowed)
+                else:
+                    message = self.check_version(board_version())
+                yield message or KEEPALIVE
+        finally:
+            subscription.close()
@@ -1,30 +1,132 @@
-from typing import List, Tuple, Dict
+import heapq
+import math
+import threading
+import time
+from typing import Callable, List, Tuple, Dict, Optional
 from src.models.user import User
 from src.models.match import Match
+from src.database.change_log import ChangeLogCompacted
 from src.database.db_handler import DatabaseHandler
+from src.utils.lsh import MinHashLSH
+from src.utils.fuzzy import TrigramIndex
+
+MUTUAL_BONUS = 2.0
 
 class Matchmaker:
     
-    def __init__(self, db_handler: DatabaseHandler):
+    WEIGHTINGS = ('uniform', 'idf')
+    
+    def __init__(self, db_handler: DatabaseHandler, lsh_index: Optional[MinHashLSH] = None,
+                 fuzzy_index: Optional[TrigramIndex] = None, weighting: str = 'uniform',
+                 lsh_options: Optional[dict] = None):
+        if weighting not in self.WEIGHTINGS:
+            raise ValueError(f"Unknown weighting '{weighting}'")
         self.db_handler = db_handler
+        self.lsh_index = lsh_index
+        self.lsh_options = dict(lsh_options or {})
+        # Change log positions the LSH and fuzzy indexes reflect; see refresh_lsh_index
+        # and refresh_fuzzy_index.
+        self._lsh_seq = None
+        self._lsh_lock = threading.Lock()
+        self._fuzzy_seq = None
+        self._fuzzy_options: Dict = {}
+        self._fuzzy_lock = threading.Lock()
+        self.fuzzy_index = fuzzy_index
+        self.weighting = weighting
+        self._skill_weights: Optional[Dict[str, float]] = None
+        self._default_weight = 1.0
+        self._weights_version = None
+        self.weight_cache_hits = 0
+        self.weight_cache_misses = 0
+        # Called as stage_observer(stage, seconds) for each find_matches stage.
+        self.stage_observer: Optional[Callable[[str, float], None]] = None
+    
+    def _lap(self, stage: str, started: float) -> float:
+        now = time.perf_counter()
+        if self.stage_observer is not None:
+            self.stage_observer(stage, now - started)
+        return now
+    
+    def refresh_skill_weights(self) -> None:
+        """Reload IDF weights from skill_stats if the board changed since the last load"""
+        if self.weighting != 'idf':
+            return
+        version = self.db_handler.get_board_version()
+        if self._skill_weights is not None and version == self._weights_version:
+            self.weight_cache_hits += 1
+            return
+        
+        self.weight_cache_misses += 1
+        user_count, stats = self.db_handler.get_skill_stats()
+        self._skill_weights = {
+            skill: self._idf(offered + needed, user_count)
+            for skill, (offered, needed) in stats.items()
+        }
+        self._default_weight = self._idf(0, user_count)
+        self._weights_version = version
+    
+    @staticmethod
+    def _idf(frequency: int, user_count: int) -> float:
+        return math.log((1 + user_count) / (1 + frequency)) + 1.0
+    
+    def _total_weight(self, skills: List[str]) -> float:
+        if self.weighting == 'uniform':
+            return len(skills)
+        if self._skill_weights is None:
+            self.refresh_skill_weights()
+        weights = self._skill_weights
+        default = self._default_weight
+        return sum(weights.get(skill, default) for skill in skills)
+    
+    def enable_fuzzy_matching(self, threshold: float = 0.5, max_neighbours: int = 5) -> TrigramIndex:
+        """Opt in to near-miss skill matching over the board's skill dictionary"""
+        self._fuzzy_options = {'threshold': threshold, 'max_neighbours': max_neighbours}
+        with self._fuzzy_lock:
+            self._build_fuzzy_index()
+        return self.fuzzy_index
+    
+    def _build_fuzzy_index(self) -> None:
+        seq = self.db_handler.latest_change_seq()
+        self.fuzzy_index = TrigramIndex(self.db_handler.get_all_skills(), **self._fuzzy_options)
+        self._fuzzy_seq = seq
+    
+    def refresh_fuzzy_index(self, batch: int = 1000) -> None:
+        """Add skills written since the fuzzy index was built, including by
+        other processes, by replaying the change log"""
+        if self.fuzzy_index is None or self._fuzzy_seq is None:
+            return
+        with self._fuzzy_lock:
+            while True:
+                try:
+                    changes = self.db_handler.changes_since(self._fuzzy_seq, limit=batch)
+                except ChangeLogCompacted:
+                    self._build_fuzzy_index()
+                    return
+                for change in changes:
+                    if change.entity == 'board':
+                        self._build_fuzzy_index()
+                        return
+                    for skill in change.offered_added + change.needed_added:
+                        self.fuzzy_index.add(skill)
+                    self._fuzzy_seq = change.seq
+                if len(changes) < batch:
+                    return
+    
+    def skills_learnable(self, learner: User, teacher: User) -> List[str]:
+        """Skills `learner` needs that `teacher` offers, in the learner's order"""
+        offered = set(teacher.skills_offered)
+        if self.fuzzy_index is None:
+            return [skill for skill in learner.skills_needed if skill in offered]
+        
+        return [skill for skill in learner.skills_needed
+                if not offered.isdisjoint(self.fuzzy_index.neighbours(skill))]
     
     def calculate_compatibility_score(self, user1: User, user2: User) -> Tuple[float, List[str]]:
         if user1.user_id == user2.user_id:
             return 0.0, []
 
-        user1_can_learn = []
-        for skill_user1_needs in user1.skills_needed:
-            for skill_user2_offers in user2.skills_offered:
-                if skill_user1_needs == skill_user2_offers:
-                    user1_can_learn.append(skill_user1_needs)
-                    break
-        
-        user2_can_learn = []
-        for skill_user2_needs in user2.skills_needed:
-            for skill_user1_offers in user1.skills_offered:
-                if skill_user2_needs == skill_user1_offers:
-                    user2_can_learn.append(skill_user2_needs)
-                    break
+        user1_can_learn = self.skills_learnable(user1, user2)
+        user2_can_learn = self.skills_learnable(user2, user1)
 
         all_matches = []
         for skill in user1_can_learn:
@@ -33,17 +135,18 @@ class Matchmaker:
             if skill not in all_matches:
                 all_matches.append(skill)
  
-        base_score = len(user1_can_learn) + len(user2_can_learn)
-        
-        mutual_bonus = 0.0
-        if len(user1_can_learn) > 0 and len(user2_can_learn) > 0:
-            mutual_bonus = 2.0
-        
-        max_possible = len(user1.skills_needed) + len(user2.skills_needed)
+        base_score = self._total_weight(user1_can_learn) + self._total_weight(user2_can_learn)
+        max_possible = self._total_weight(user1.skills_needed) + self._total_weight(user2.skills_needed)
         
         if max_possible == 0:
             return 0.0, all_matches
         
+        # The bonus is worth two average needed skills, i.e. exactly 2.0 when unweighted.
+        mutual_bonus = 0.0
+        if len(user1_can_learn) > 0 and len(user2_can_learn) > 0:
+            needed_count = len(user1.skills_needed) + len(user2.skills_needed)
+            mutual_bonus = MUTUAL_BONUS * max_possible / needed_count
+        
         raw_score = base_score + mutual_bonus
         normalized_score = raw_score / max_possible
         if normalized_score > 1.0:
@@ -51,12 +154,90 @@ class Matchmaker:
         
         return normalized_score, all_matches
     
-    def find_matches(self, user_id: int, min_score: float = 0.1) -> List[Tuple[int, float]]:
+    def build_lsh_index(self, **lsh_options) -> MinHashLSH:
+        """(Re)build the approximate retrieval index from every user on the board.
+        
+        Options given here (num_perm, bands, seed) replace `lsh_options` and
+        are kept for later rebuilds.
+        """
+        if lsh_options:
+            self.lsh_options = lsh_options
+        with self._lsh_lock:
+            self._build_lsh_index()
+        return self.lsh_index
+    
+    def _build_lsh_index(self) -> None:
+        # Read the seq first: changes that land during the scan are replayed, harmlessly.
+        seq = self.db_handler.latest_change_seq()
+        index = MinHashLSH(**self.lsh_options)
+        index.add_users(self.db_handler.get_all_users())
+        self.lsh_index, self._lsh_seq = index, seq
+    
+    def refresh_lsh_index(self, batch: int = 1000) -> MinHashLSH:
+        """Build the LSH index, or bring it up to date by replaying the change
+        log, which also covers writes made by other processes"""
+        with self._lsh_lock:
+            if self.lsh_index is None or self._lsh_seq is None or not self._apply_lsh_changes(batch):
+                self._build_lsh_index()
+            return self.lsh_index
+    
+    def _apply_lsh_changes(self, batch: int) -> bool:
+        """Replay new user changes onto the index; False if it has to be rebuilt instead"""
+        while True:
+            try:
+                changes = self.db_handler.changes_since(self._lsh_seq, limit=batch)
+            except ChangeLogCompacted:
+                return False
+            if any(change.entity == 'board' for change in changes):
+                return False
+            changed = {change.entity_id for change in changes if change.entity == 'user'}
+            users = {user.user_id: user for user in self.db_handler.get_users(sorted(changed))}
+            for user_id in changed:
+                if user_id in users:
+                    self.lsh_index.add_user(users[user_id])
+                else:
+                    self.lsh_index.remove_user(user_id)
+            if changes:
+                self._lsh_seq = changes[-1].seq
+            if len(changes) < batch:
+                return True
+    
+    def index_user(self, user: User) -> None:
+        """Keep the retrieval and fuzzy indexes in step with an added or updated user"""
+        if self.lsh_index is not None:
+            with self._lsh_lock:
+                self.lsh_index.add_user(user)
+        if self.fuzzy_index is not None:
+            for skill in user.skills_offered + user.skills_needed:
+                self.fuzzy_index.add(skill)
+    
+    def _approximate_candidates(self, target_user: User) -> List[User]:
+        self.refresh_lsh_index()
+        with self._lsh_lock:
+            candidates = self.lsh_index.query(target_user)
+        return self.db_handler.get_users(sorted(candidates))
+    
+    def find_matches(self, user_id: int, min_score: float = 0.1,
+                     approximate: bool = False, limit: Optional[int] = None,
+                     mutual_only: bool = False) -> List[Tuple[int, float]]:
+        """Rank partners for a user, best first.
+        
+        Filtering (min_score, mutual_only) and truncation to the top `limit`
+        happen here, before anything is persisted or returned for hydration.
+        """
+        started = time.perf_counter()
         target_user = self.db_handler.get_user(user_id)
         if not target_user:
             return []
         
-        all_users = self.db_handler.get_all_users()
+        self.refresh_skill_weights()
+        self.refresh_fuzzy_index()
+        started = self._lap('load', started)
+        if approximate:
+            all_users = self._approximate_candidates(target_user)
+        else:
+            all_users = self.db_handler.get_all_users()
+        started = self._lap('candidates', started)
         matches = []
         
         for user in all_users:
@@ -64,26 +245,35 @@ class Matchmaker:
                 continue
             
             score, matching_skills = self.calculate_compatibility_score(target_user, user)
-            
-            if score >= min_score:
-                matches.append((user.user_id, score))
-
-                match = Match(
-                    user1_id=user_id,
-                    user2_id=user.user_id,
-                    compatibility_score=score,
-                    matching_skills=matching_skills
-                )
-                self.db_handler.save_match(match)
-        
-        for i in range(len(matches)):
-            for j in range(len(matches) - 1 - i):
-                if matches[j][1] < matches[j + 1][1]:
-                    temp = matches[j]
-                    matches[j] = matches[j + 1]
-                    matches[j + 1] = temp
-        
-        return matches
+            if score < min_score:
+                continue
+            if mutual_only and not (self.skills_learnable(target_user, user) and
+                                    self.skills_learnable(user, target_user)):
+                continue
+            matches.append((user.user_id, score, matching_skills))
+        started = self._lap('score', started)
+        
+        if limit is not None:
+            matches = heapq.nlargest(limit, matches, key=lambda match: match[1])
+        else:
+            matches.sort(key=lambda match: match[1], reverse=True)
+        started = self._lap('sort', started)
+        
+        # Queue every save before waiting, so a write queue can commit them together.
+        saves = [
+            self.db_handler.save_match_async(Match(
+                user1_id=user_id,
+                user2_id=match_user_id,
+                compatibility_score=score,
+                matching_skills=matching_skills
+            ))
+            for match_user_id, score, matching_skills in matches
+        ]
+        for save in saves:
+            save.result()
+        self._lap('persist', started)
+        
+        return [(match_user_id, score) for match_user_id, score, _ in matches]
     
     def get_match_details(self, user1_id: int, user2_id: int) -> Dict:
         user1 = self.db_handler.get_user(user1_id)
@@ -92,21 +282,12 @@ class Matchmaker:
         if not user1 or not user2:
             return {}
         
+        self.refresh_skill_weights()
+        self.refresh_fuzzy_index()
         score, matching_skills = self.calculate_compatibility_score(user1, user2)
         
-        user1_can_learn = []
-        for skill_user1_needs in user1.skills_needed:
-            for skill_user2_offers in user2.skills_offered:
-                if skill_user1_needs == skill_user2_offers:
-                    user1_can_learn.append(skill_user1_needs)
-                    break
-        
-        user2_can_learn = []
-        for skill_user2_needs in user2.skills_needed:
-            for skill_user1_offers in user1.skills_offered:
-                if skill_user2_needs == skill_user1_offers:
-                    user2_can_learn.append(skill_user2_needs)
-                    break
+        user1_can_learn = self.skills_learnable(user1, user2)
+        user2_can_learn = self.skills_learnable(user2, user1)
         
         is_mutual_exchange = False
         if len(user1_can_learn) > 0 and len(user2_can_learn) > 0:
@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # Flamegraph tools split frames on ';' and the count off the last space.
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+def collapse_stack(frame) -> str:
+    """A frame's call stack in collapsed form, outermost call first"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Samples the stacks of selected threads from a background thread.
+
+    Only threads registered with `add_thread` are sampled, so idle server
+    threads don't drown out the requests being profiled. Output is in the
+    collapsed-stack format read by flamegraph.pl, speedscope and similar.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_thread(self, ident: int) -> None:
+        with self._lock:
+            self._threads.add(ident)
+
+    def discard_thread(self, ident: int) -> None:
+        with self._lock:
+            self._threads.discard(ident)
+
+    def start(self, duration: Optional[float] = None) -> None:
+        """Start sampling, stopping by itself after `duration` seconds if given"""
+        self._stop.clear()
+        deadline = time.monotonic() + duration if duration is not None else None
+        self._thread = threading.Thread(target=self._run, args=(deadline,),
+                                        name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self, deadline: Optional[float]) -> None:
+        while not self._stop.wait(self.interval):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            self.sample()
+
+    def sample(self) -> None:
+        with self._lock:
+            threads = list(self._threads)
+        if not threads:
+            return
+        frames = sys._current_frames()
+        for ident in threads:
+            frame = frames.get(ident)
+            if frame is not None:
+                stack = collapse_stack(frame)
+                with self._lock:
+                    self._stacks[stack] += 1
+                    self.samples += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+
+class ProfileSession:
+    """Profile the next `requests` requests, or every request for `seconds`"""
+
+    def __init__(self, requests: Optional[int] = None, seconds: Optional[float] = None,
+                 interval: float = 0.005):
+        if (requests is None) == (seconds is None):
+            raise ValueError("Give exactly one of requests or seconds")
+        self.requests = requests
+        self.seconds = seconds
+        self.profiler = SamplingProfiler(interval)
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + seconds if seconds is not None else None
+        self._admitted = 0
+        self._finished = 0
+        self._lock = threading.Lock()
+        self.profiler.start(duration=seconds)
+
+    @property
+    def done(self) -> bool:
+        if self.deadline is not None:
+            return time.monotonic() >= self.deadline
+        return self._finished >= self.requests
+
+    def begin_request(self) -> bool:
+        """Start sampling the calling thread if the session still has room"""
+        with self._lock:
+            if self.deadline is not None:
+                if time.monotonic() >= self.deadline:
+                    return False
+            elif self._admitted >= self.requests:
+                return False
+            self._admitted += 1
+        self.profiler.add_thread(threading.get_ident())
+        return True
+
+    def end_request(self) -> None:
+        self.profiler.discard_thread(threading.get_ident())
+        with self._lock:
+            self._finished += 1
+        if self.deadline is None and self.done:
+            self.profiler.stop()
+
+    def status(self) -> dict:
+        return {
+            'done': self.done,
+            'requests': self.requests,
+            'seconds': self.seconds,
+            'profiled_requests': self._finished,
+            'samples': self.profiler.samples,
+        }
+
+    def result(self) -> str:
+        if self.done:
+            self.profiler.stop()
+        return self.profiler.collapsed()
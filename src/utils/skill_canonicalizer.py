@@ -0,0 +1,97 @@
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Seed synonym table, keyed by the case-folded alias.
+DEFAULT_SYNONYMS = {
+    'python': 'Python',
+    'python 3': 'Python',
+    'python3': 'Python',
+    'py': 'Python',
+    'javascript': 'JavaScript',
+    'js': 'JavaScript',
+    'typescript': 'TypeScript',
+    'ts': 'TypeScript',
+    'machine learning': 'Machine Learning',
+    'kubernetes': 'Kubernetes',
+    'k8s': 'Kubernetes',
+    'postgresql': 'PostgreSQL',
+    'postgres': 'PostgreSQL',
+    'react': 'React',
+    'reactjs': 'React',
+    'react.js': 'React',
+}
+
+
+def normalize_skill(skill: str) -> str:
+    """Unicode-normalize and collapse whitespace, keeping the original casing"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", skill)).strip()
+
+
+def skill_key(skill: str) -> str:
+    """Case-insensitive comparison key for a skill name"""
+    return normalize_skill(skill).casefold()
+
+
+class SkillCanonicalizer:
+    """Maps raw skill spellings onto one canonical name.
+
+    Spellings are normalized and case-folded into a key, and the key is looked
+    up in an alias table; unknown keys keep their normalized spelling. Results
+    are memoized per raw string since the same few skills are written over and
+    over. The memo holds at most `cache_size` spellings, dropping the oldest
+    first, since its keys come straight from user input.
+    """
+
+    def __init__(self, synonyms: Optional[Dict[str, str]] = None, cache_size: int = 10000):
+        self._aliases: Dict[str, str] = {}
+        self._cache: Dict[str, str] = {}
+        self.cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        for alias, canonical in (DEFAULT_SYNONYMS if synonyms is None else synonyms).items():
+            self.add_synonym(alias, canonical)
+
+    def __contains__(self, skill: str) -> bool:
+        return skill_key(skill) in self._aliases
+
+    def add_synonym(self, alias: str, canonical: str) -> None:
+        self._aliases[skill_key(alias)] = normalize_skill(canonical)
+        with self._cache_lock:
+            self._cache.clear()
+
+    def synonyms(self) -> Dict[str, str]:
+        return dict(self._aliases)
+
+    def canonicalize(self, skill: str) -> str:
+        canonical = self._cache.get(skill)
+        if canonical is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            normalized = normalize_skill(skill)
+            canonical = self._aliases.get(normalized.casefold(), normalized)
+            with self._cache_lock:
+                if len(self._cache) >= self.cache_size:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[skill] = canonical
+        return canonical
+
+    def canonicalize_all(self, skills: Iterable[str]) -> List[str]:
+        """Canonicalize a list of skills, dropping blanks and duplicates in order"""
+        result = []
+        seen = set()
+        for skill in skills:
+            canonical = self.canonicalize(skill) if skill else ""
+            key = canonical.casefold()
+            if canonical and key not in seen:
+                seen.add(key)
+                result.append(canonical)
+        return result
+
+
+default_canonicalizer = SkillCanonicalizer()
@@ -0,0 +1,62 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, Set, Tuple
+from src.models.user import User
+
+
+class SkillIndex:
+    """In-memory inverted index from a skill to the users offering or needing it.
+
+    Used to restrict pairwise scoring to users that share at least one
+    teachable skill instead of comparing everyone with everyone.
+    """
+
+    def __init__(self, users: Iterable[User] = ()):
+        self.offered_by: Dict[str, Set[int]] = defaultdict(set)
+        self.needed_by: Dict[str, Set[int]] = defaultdict(set)
+        self.users: Dict[int, User] = {}
+        for user in users:
+            self.add_user(user)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def add_user(self, user: User) -> None:
+        if user.user_id in self.users:
+            self.remove_user(user.user_id)
+
+        self.users[user.user_id] = user
+        for skill in user.skills_offered:
+            self.offered_by[skill].add(user.user_id)
+        for skill in user.skills_needed:
+            self.needed_by[skill].add(user.user_id)
+
+    def remove_user(self, user_id: int) -> None:
+        user = self.users.pop(user_id, None)
+        if not user:
+            return
+
+        for skill in user.skills_offered:
+            self.offered_by[skill].discard(user_id)
+            if not self.offered_by[skill]:
+                del self.offered_by[skill]
+        for skill in user.skills_needed:
+            self.needed_by[skill].discard(user_id)
+            if not self.needed_by[skill]:
+                del self.needed_by[skill]
+
+    def candidates_for(self, user: User) -> Set[int]:
+        """Return ids of users that can teach or learn at least one skill from `user`"""
+        candidates = set()
+        for skill in user.skills_needed:
+            candidates.update(self.offered_by.get(skill, ()))
+        for skill in user.skills_offered:
+            candidates.update(self.needed_by.get(skill, ()))
+        candidates.discard(user.user_id)
+        return candidates
+
+    def candidate_edges(self) -> Iterator[Tuple[int, int]]:
+        """Yield every candidate pair once, as (smaller_id, larger_id)"""
+        for user_id, user in self.users.items():
+            for other_id in self.candidates_for(user):
+                if user_id < other_id:
+                    yield user_id, other_id
@@ -0,0 +1,109 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.utils.skill_canonicalizer import skill_key
+
+
+class _Node:
+    __slots__ = ("children", "skill", "popularity", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.skill: Optional[str] = None
+        self.popularity = 0
+        # Best (popularity, skill) pairs anywhere in this subtree, most popular first.
+        self.top: List[Tuple[int, str]] = []
+
+
+def _rank(item: Tuple[int, str]) -> Tuple[int, str]:
+    return -item[0], item[1].casefold()
+
+
+class SkillTrie:
+    """Prefix trie over skill names for autocomplete, ranked by popularity.
+
+    Every node caches the `top_k` most popular skills below it, so a lookup is
+    a walk down the prefix plus a slice; no subtree is scanned at query time.
+    Updates recompute the cached lists only along the updated skill's path.
+    """
+
+    def __init__(self, top_k: int = 10):
+        self.top_k = top_k
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_counts(cls, counts: Dict[str, int], top_k: int = 10) -> "SkillTrie":
+        """Bulk-build from {skill: popularity}, computing cached lists in one pass"""
+        trie = cls(top_k=top_k)
+        for skill, popularity in counts.items():
+            node = trie._walk(skill_key(skill), create=True)
+            if node.skill is None:
+                trie._size += 1
+            node.skill = skill
+            node.popularity = popularity
+
+        stack = [(trie._root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                trie._refresh_top(node)
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+        return trie
+
+    def _walk(self, key: str, create: bool = False) -> Optional[_Node]:
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+        return node
+
+    def _refresh_top(self, node: _Node) -> None:
+        candidates = []
+        if node.skill is not None and node.popularity > 0:
+            candidates.append((node.popularity, node.skill))
+        children = node.children
+        if len(children) == 1 and not candidates:
+            # Unbranched chains are the common case; share the child's list.
+            node.top = next(iter(children.values())).top
+            return
+        for child in children.values():
+            candidates.extend(child.top)
+        node.top = heapq.nsmallest(self.top_k, candidates, key=_rank)
+
+    def set_popularity(self, skill: str, popularity: int) -> None:
+        key = skill_key(skill)
+        path = [self._root]
+        for char in key:
+            path.append(path[-1].children.setdefault(char, _Node()))
+
+        node = path[-1]
+        if node.skill is None:
+            self._size += 1
+        node.skill = skill
+        node.popularity = popularity
+
+        for node in reversed(path):
+            self._refresh_top(node)
+
+    def add(self, skills: Iterable[str], delta: int = 1) -> None:
+        """Adjust the popularity of each skill, e.g. when a user lists it"""
+        for skill in skills:
+            node = self._walk(skill_key(skill))
+            current = node.popularity if node is not None and node.skill is not None else 0
+            self.set_popularity(skill, max(0, current + delta))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Most popular skills starting with `prefix` as (skill, popularity)"""
+        node = self._walk(skill_key(prefix))
+        if node is None:
+            return []
+        return [(skill, popularity) for popularity, skill in node.top[:limit]]
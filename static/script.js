@@ -112,5 +112,74 @@ function findMatches() {
         });
 }
 
+function findTeachers() {
+    const skill = document.getElementById('searchSkill').value.trim();
+    if (!skill) {
+        alert('Please enter a skill');
+        return;
+    }
+
+    fetch('/api/skills/' + encodeURIComponent(skill) + '/teachers?limit=20')
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                document.getElementById('teachersList').innerHTML = '<p class="error">' + data.error + '</p>';
+                return;
+            }
+
+            let html = '';
+            if (data.users.length === 0) {
+                html = '<p>Nobody offers ' + data.skill + ' yet</p>';
+            } else {
+                html = '<p>' + data.total + ' user(s) can teach ' + data.skill + '</p>';
+                for (let i = 0; i < data.users.length; i++) {
+                    const user = data.users[i];
+                    html += '<div class="user-card">';
+                    html += '<strong>ID: ' + user.user_id + ' - ' + user.name + '</strong> (' + user.email + ')';
+                    html += '</div>';
+                }
+            }
+            document.getElementById('teachersList').innerHTML = html;
+        })
+        .catch(error => {
+            document.getElementById('teachersList').innerHTML = '<p class="error">Error searching skills</p>';
+        });
+}
+
+function attachSkillSuggestions(inputId, listId) {
+    const input = document.getElementById(inputId);
+    const list = document.getElementById(listId);
+
+    input.addEventListener('input', function() {
+        const parts = input.value.split(',');
+        const prefix = parts[parts.length - 1].trim();
+        if (!prefix) {
+            list.innerHTML = '';
+            return;
+        }
+
+        fetch('/api/skills/suggest?limit=5&q=' + encodeURIComponent(prefix))
+            .then(response => response.json())
+            .then(data => {
+                list.innerHTML = '';
+                for (let i = 0; i < data.suggestions.length; i++) {
+                    const skill = data.suggestions[i].skill;
+                    const item = document.createElement('span');
+                    item.className = 'suggestion';
+                    item.textContent = skill;
+                    item.addEventListener('click', function() {
+                        parts[parts.length - 1] = (parts.length > 1 ? ' ' : '') + skill;
+                        input.value = parts.join(',');
+                        list.innerHTML = '';
+                        input.focus();
+                    });
+                    list.appendChild(item);
+                }
+            });
+    });
+}
+
+attachSkillSuggestions('skillsOffered', 'skillsOfferedSuggestions');
+attachSkillSuggestions('skillsNeeded', 'skillsNeededSuggestions');
 loadUsers();
 
@@ -0,0 +1,17 @@
+import pytest
+from src.api import create_app
+from src.utils.matchmaker import Matchmaker
+
+
+@pytest.fixture
+def api(temp_db):
+    """Resources of a fresh app wired to a temporary database"""
+    app = create_app({"DATABASE_PATH": temp_db.db_path, "TESTING": True})
+    resources = app.extensions["peer_exchange"]
+    resources.attach(temp_db, Matchmaker(temp_db))
+    return resources
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
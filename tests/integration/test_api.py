@@ -0,0 +1,729 @@
+import gzip
+import io
+import json
+import threading
+import time
+import pytest
+from src.api import create_app
+from src.database.db_handler import DatabaseHandler
+from src.database.tracing import QueryTracer
+from src.models.user import User
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class TestSkillSearchEndpoints:
+
+    @pytest.fixture
+    def board(self, temp_db):
+        ids = []
+        for i in range(5):
+            ids.append(temp_db.add_user(User(
+                name=f"Teacher {i}", email=f"teacher{i}@example.com",
+                skills_offered=["Python"], skills_needed=["Docker"])))
+        ids.append(temp_db.add_user(User(
+            name="Learner", email="learner@example.com",
+            skills_offered=["Docker"], skills_needed=["Python"])))
+        return ids
+
+    def test_teachers_are_paginated(self, client, board):
+        response = client.get("/api/skills/python/teachers?limit=2&offset=1")
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["skill"] == "Python"
+        assert data["total"] == 5
+        assert [u["user_id"] for u in data["users"]] == board[1:3]
+
+    def test_learners(self, client, board):
+        data = client.get("/api/skills/Python/learners").get_json()
+        assert data["total"] == 1
+        assert data["users"][0]["name"] == "Learner"
+
+    def test_unknown_skill(self, client, board):
+        data = client.get("/api/skills/Basket%20Weaving/teachers").get_json()
+        assert data["total"] == 0
+        assert data["users"] == []
+
+    def test_invalid_pagination(self, client, board):
+        assert client.get("/api/skills/Python/teachers?limit=0").status_code == 400
+        assert client.get("/api/skills/Python/teachers?offset=x").status_code == 400
+
+
+class TestPairingEndpoint:
+
+    def test_pairs_board_with_timings(self, client, temp_db, perfect_match_users):
+        for user in perfect_match_users:
+            temp_db.add_user(user)
+
+        data = client.post("/api/pairings", json={"mode": "greedy"}).get_json()
+
+        assert data["mode"] == "greedy"
+        assert len(data["pairs"]) == 1
+        assert "solve" in data["timings_ms"]
+
+    def test_pairs_selected_users_exactly(self, client, temp_db, perfect_match_users, no_match_users):
+        ids = [temp_db.add_user(user) for user in perfect_match_users + no_match_users]
+
+        data = client.post("/api/pairings", json={"mode": "exact", "user_ids": [ids[0], ids[1], ids[3]]}).get_json()
+
+        assert data["mode"] == "exact"
+        assert [(pair["user1_id"], pair["user2_id"]) for pair in data["pairs"]] == [(ids[0], ids[1])]
+        assert data["unpaired"] == [ids[3]]
+
+    def test_rejects_unknown_mode(self, client):
+        assert client.post("/api/pairings", json={"mode": "best"}).status_code == 400
+        assert client.post("/api/pairings", json={"user_ids": "1,2"}).status_code == 400
+
+    def test_large_cohorts_become_jobs(self, api, client, temp_db, perfect_match_users, monkeypatch):
+        monkeypatch.setitem(api.app.config, "PAIRING_SYNC_MAX_USERS", 1)
+        ids = [temp_db.add_user(user) for user in perfect_match_users]
+
+        response = client.post("/api/pairings", json={"mode": "greedy"})
+        assert response.status_code == 202
+        assert response.get_json()["kind"] == "pairings"
+        location = response.headers["Location"]
+        wait_until(lambda: client.get(location).get_json()["status"] == "succeeded")
+        assert len(client.get(location).get_json()["result"]["pairs"]) == 1
+
+        assert client.post("/api/pairings", json={"user_ids": ids[:1]}).status_code == 200
+        api.jobs.shutdown()
+
+
+class TestSkillSuggestEndpoint:
+
+    def test_suggestions_ranked_and_refreshed(self, client, temp_db):
+        temp_db.add_user(User(name="A", email="a@example.com", skills_offered=["Python", "PyTorch"]))
+        temp_db.add_user(User(name="B", email="b@example.com", skills_needed=["Python"]))
+
+        data = client.get("/api/skills/suggest?q=py").get_json()
+        assert [s["skill"] for s in data["suggestions"]] == ["Python", "PyTorch"]
+
+        client.post("/api/users", json={"name": "C", "email": "c@example.com",
+                                        "skills_offered": ["PySpark", "PyTorch"]})
+        data = client.get("/api/skills/suggest?q=py").get_json()
+        assert data["suggestions"] == [
+            {"skill": "Python", "popularity": 2},
+            {"skill": "PyTorch", "popularity": 2},
+            {"skill": "PySpark", "popularity": 1},
+        ]
+
+    def test_follows_change_log(self, client, temp_db):
+        user_id = temp_db.add_user(User(name="A", email="a@example.com", skills_offered=["Python", "PyTorch"]))
+        client.get("/api/skills/suggest?q=py")
+        
+        # Updates, deletes and writes through another handler all reach the trie.
+        other = DatabaseHandler(temp_db.db_path)
+        other.add_user(User(name="B", email="b@example.com", skills_needed=["Python"]))
+        temp_db.update_user(User(user_id=user_id, name="A", email="a@example.com", skills_offered=["Python"]))
+        data = client.get("/api/skills/suggest?q=py").get_json()
+        assert data["suggestions"] == [{"skill": "Python", "popularity": 2}]
+        
+        temp_db.compact_changes(keep_last=0)
+        other.delete_user(user_id)
+        temp_db.compact_changes(keep_last=0)
+        data = client.get("/api/skills/suggest?q=py").get_json()
+        assert data["suggestions"] == [{"skill": "Python", "popularity": 1}]
+    
+    def test_invalid_limit(self, client):
+        assert client.get("/api/skills/suggest?q=p&limit=many").status_code == 400
+
+
+class TestConditionalGet:
+
+    def test_users_etag_round_trip(self, client, temp_db, sample_user):
+        temp_db.add_user(sample_user)
+
+        first = client.get("/api/users")
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == "no-cache"
+        etag = first.headers["ETag"]
+
+        cached = client.get("/api/users", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+        assert cached.data == b""
+
+    def test_write_invalidates_etag(self, client, temp_db, sample_users):
+        temp_db.add_user(sample_users[0])
+        etag = client.get("/api/users").headers["ETag"]
+
+        temp_db.add_user(sample_users[1])
+
+        response = client.get("/api/users", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.get_json()) == 2
+
+    def test_matches_304_skips_matchmaking(self, api, client, temp_db, perfect_match_users, monkeypatch):
+        user_id = temp_db.add_user(perfect_match_users[0])
+        temp_db.add_user(perfect_match_users[1])
+        etag = client.get(f"/api/users/{user_id}/matches").headers["ETag"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("matchmaking should not run for a cached response")
+        monkeypatch.setattr(api.matchmaker, "find_matches", fail)
+        monkeypatch.setattr(api.db, "get_user", fail)
+
+        response = client.get(f"/api/users/{user_id}/matches", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+    def test_cache_control_is_configurable(self, api, client, monkeypatch):
+        monkeypatch.setitem(api.app.config["CACHE_CONTROL"], "get_users", "max-age=5")
+        assert client.get("/api/users").headers["Cache-Control"] == "max-age=5"
+
+
+class TestCompression:
+
+    def add_users(self, temp_db, count):
+        for i in range(count):
+            temp_db.add_user(User(name=f"User {i}", email=f"user{i}@example.com",
+                                  skills_offered=["Python", "Docker"], skills_needed=["Go"]))
+
+    def test_large_json_is_gzipped(self, client, temp_db):
+        self.add_users(temp_db, 30)
+
+        response = client.get("/api/users", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert response.headers["ETag"].endswith('-gzip"')
+        assert len(gzip.decompress(response.data)) > len(response.data)
+
+        cached = client.get("/api/users", headers={"Accept-Encoding": "gzip",
+                                                   "If-None-Match": response.headers["ETag"]})
+        assert cached.status_code == 304
+
+    def test_small_or_unaccepted_responses_are_identity(self, client, temp_db):
+        self.add_users(temp_db, 30)
+        assert "Content-Encoding" not in client.get("/api/users").headers
+
+        response = client.get("/api/skills/suggest?q=py", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+
+    def test_static_assets_are_cached_and_precompressed(self, api, client, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("static assets should be served from memory")
+        api.static_assets  # loaded on first use
+        monkeypatch.setattr("builtins.open", fail)
+
+        plain = client.get("/")
+        assert plain.status_code == 200
+        assert b"Peer Skills Exchange" in plain.data
+        assert plain.headers["Content-Type"] == "text/html; charset=utf-8"
+
+        compressed = client.get("/static/script.js", headers={"Accept-Encoding": "gzip, br;q=0"})
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert compressed.headers["Content-Type"].count("charset") == 1
+        assert client.get("/static/style.css").headers["Content-Type"] == "text/css; charset=utf-8"
+        assert gzip.decompress(compressed.data) == api.static_assets.get("script.js").body
+
+        cached = client.get("/static/script.js", headers={"If-None-Match": compressed.headers["ETag"]})
+        assert cached.status_code == 304
+        assert client.get("/static/missing.css").status_code == 404
+
+
+class TestBulkCreate:
+
+    def test_json_array_with_row_errors(self, client, temp_db):
+        response = client.post("/api/users/bulk", json=[
+            {"name": "Ann", "email": "ann@example.com", "skills_offered": ["python"]},
+            {"name": "", "email": "nameless@example.com"},
+            {"name": "Ann Again", "email": "ann@example.com"},
+            "not a user",
+            {"name": "Ben", "email": "ben@example.com"},
+        ])
+
+        assert response.status_code == 201
+        data = response.get_json()
+        assert data["created"] == 2
+        assert data["failed"] == 3
+        results = data["results"]
+        assert temp_db.get_user(results[0]["user_id"]).skills_offered == ["Python"]
+        assert results[1]["error"] == "Name is required"
+        assert "UNIQUE" in results[2]["error"]
+        assert results[3]["error"] == "User must be a JSON object"
+        assert temp_db.get_user(results[4]["user_id"]).name == "Ben"
+
+    def test_ndjson_stream(self, client, temp_db):
+        body = "\n".join([
+            json.dumps({"name": "Ann", "email": "ann@example.com"}),
+            "{broken",
+            "",
+            json.dumps({"name": "Ben", "email": "ben@example.com"}),
+        ])
+
+        response = client.post("/api/users/bulk", data=body, content_type="application/x-ndjson")
+
+        data = response.get_json()
+        assert data["created"] == 2
+        assert data["results"][1] == {"index": 1, "error": "Invalid JSON"}
+        assert len(temp_db.get_all_users()) == 2
+
+    def test_rows_with_wrong_types_are_row_errors(self, client, temp_db):
+        response = client.post("/api/users/bulk", json=[
+            {"name": 123, "email": "number@example.com"},
+            {"name": "Ann", "email": ["ann@example.com"]},
+            {"name": "Ben", "email": "ben@example.com", "skills_offered": [1]},
+            {"name": "Cy", "email": "cy@example.com", "skills_needed": "Python"},
+            {"name": "Dee", "email": "dee@example.com", "skills_offered": None},
+        ])
+
+        assert response.status_code == 201
+        results = response.get_json()["results"]
+        assert [result.get("error") for result in results] == [
+            "Name must be a string",
+            "Email must be a string",
+            "skills_offered must be a list of strings",
+            "skills_needed must be a list of strings",
+            None,
+        ]
+        assert [user.name for user in temp_db.get_all_users()] == ["Dee"]
+
+    def test_oversized_ndjson_is_not_buffered(self, api, client, monkeypatch):
+        monkeypatch.setitem(api.app.config, "BULK_MAX_BATCH", 2)
+        line = json.dumps({"name": "Ann", "email": "ann@example.com"}).encode() + b"\n"
+        body = io.BytesIO(line * 20000)
+
+        response = client.post("/api/users/bulk", input_stream=body, content_length=len(line) * 20000,
+                               content_type="application/x-ndjson")
+
+        assert response.status_code == 413
+        assert body.tell() < len(line) * 20000 / 2
+
+    def test_batch_size_limit(self, api, client, monkeypatch):
+        monkeypatch.setitem(api.app.config, "BULK_MAX_BATCH", 2)
+        rows = [{"name": f"U{i}", "email": f"u{i}@example.com"} for i in range(3)]
+
+        assert client.post("/api/users/bulk", json=rows).status_code == 413
+
+    def test_rejects_non_array(self, client):
+        assert client.post("/api/users/bulk", json={"name": "Ann"}).status_code == 400
+
+
+class TestBatchLookup:
+
+    def test_get_by_ids_reports_missing(self, client, temp_db, sample_users):
+        ids = [temp_db.add_user(user) for user in sample_users]
+
+        data = client.get(f"/api/users?ids={ids[1]},404,{ids[0]}").get_json()
+
+        assert [u["user_id"] for u in data["users"]] == [ids[1], ids[0]]
+        assert data["missing"] == [404]
+
+    def test_post_batch(self, client, temp_db, sample_user):
+        user_id = temp_db.add_user(sample_user)
+
+        data = client.post("/api/users/batch", json={"ids": [user_id, 7]}).get_json()
+
+        assert data["users"][0]["email"] == sample_user.email
+        assert data["missing"] == [7]
+
+    def test_invalid_ids(self, api, client, monkeypatch):
+        assert client.get("/api/users?ids=1,two").status_code == 400
+        assert client.post("/api/users/batch", json={"ids": "1,2"}).status_code == 400
+
+        monkeypatch.setitem(api.app.config, "BATCH_MAX_IDS", 2)
+        assert client.get("/api/users?ids=1,2,3").status_code == 413
+
+
+class TestMatchQueryParameters:
+    
+    @pytest.fixture
+    def board(self, temp_db):
+        ids = [temp_db.add_user(User(name="Target", email="t@example.com", bio="Target bio",
+                                     skills_offered=["Go"], skills_needed=["Python", "SQL"]))]
+        ids.append(temp_db.add_user(User(name="Mutual", email="m@example.com", bio="Mutual bio",
+                                         skills_offered=["Python"], skills_needed=["Go"])))
+        ids.append(temp_db.add_user(User(name="Teacher", email="te@example.com",
+                                         skills_offered=["Python", "SQL"])))
+        return ids
+    
+    def test_limit_and_projection(self, client, board):
+        response = client.get(f"/api/users/{board[0]}/matches?limit=1&fields=user_id,name")
+        assert response.status_code == 200
+        matches = response.get_json()
+        assert len(matches) == 1
+        assert set(matches[0]['user']) == {'user_id', 'name'}
+    
+    def test_mutual_only_and_min_score(self, client, board):
+        matches = client.get(f"/api/users/{board[0]}/matches?mutual_only=true").get_json()
+        assert [m['user']['user_id'] for m in matches] == [board[1]]
+        assert client.get(f"/api/users/{board[0]}/matches?min_score=1").get_json() == \
+            [m for m in client.get(f"/api/users/{board[0]}/matches").get_json() if m['score'] >= 1]
+    
+    def test_parameters_change_etag(self, client, board):
+        full = client.get(f"/api/users/{board[0]}/matches")
+        limited = client.get(f"/api/users/{board[0]}/matches?limit=1",
+                             headers={'If-None-Match': full.headers['ETag']})
+        assert limited.status_code == 200
+    
+    @pytest.mark.parametrize("query", ["limit=0", "limit=x", "min_score=2", "fields=password"])
+    def test_invalid_parameters(self, client, board, query):
+        assert client.get(f"/api/users/{board[0]}/matches?{query}").status_code == 400
+
+
+class TestMatchCoalescing:
+    
+    @pytest.fixture
+    def user_id(self, temp_db, perfect_match_users):
+        return [temp_db.add_user(user) for user in perfect_match_users][0]
+    
+    def _block_find_matches(self, api, monkeypatch):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+        find_matches = api.matchmaker.find_matches
+        
+        def slow_find_matches(*args, **kwargs):
+            calls.append(args)
+            started.set()
+            release.wait(5)
+            return find_matches(*args, **kwargs)
+        
+        monkeypatch.setattr(api.matchmaker, "find_matches", slow_find_matches)
+        return started, release, calls
+    
+    def test_concurrent_requests_share_one_computation(self, api, client, user_id, monkeypatch):
+        started, release, calls = self._block_find_matches(api, monkeypatch)
+        responses = []
+        threads = [threading.Thread(target=lambda: responses.append(
+            api.app.test_client().get(f"/api/users/{user_id}/matches"))) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        wait_until(lambda: api.match_flights.coalesced == 3)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        assert len(calls) == 1
+        assert [r.status_code for r in responses] == [200] * 4
+        assert len({r.get_data() for r in responses}) == 1
+        assert 'match_computations_total{result="coalesced"} 3' in client.get("/metrics").get_data(as_text=True)
+    
+    def test_different_parameters_are_not_coalesced(self, api, client, user_id):
+        client.get(f"/api/users/{user_id}/matches")
+        client.get(f"/api/users/{user_id}/matches?limit=1")
+        assert (api.match_flights.leaders, api.match_flights.coalesced) == (2, 0)
+    
+    def test_waiter_timeout_returns_503(self, api, user_id, monkeypatch):
+        api.app.config['MATCH_COALESCE_TIMEOUT'] = 0.05
+        started, release, _ = self._block_find_matches(api, monkeypatch)
+        url = f"/api/users/{user_id}/matches"
+        leader = threading.Thread(target=api.app.test_client().get, args=(url,))
+        leader.start()
+        started.wait(5)
+        try:
+            response = api.app.test_client().get(url)
+        finally:
+            release.set()
+            leader.join(5)
+        
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    
+    def test_leader_error_reaches_waiters(self, api, user_id, monkeypatch):
+        api.app.config['PROPAGATE_EXCEPTIONS'] = False
+        started, release = threading.Event(), threading.Event()
+        
+        def failing_find_matches(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            raise RuntimeError("matchmaker failed")
+        
+        monkeypatch.setattr(api.matchmaker, "find_matches", failing_find_matches)
+        url = f"/api/users/{user_id}/matches"
+        responses = []
+        leader = threading.Thread(target=lambda: responses.append(api.app.test_client().get(url)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: responses.append(api.app.test_client().get(url)))
+        follower.start()
+        wait_until(lambda: api.match_flights.coalesced == 1)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        
+        assert [r.status_code for r in responses] == [500, 500]
+
+
+class TestAdmissionControl:
+    
+    @pytest.fixture
+    def limited_app(self, temp_db, perfect_match_users):
+        def build(limits):
+            app = create_app({"DATABASE_PATH": temp_db.db_path, "TESTING": True,
+                              "ADMISSION_LIMITS": limits})
+            for user in perfect_match_users:
+                temp_db.add_user(user)
+            return app
+        return build
+    
+    def test_rate_limit_returns_429_per_client(self, limited_app):
+        app = limited_app({'get_users': {'rate': 1, 'burst': 2}})
+        client = app.test_client()
+        statuses = [client.get("/api/users").status_code for _ in range(3)]
+        other = client.get("/api/users", environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        
+        assert statuses == [200, 200, 429]
+        assert other.status_code == 200
+        rejected = client.get("/api/users")
+        assert int(rejected.headers['Retry-After']) >= 1
+        metrics = client.get("/metrics").get_data(as_text=True)
+        assert 'http_requests_rejected_total{endpoint="get_users",reason="rate_limited"} 2' in metrics
+        assert 'http_requests_total{endpoint="get_users",method="GET",status="429"} 2' in metrics
+    
+    def test_full_queue_sheds_matches_but_not_writes(self, limited_app, monkeypatch):
+        app = limited_app({'get_matches': {'concurrency': 1, 'queue': 0}})
+        resources = app.extensions['peer_exchange']
+        started, release = threading.Event(), threading.Event()
+        find_matches = resources.matchmaker.find_matches
+        
+        def slow_find_matches(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return find_matches(*args, **kwargs)
+        
+        monkeypatch.setattr(resources.matchmaker, "find_matches", slow_find_matches)
+        first = threading.Thread(target=app.test_client().get, args=("/api/users/1/matches",))
+        first.start()
+        started.wait(5)
+        try:
+            client = app.test_client()
+            shed = client.get("/api/users/1/matches?limit=1")
+            created = client.post("/api/users", json={"name": "New", "email": "new@example.com"})
+        finally:
+            release.set()
+            first.join(5)
+        
+        assert shed.status_code == 503
+        assert shed.headers['Retry-After'] == '5'
+        assert created.status_code == 201
+        assert client.get("/api/users/1/matches").status_code == 200
+        assert resources.admission.counts('active') == {('get_matches',): 0}
+
+
+class TestMatchStream:
+    
+    def events(self, chunk):
+        return [line.split(": ", 1)[1] for line in chunk.decode().splitlines() if line.startswith("event: ")]
+    
+    def test_streams_snapshot_then_changes(self, api, client, temp_db, perfect_match_users):
+        api.app.config['MATCH_STREAM_HEARTBEAT'] = 0.05
+        alice = temp_db.add_user(perfect_match_users[0])
+        response = client.get(f"/api/users/{alice}/matches/stream", buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        chunks = iter(response.response)
+        
+        first = next(chunks)
+        assert self.events(first) == ["matches"]
+        assert json.loads(first.decode().split("data: ")[1]) == []
+        
+        bob = temp_db.add_user(perfect_match_users[1])
+        chunk = next(chunks)
+        assert self.events(chunk) == ["match"]
+        assert f'"user_id":{bob}' in chunk.decode()
+        
+        temp_db.add_user(User(name="Chef", email="chef@example.com", skills_offered=["Cooking"]))
+        assert next(chunks) == b": keepalive\n\n"
+        
+        temp_db.delete_user(bob)
+        assert self.events(next(chunks)) == ["unmatch"]
+        assert temp_db.change_feed.subscriber_count() == 1
+        response.close()
+        assert temp_db.change_feed.subscriber_count() == 0
+    
+    def test_unknown_user_and_bad_parameters(self, client):
+        assert client.get("/api/users/999/matches/stream").status_code == 404
+        assert client.get("/api/users/1/matches/stream?limit=0").status_code == 400
+
+
+class TestJobsEndpoint:
+    
+    def wait_for_job(self, client, location):
+        wait_until(lambda: client.get(location).get_json()["status"] not in ("queued", "running"))
+        return client.get(location).get_json()
+    
+    def test_recompute_matches_job(self, api, client, temp_db, perfect_match_users):
+        ids = [temp_db.add_user(user) for user in perfect_match_users]
+        response = client.post("/api/jobs/recompute_matches", json={"user_ids": ids})
+        
+        assert response.status_code == 202
+        assert response.headers["Location"] == f"/api/jobs/{response.get_json()['job_id']}"
+        job = self.wait_for_job(client, response.headers["Location"])
+        assert job["status"] == "succeeded"
+        assert job["progress"] == 1.0
+        assert job["result"] == {"users": 2, "matches": 2}
+        assert [j["job_id"] for j in client.get("/api/jobs?status=succeeded").get_json()] == [job["job_id"]]
+        
+        cancel = client.post(f"/api/jobs/{job['job_id']}/cancel")
+        assert cancel.status_code == 409
+        api.jobs.shutdown()
+    
+    def test_pairings_job_matches_synchronous_endpoint(self, api, client, temp_db, perfect_match_users):
+        for user in perfect_match_users:
+            temp_db.add_user(user)
+        location = client.post("/api/jobs/pairings", json={"mode": "greedy"}).headers["Location"]
+        
+        job = self.wait_for_job(client, location)
+        assert job["status"] == "succeeded"
+        assert job["result"]["pairs"] == client.post("/api/pairings", json={"mode": "greedy"}).get_json()["pairs"]
+        api.jobs.shutdown()
+    
+    def test_rejects_bad_requests(self, client):
+        assert client.post("/api/jobs/export_everything").status_code == 404
+        assert client.post("/api/jobs/pairings", json={"mode": "best"}).status_code == 400
+        assert client.post("/api/jobs/recompute_matches", json={"user_ids": ["x"]}).status_code == 400
+        assert client.get("/api/jobs?status=done").status_code == 400
+        assert client.get("/api/jobs/missing").status_code == 404
+        assert client.post("/api/jobs/missing/cancel").status_code == 404
+
+
+class TestMetricsEndpoint:
+    
+    def test_exposes_request_db_and_stage_metrics(self, api, client, temp_db, perfect_match_users):
+        stages = api.metrics.get('matchmaker_stage_duration_seconds')
+        requests = api.metrics.get('http_requests_total')
+        
+        for user in perfect_match_users:
+            user.user_id = temp_db.add_user(user)
+        user_id = perfect_match_users[0].user_id
+        etag = client.get(f"/api/users/{user_id}/matches").headers['ETag']
+        client.get(f"/api/users/{user_id}/matches", headers={'If-None-Match': etag})
+        
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        text = response.get_data(as_text=True)
+        assert '# TYPE http_request_duration_seconds histogram' in text
+        assert 'db_query_duration_seconds_count{method="get_all_users"}' in text
+        for stage in ('load', 'candidates', 'score', 'sort', 'persist'):
+            assert f'matchmaker_stage_duration_seconds_count{{stage="{stage}"}}' in text
+        assert 'cache_hit_ratio{cache="skill_canonicalizer"}' in text
+        assert 'cache_hits_total{cache="etag"}' in text
+        assert 'db_connections_opened_total ' in text
+        assert stages.count(stage='persist') == 1
+        assert requests.value(endpoint='get_matches', method='GET', status=304) == 1
+    
+    def test_unmatched_routes_share_a_label(self, client):
+        client.get("/no/such/route")
+        assert 'endpoint="unmatched"' in client.get("/metrics").get_data(as_text=True)
+
+
+class TestServerTiming:
+    
+    def test_header_reports_db_time_when_tracing(self, api, client, temp_db, monkeypatch, sample_user):
+        monkeypatch.setattr(temp_db, "tracer", QueryTracer())
+        monkeypatch.setattr(api, "tracer", temp_db.tracer)
+        temp_db.add_user(sample_user)
+        
+        response = client.get("/api/users")
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert 'desc="' in response.headers["Server-Timing"]
+    
+    def test_no_header_without_tracing(self, client):
+        assert "Server-Timing" not in client.get("/api/users").headers
+
+
+class TestProfilerEndpoint:
+    
+    @pytest.fixture
+    def admin(self, api, monkeypatch):
+        monkeypatch.setitem(api.app.config, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(api, "profile_session", None)
+        return {"X-Admin-Token": "secret"}
+    
+    def test_disabled_without_token(self, api, client, monkeypatch):
+        monkeypatch.setitem(api.app.config, "ADMIN_TOKEN", None)
+        assert client.post("/admin/profile", json={"requests": 1}).status_code == 404
+    
+    def test_rejects_wrong_token(self, client, admin):
+        response = client.post("/admin/profile", json={"requests": 1},
+                               headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 403
+    
+    def test_profiles_next_requests(self, client, admin):
+        assert client.get("/admin/profile", headers=admin).status_code == 404
+        assert client.post("/admin/profile", json={"requests": 2}, headers=admin).status_code == 202
+        assert client.post("/admin/profile", json={"requests": 2}, headers=admin).status_code == 409
+        
+        client.get("/api/users")
+        assert client.get("/admin/profile", headers=admin).status_code == 202
+        client.get("/api/users")
+        
+        response = client.get("/admin/profile", headers=admin)
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        assert "X-Profile-Samples" in response.headers
+    
+    @pytest.mark.parametrize("body", [{}, {"requests": 1, "seconds": 1}, {"seconds": 0},
+                                      {"requests": "many"}, {"requests": 1, "interval_ms": 0}])
+    def test_invalid_requests(self, client, admin, body):
+        assert client.post("/admin/profile", json=body, headers=admin).status_code == 400
+
+
+class TestAppFactory:
+    
+    def test_no_database_io_until_first_request(self, tmp_path):
+        path = tmp_path / "lazy.db"
+        app = create_app({"DATABASE_PATH": str(path)})
+        assert not path.exists()
+        
+        assert app.test_client().get("/api/users").status_code == 200
+        assert path.exists()
+    
+    def test_config_layers(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "env.db"))
+        monkeypatch.setenv("MATCH_WEIGHTING", "idf")
+        monkeypatch.setenv("METRICS_ENABLED", "0")
+        app = create_app({"BULK_MAX_BATCH": 5})
+        
+        assert app.config["MATCH_WEIGHTING"] == "idf"
+        assert app.config["BULK_MAX_BATCH"] == 5
+        assert app.extensions["peer_exchange"].metrics is None
+        assert app.test_client().get("/metrics").status_code == 404
+        assert app.config["DATABASE_PATH"] == str(tmp_path / "env.db")
+        assert not (tmp_path / "env.db").exists()
+    
+    def test_apps_do_not_share_state(self, tmp_path):
+        first = create_app({"DATABASE_PATH": str(tmp_path / "a.db"), "CACHE_CONTROL": {}})
+        second = create_app({"DATABASE_PATH": str(tmp_path / "b.db")})
+        
+        assert first.extensions["peer_exchange"] is not second.extensions["peer_exchange"]
+        assert "get_users" in second.config["CACHE_CONTROL"]
+    
+    def test_write_queue(self, tmp_path):
+        app = create_app({"DATABASE_PATH": str(tmp_path / "queued.db"), "DB_WRITE_QUEUE": True})
+        resources = app.extensions["peer_exchange"]
+        client = app.test_client()
+        
+        created = client.post("/api/users", json={"name": "Queued", "email": "queued@example.com"})
+        assert created.status_code == 201
+        assert client.get("/api/users").get_json()[0]["name"] == "Queued"
+        assert resources.db.write_queue.writes_committed == 1
+        assert "db_queued_writes_total 1" in client.get("/metrics").get_data(as_text=True)
+        resources.db.close()
+    
+    def test_resources_rebuilt_in_forked_worker(self, api, temp_db):
+        assert api.db is temp_db
+        api._pid = -1  # as seen from a child process after fork
+        
+        assert api.db is not temp_db
+        assert api.db.db_path == temp_db.db_path
+    
+    def test_warm_up(self, tmp_path):
+        app = create_app({"DATABASE_PATH": str(tmp_path / "warm.db"), "WARM_UP": True,
+                          "LSH_NUM_PERM": 32, "LSH_BANDS": 16})
+        resources = app.extensions["peer_exchange"]
+        
+        assert resources.skill_trie is not None
+        assert resources._static_assets is not None
+        lsh_index = resources._matchmaker.lsh_index
+        assert (lsh_index.num_perm, lsh_index.bands) == (32, 16)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import threading
+import pytest
+from src.asgi import AsgiApp, build_environ
+
+
+async def call(asgi, method, path, body=b"", headers=()):
+    """Run one request through the ASGI app; returns (status, headers, body)"""
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode(),
+             "headers": [(name.encode(), value.encode()) for name, value in headers],
+             "server": ("testserver", 80), "client": ("127.0.0.1", 1234)}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi(scope, receive, send)
+    start = sent[0]
+    assert sent[-1]["more_body"] is False
+    return (start["status"], {name.decode(): value.decode() for name, value in start["headers"]},
+            b"".join(message.get("body", b"") for message in sent[1:]))
+
+
+@pytest.fixture
+def asgi(api):
+    app = AsgiApp(api.app)
+    yield app
+    app.close()
+
+
+@pytest.fixture
+def users(temp_db, sample_users):
+    return [temp_db.add_user(user) for user in sample_users]
+
+
+class TestAsgiApp:
+
+    def test_get_users(self, asgi, users):
+        status, headers, body = asyncio.run(call(asgi, "GET", "/api/users"))
+
+        assert status == 200
+        assert headers["content-type"] == "application/json"
+        assert len(json.loads(body)) == len(users)
+
+    def test_post_json_body(self, asgi):
+        payload = json.dumps({"name": "Ada", "email": "ada@example.com",
+                              "skills_offered": ["Python"], "skills_needed": ["Go"]}).encode()
+        status, _, body = asyncio.run(call(asgi, "POST", "/api/users", payload,
+                                           headers=[("content-type", "application/json")]))
+
+        assert status == 201
+        assert json.loads(body)["email"] == "ada@example.com"
+
+    def test_query_string_and_not_found(self, asgi, users):
+        status, _, body = asyncio.run(call(asgi, "GET", f"/api/users/{users[0]}/matches?limit=1"))
+        assert status == 200
+        assert len(json.loads(body)) <= 1
+
+        assert asyncio.run(call(asgi, "GET", "/nowhere"))[0] == 404
+
+    def test_endpoint_for(self, asgi):
+        assert asgi.endpoint_for("/api/users/3/matches", "GET") == "get_matches"
+        assert asgi.endpoint_for("/api/users", "POST") == "create_user"
+        assert asgi.endpoint_for("/nowhere", "GET") is None
+
+    def test_limited_route_does_not_block_cheap_ones(self, api, users, monkeypatch):
+        api.app.config["ASYNC_ROUTE_LIMITS"] = {"get_matches": 1}
+        asgi = AsgiApp(api.app)
+        release = threading.Event()
+        running = []
+        find_matches = api.matchmaker.find_matches
+
+        def slow_find_matches(*args, **kwargs):
+            running.append(threading.current_thread().name)
+            release.wait(5)
+            return find_matches(*args, **kwargs)
+
+        monkeypatch.setattr(api.matchmaker, "find_matches", slow_find_matches)
+
+        async def scenario():
+            heavy = [asyncio.create_task(call(asgi, "GET", f"/api/users/{users[0]}/matches?limit={n}"))
+                     for n in (1, 2)]
+            while not running:
+                await asyncio.sleep(0.01)
+            # The second match request waits for the limit; the user list is served meanwhile.
+            cheap = await asyncio.wait_for(call(asgi, "GET", "/api/users"), 5)
+            assert asgi.waiting == {"get_matches": 1}
+            assert len(running) == 1
+            release.set()
+            return cheap, await asyncio.gather(*heavy)
+
+        try:
+            cheap, heavy = asyncio.run(scenario())
+        finally:
+            release.set()
+            asgi.close()
+
+        assert cheap[0] == 200
+        assert [response[0] for response in heavy] == [200, 200]
+        assert len(running) == 2
+        assert all(name.startswith("asgi-limited") for name in running)
+
+    def test_lifespan(self, asgi):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(asgi({"type": "lifespan"}, receive, send))
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+    def test_waiting_metric(self, asgi, client):
+        assert "asgi_requests_waiting" in client.get("/metrics").get_data(as_text=True)
+
+
+class TestAsgiMatchStream:
+
+    def test_stream_is_served_on_the_loop(self, api, temp_db, perfect_match_users):
+        api.app.config["MATCH_STREAM_HEARTBEAT"] = 5
+        asgi = AsgiApp(api.app)
+        alice = temp_db.add_user(perfect_match_users[0])
+
+        async def scenario():
+            disconnect = asyncio.Event()
+            messages = [{"type": "http.request", "body": b"", "more_body": False}]
+            sent = []
+
+            async def receive():
+                if messages:
+                    return messages.pop(0)
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+
+            async def body_containing(text):
+                for _ in range(500):
+                    body = b"".join(m.get("body", b"") for m in sent[1:])
+                    if text in body:
+                        return body
+                    await asyncio.sleep(0.01)
+                raise AssertionError(f"{text!r} never sent")
+
+            scope = {"type": "http", "method": "GET", "path": f"/api/users/{alice}/matches/stream",
+                     "query_string": b"", "headers": []}
+            task = asyncio.create_task(asgi(scope, receive, send))
+            await body_containing(b"event: matches")
+            # The heartbeat is long, so this event can only come from the change feed.
+            await asyncio.to_thread(temp_db.add_user, perfect_match_users[1])
+            await body_containing(b"event: match\n")
+            disconnect.set()
+            await asyncio.wait_for(task, 5)
+            return sent
+
+        try:
+            sent = asyncio.run(scenario())
+        finally:
+            asgi.close()
+
+        assert sent[0]["status"] == 200
+        assert (b"content-type", b"text/event-stream; charset=utf-8") in sent[0]["headers"]
+        assert temp_db.change_feed.subscriber_count() == 0
+
+    def test_unknown_user_falls_back_to_view(self, asgi):
+        assert asyncio.run(call(asgi, "GET", "/api/users/999/matches/stream"))[0] == 404
+
+
+class TestBuildEnviron:
+
+    def test_headers_and_body(self):
+        scope = {"type": "http", "method": "POST", "path": "/café", "query_string": b"a=1",
+                 "headers": [(b"content-type", b"application/json"), (b"x-tag", b"one"),
+                             (b"x-tag", b"two")]}
+        environ = build_environ(scope, b"{}")
+
+        assert environ["PATH_INFO"] == "/café".encode().decode("latin-1")
+        assert environ["QUERY_STRING"] == "a=1"
+        assert environ["CONTENT_TYPE"] == "application/json"
+        assert environ["CONTENT_LENGTH"] == "2"
+        assert environ["HTTP_X_TAG"] == "one,two"
+        assert environ["wsgi.input"].read() == b"{}"
@@ -0,0 +1,172 @@
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.api import create_app
+from src.server import PooledWSGIServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork server needs fork()")
+
+
+class ServerProcess:
+
+    def __init__(self, db_path, *args):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "src.server", "--port", "0", "--no-access-log",
+             "--graceful-timeout", "5", *args],
+            cwd=ROOT, env=dict(os.environ, DATABASE_PATH=db_path),
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        self.lines = []
+        self.port = int(re.search(r":(\d+) ", self.wait_for("Listening on")).group(1))
+
+    def wait_for(self, text, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            line = self.proc.stdout.readline()
+            if not line:
+                break
+            self.lines.append(line)
+            if text in line:
+                return line
+        raise AssertionError(f"{text!r} not seen in output: {''.join(self.lines)}")
+
+    def get(self, path):
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.port}{path}", timeout=5) as response:
+            return response.status, response.read()
+
+    def worker_pids(self, generation):
+        pattern = re.compile(rf"Booted worker (\d+) \(generation {generation}\)")
+        return {int(match.group(1)) for match in map(pattern.match, self.lines) if match}
+
+
+@pytest.fixture
+def server(temp_db):
+    server = ServerProcess(temp_db.db_path, "--workers", "2", "--threads", "2")
+    server.wait_for("Booted worker")
+    server.wait_for("Booted worker")
+    yield server
+    if server.proc.poll() is None:
+        server.proc.terminate()
+        try:
+            server.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.proc.kill()
+            server.proc.wait()
+    server.proc.stdout.close()
+
+
+class TestPreforkServer:
+
+    def test_serves_requests(self, server):
+        status, body = server.get("/api/users")
+        assert status == 200
+        assert body == b"[]\n"
+
+    def test_reload_replaces_workers(self, server):
+        old = server.worker_pids(0)
+        server.proc.send_signal(signal.SIGHUP)
+        server.wait_for("(generation 1)")
+        server.wait_for("(generation 1)")
+
+        assert len(server.worker_pids(1)) == 2
+        assert server.worker_pids(1).isdisjoint(old)
+        assert server.get("/api/users")[0] == 200
+
+    def test_crashed_worker_is_replaced(self, server):
+        victim = min(server.worker_pids(0))
+        os.kill(victim, signal.SIGKILL)
+        server.wait_for(f"Worker {victim} exited")
+        server.wait_for("Booted worker")
+
+        assert server.get("/api/users")[0] == 200
+
+    def test_graceful_shutdown(self, server):
+        server.get("/api/users")
+        server.proc.send_signal(signal.SIGTERM)
+        server.wait_for("Stopped")
+
+        assert server.proc.wait(timeout=10) == 0
+
+    def test_workers_exit_when_master_dies(self, server):
+        workers = server.worker_pids(0)
+        server.proc.kill()
+        server.proc.wait()
+
+        deadline = time.monotonic() + 5
+        while workers and time.monotonic() < deadline:
+            workers = {pid for pid in workers if _alive(pid)}
+            time.sleep(0.1)
+        assert not workers
+
+
+class TestPooledWSGIServer:
+
+    def test_queued_matches_leave_threads_for_other_endpoints(self, temp_db, perfect_match_users, monkeypatch):
+        app = create_app({"DATABASE_PATH": temp_db.db_path, "TESTING": True,
+                          "WEB_THREADS": 4, "ADMISSION_RESERVED_THREADS": 1,
+                          "ADMISSION_LIMITS": {"get_matches": {"concurrency": 1, "queue": 32}}})
+        for user in perfect_match_users:
+            temp_db.add_user(user)
+        resources = app.extensions["peer_exchange"]
+        release = threading.Event()
+        find_matches = resources.matchmaker.find_matches
+
+        def slow_find_matches(*args, **kwargs):
+            release.wait(5)
+            return find_matches(*args, **kwargs)
+
+        monkeypatch.setattr(resources.matchmaker, "find_matches", slow_find_matches)
+        server = PooledWSGIServer("127.0.0.1", 0, app, threads=4)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def fetch(path, body=None):
+            request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}",
+                                             data=body and json.dumps(body).encode(),
+                                             headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    return response.status
+            except urllib.error.HTTPError as error:
+                return error.code
+
+        limiter = resources.admission.concurrency["get_matches"]
+        try:
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                matches = [pool.submit(fetch, f"/api/users/1/matches?limit={n}") for n in range(1, 7)]
+                deadline = time.monotonic() + 5
+                while limiter.waiting < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                started = time.monotonic()
+                created = fetch("/api/users", {"name": "New", "email": "new@example.com"})
+                elapsed = time.monotonic() - started
+                release.set()
+                statuses = sorted(future.result() for future in matches)
+        finally:
+            release.set()
+            server.shutdown()
+            server.drain()
+            server.server_close()
+
+        assert created == 201
+        assert elapsed < 2
+        assert statuses == [200] * 3 + [503] * 3
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Orphans are reparented to init, which reaps them; a zombie still counts as gone.
+    with open(f"/proc/{pid}/stat") as stat:
+        return stat.read().split()[2] != "Z"
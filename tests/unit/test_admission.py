@@ -0,0 +1,121 @@
+import threading
+import pytest
+from src.utils.admission import AdmissionController, ConcurrencyLimiter, RateLimiter, Rejected
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter:
+
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=3, clock=clock)
+        for _ in range(3):
+            limiter.acquire("client")
+        with pytest.raises(Rejected) as rejected:
+            limiter.acquire("client")
+        assert rejected.value.reason == "rate_limited"
+        assert rejected.value.retry_after == pytest.approx(0.5)
+
+        clock.now = 0.5
+        limiter.acquire("client")
+
+    def test_clients_have_separate_buckets(self):
+        limiter = RateLimiter(rate=1, burst=1, clock=FakeClock())
+        limiter.acquire("a")
+        limiter.acquire("b")
+        with pytest.raises(Rejected):
+            limiter.acquire("a")
+
+    def test_least_recent_client_is_forgotten(self):
+        limiter = RateLimiter(rate=1, burst=1, max_clients=2, clock=FakeClock())
+        for client in ("a", "b", "c"):
+            limiter.acquire(client)
+        limiter.acquire("a")  # "a" was evicted and starts with a full bucket
+        with pytest.raises(Rejected):
+            limiter.acquire("c")
+
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0, burst=1)
+
+
+class TestConcurrencyLimiter:
+
+    def test_queue_full_is_rejected_immediately(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_size=0)
+        limiter.acquire()
+        with pytest.raises(Rejected) as rejected:
+            limiter.acquire()
+        assert rejected.value.reason == "queue_full"
+        limiter.release()
+        limiter.acquire()
+
+    def test_waiter_times_out(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=0.05)
+        limiter.acquire()
+        with pytest.raises(Rejected) as rejected:
+            limiter.acquire()
+        assert rejected.value.reason == "queue_timeout"
+        assert (limiter.active, limiter.waiting) == (1, 0)
+
+    def test_waiter_gets_released_slot(self):
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, queue_timeout=5)
+        limiter.acquire()
+        admitted = threading.Event()
+
+        def waiter():
+            limiter.acquire()
+            admitted.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        while limiter.waiting == 0:
+            assert not admitted.is_set()
+            thread.join(0.01)
+        limiter.release()
+        thread.join(5)
+
+        assert admitted.is_set()
+        assert (limiter.active, limiter.waiting) == (1, 0)
+
+
+class TestAdmissionController:
+
+    def test_unlisted_endpoints_are_admitted(self):
+        controller = AdmissionController({"get_matches": {"concurrency": 1}})
+        assert controller.admit("get_users", "client") is None
+        assert controller.admit(None, "client") is None
+
+    def test_rate_checked_before_taking_a_slot(self):
+        controller = AdmissionController({"get_matches": {"concurrency": 2, "rate": 1, "burst": 1}})
+        slot = controller.admit("get_matches", "client")
+        with pytest.raises(Rejected):
+            controller.admit("get_matches", "client")
+        assert controller.counts("active") == {("get_matches",): 1}
+        slot.release()
+
+    def test_limited_endpoints_share_the_server_threads(self):
+        controller = AdmissionController({"get_matches": {"concurrency": 4, "queue": 32},
+                                          "create_users_bulk": {"concurrency": 2, "queue": 4}},
+                                         threads=8, reserved=2)
+        matches = controller.concurrency["get_matches"]
+        assert (matches.limit, matches.queue_size) == (4, 2)
+
+        slots = [controller.admit("get_matches", "client") for _ in range(4)]
+        slots += [controller.admit("create_users_bulk", "client") for _ in range(2)]
+        with pytest.raises(Rejected) as rejected:
+            controller.admit("get_matches", "client")
+        assert rejected.value.reason == "queue_full"
+        assert controller.budget.active == 6
+
+        for slot in slots:
+            slot.release()
+        assert controller.budget.active == 0
@@ -0,0 +1,100 @@
+import pytest
+from src.models.user import User
+from src.utils.matchmaker import Matchmaker
+from src.utils.cohort import CohortPairer
+from src.utils.weighted_matching import max_weight_matching
+
+
+def matching_weight(edges, mate):
+    weights = {(i, j): w for i, j, w in edges}
+    total = 0
+    for v, w in enumerate(mate):
+        if w > v:
+            total += weights.get((v, w), weights.get((w, v)))
+    return total
+
+
+class TestMaxWeightMatching:
+
+    def test_empty_graph(self):
+        assert max_weight_matching([]) == []
+
+    def test_prefers_heavier_total_over_heaviest_edge(self):
+        # Greedy would take (1, 2) and strand 0 and 3.
+        edges = [(0, 1, 5), (1, 2, 6), (2, 3, 5)]
+        mate = max_weight_matching(edges)
+        assert mate == [1, 0, 3, 2]
+        assert matching_weight(edges, mate) == 10
+
+    def test_odd_cycle_blossom(self):
+        edges = [(0, 1, 8), (0, 2, 9), (1, 2, 10), (2, 3, 7)]
+        mate = max_weight_matching(edges)
+        assert matching_weight(edges, mate) == 15
+
+    def test_nested_blossoms(self):
+        edges = [(1, 2, 9), (1, 3, 9), (2, 3, 10), (2, 4, 8), (3, 5, 8),
+                 (4, 5, 10), (5, 6, 6)]
+        mate = max_weight_matching(edges)
+        assert mate == [-1, 3, 4, 1, 2, 6, 5]
+
+    def test_invalid_edge(self):
+        with pytest.raises(ValueError):
+            max_weight_matching([(1, 1, 3)])
+
+
+class TestCohortPairer:
+
+    def add_users(self, temp_db, users):
+        for user in users:
+            user.user_id = temp_db.add_user(user)
+        return users
+
+    def test_pairs_mutual_partners(self, temp_db, perfect_match_users, one_way_match_users):
+        users = self.add_users(temp_db, perfect_match_users + one_way_match_users)
+        pairer = CohortPairer(Matchmaker(temp_db))
+
+        result = pairer.pair(mode='exact')
+
+        pairs = {(u1, u2) for u1, u2, _ in result.pairs}
+        assert (users[0].user_id, users[1].user_id) in pairs
+        assert (users[2].user_id, users[3].user_id) in pairs
+        assert result.unpaired == []
+        assert result.total_score == pytest.approx(2.0)
+
+    def test_exact_beats_greedy(self, temp_db):
+        # Pairing the hub with its best partner strands two compatible users.
+        users = self.add_users(temp_db, [
+            User(name="A", email="a@example.com", skills_offered=["Go"], skills_needed=["Rust"]),
+            User(name="Hub", email="hub@example.com", skills_offered=["Rust", "SQL"], skills_needed=["Go"]),
+            User(name="C", email="c@example.com", skills_offered=["Go"], skills_needed=["SQL", "Art"]),
+            User(name="D", email="d@example.com", skills_offered=["Art"], skills_needed=["Go"]),
+        ])
+        pairer = CohortPairer(Matchmaker(temp_db))
+
+        exact = pairer.pair(mode='exact')
+        greedy = pairer.pair(mode='greedy')
+
+        assert exact.total_score >= greedy.total_score
+        assert len(exact.pairs) == 2
+        assert {users[0].user_id, users[1].user_id} in [{u1, u2} for u1, u2, _ in exact.pairs]
+
+    def test_restricts_to_user_ids(self, temp_db, sample_users):
+        users = self.add_users(temp_db, sample_users)
+        pairer = CohortPairer(Matchmaker(temp_db))
+
+        result = pairer.pair(user_ids=[users[0].user_id, users[2].user_id])
+
+        assert result.pairs == []
+        assert sorted(result.unpaired) == sorted([users[0].user_id, users[2].user_id])
+
+    def test_reports_timings(self, temp_db, sample_users):
+        self.add_users(temp_db, sample_users)
+        result = CohortPairer(Matchmaker(temp_db)).pair()
+
+        assert result.mode == 'exact'
+        assert set(result.timings) == {'load', 'graph', 'solve', 'total'}
+        assert 'timings_ms' in result.to_dict()
+
+    def test_unknown_mode(self, temp_db):
+        with pytest.raises(ValueError):
+            CohortPairer(Matchmaker(temp_db)).pair(mode='optimal')
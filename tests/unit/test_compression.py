@@ -0,0 +1,45 @@
+import gzip
+import pytest
+from src.utils.compression import StaticAssetCache, compress, negotiate_encoding
+
+
+class TestNegotiateEncoding:
+
+    def test_prefers_supported_codings(self):
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+        assert negotiate_encoding("*") in ("br", "gzip")
+
+    def test_respects_quality_values(self):
+        assert negotiate_encoding("gzip;q=0, deflate") is None
+        assert negotiate_encoding("") is None
+        assert negotiate_encoding(None) is None
+
+
+class TestCompress:
+
+    def test_gzip_is_deterministic(self):
+        data = b"python " * 200
+        assert compress(data, "gzip") == compress(data, "gzip")
+        assert gzip.decompress(compress(data, "gzip")) == data
+
+    def test_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            compress(b"data", "zstd")
+
+
+class TestStaticAssetCache:
+
+    def test_assets_loaded_once_and_precompressed(self, tmp_path):
+        (tmp_path / "big.css").write_text("body { color: red; }\n" * 100)
+        (tmp_path / "tiny.js").write_text("let x = 1;")
+        (tmp_path / "img").mkdir()
+        (tmp_path / "img" / "logo.png").write_bytes(b"\x89PNG" * 500)
+
+        cache = StaticAssetCache(str(tmp_path))
+
+        big = cache.get("big.css")
+        assert big.mimetype == "text/css"
+        assert gzip.decompress(big.encoded["gzip"]) == big.body
+        assert cache.get("tiny.js").encoded == {}
+        assert cache.get("img/logo.png").encoded == {}
+        assert cache.get("missing.css") is None
@@ -1,4 +1,8 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 import pytest
+from src.database.change_log import ChangeLogCompacted
+from src.database.db_handler import DatabaseHandler
 from src.models.user import User
 from src.models.match import Match
 
@@ -94,3 +98,287 @@ class TestDatabaseHandler:
         assert len(matches) == 1
         assert matches[0].compatibility_score == 0.92
         assert "Python" in matches[0].matching_skills
+
+    def test_add_users_batch(self, temp_db, sample_users):
+        duplicate = User(name="Duplicate", email=sample_users[0].email)
+
+        results = temp_db.add_users(sample_users + [duplicate])
+
+        assert [error for _, error in results[:3]] == [None, None, None]
+        assert results[3][0] is None
+        assert "UNIQUE" in results[3][1]
+        assert len(temp_db.get_all_users()) == 3
+        assert temp_db.get_user(results[1][0]).name == "Lebo Mabaso"
+        assert sample_users[2].user_id == results[2][0]
+        assert temp_db.get_skill_stats()[0] == 3
+
+    def test_get_users_batch(self, temp_db, sample_users, monkeypatch):
+        ids = [temp_db.add_user(user) for user in sample_users]
+        monkeypatch.setattr(temp_db, "QUERY_CHUNK_SIZE", 2)
+
+        users = temp_db.get_users([ids[2], 999, ids[0], ids[2], ids[1]])
+
+        assert [user.user_id for user in users] == [ids[2], ids[0], ids[1]]
+        assert users[1].skills_offered == ["Data Science", "Python"]
+        assert users[0].skills_needed == ["CSS", "Web Design"]
+        assert temp_db.get_users([]) == []
+
+    def test_get_all_users_hydrates_skills(self, temp_db, sample_users):
+        for user in sample_users:
+            temp_db.add_user(user)
+
+        all_users = temp_db.get_all_users()
+
+        assert [user.name for user in all_users] == [user.name for user in sample_users]
+        for user in all_users:
+            assert user.skills_offered == temp_db.get_user(user.user_id).skills_offered
+            assert user.skills_needed == temp_db.get_user(user.user_id).skills_needed
+
+    def test_bulk_insert_canonicalizes_each_user_once(self, temp_db, sample_users, monkeypatch):
+        calls = []
+        canonicalize = temp_db._canonicalize_skills
+        monkeypatch.setattr(temp_db, "_canonicalize_skills",
+                            lambda cursor, skills: calls.append(skills) or canonicalize(cursor, skills))
+
+        temp_db.add_users(sample_users)
+
+        assert len(calls) == 2 * len(sample_users)
+
+    def test_concurrent_deletes_and_inserts(self, temp_db):
+        results = temp_db.add_users([User(name=f"Old {i}", email=f"old{i}@example.com",
+                                          skills_offered=["Python"], skills_needed=["Go"])
+                                     for i in range(200)])
+        ids = [user_id for user_id, _ in results]
+
+        def delete(worker):
+            return [temp_db.delete_user(user_id) for user_id in ids[worker::4]]
+
+        def insert(worker):
+            return [temp_db.add_user(User(name=f"New {worker}-{i}", email=f"new{worker}-{i}@example.com",
+                                          skills_offered=["Go"]))
+                    for i in range(50)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            deletes = [pool.submit(delete, worker) for worker in range(4)]
+            inserts = [pool.submit(insert, worker) for worker in range(4)]
+            deleted = [result for future in deletes for result in future.result()]
+            inserted = [user_id for future in inserts for user_id in future.result()]
+
+        assert deleted == [True] * 200
+        assert len(inserted) == 200
+        assert temp_db.get_skill_stats() == (200, {"Go": (200, 0)})
+
+
+class TestChangeFeed:
+
+    def test_writes_are_published_after_commit(self, temp_db, sample_user):
+        with temp_db.change_feed.subscribe() as subscription:
+            user_id = sample_user.user_id = temp_db.add_user(sample_user)
+            sample_user.skills_offered = ["Go"]
+            temp_db.update_user(sample_user)
+            temp_db.delete_user(user_id)
+            changes, overflowed = subscription.drain()
+
+        assert [(c.op, c.user_id) for c in changes] == [
+            ("insert", user_id), ("update", user_id), ("delete", user_id)]
+        assert changes[0].skills == {"Python", "JavaScript", "Machine Learning", "Docker"}
+        # An update covers the skills before and after, so dropped skills still match.
+        assert {"Python", "Go"} <= changes[1].skills
+        assert [c.board_version for c in changes] == sorted(c.board_version for c in changes)
+        assert changes[-1].board_version == temp_db.get_board_version()
+        assert not overflowed
+        assert not temp_db.change_feed.active
+
+    def test_bulk_insert_publishes_only_inserted_rows(self, temp_db, sample_users):
+        temp_db.add_user(User(name="Existing", email=sample_users[0].email))
+        with temp_db.change_feed.subscribe() as subscription:
+            results = temp_db.add_users(sample_users)
+            changes, _ = subscription.drain()
+
+        assert [c.user_id for c in changes] == [user_id for user_id, _ in results if user_id]
+
+    def test_overflow_is_flagged(self, temp_db, sample_users):
+        temp_db.change_feed.max_pending = 2
+        with temp_db.change_feed.subscribe() as subscription:
+            temp_db.add_users(sample_users)
+            changes, overflowed = subscription.drain()
+            assert subscription.drain() == ([], False)
+
+        assert len(changes) == 2
+        assert overflowed
+
+    def test_notify_callback(self, temp_db, sample_user):
+        calls = []
+        with temp_db.change_feed.subscribe(notify=lambda: calls.append(1)):
+            temp_db.add_user(sample_user)
+        assert calls == [1]
+
+
+class TestChangeLog:
+
+    def test_mutations_are_logged_with_skill_deltas(self, temp_db, sample_user):
+        user_id = sample_user.user_id = temp_db.add_user(sample_user)
+        sample_user.skills_offered = ["Python", "Go"]
+        temp_db.update_user(sample_user)
+        temp_db.delete_user(user_id)
+
+        insert, update, delete = temp_db.changes_since(0)
+        assert [c.seq for c in (insert, update, delete)] == [1, 2, 3]
+        assert (insert.entity, insert.entity_id, insert.op) == ("user", user_id, "insert")
+        assert insert.offered_added == ("JavaScript", "Python")
+        assert insert.needed_added == ("Docker", "Machine Learning")
+        assert (update.offered_added, update.offered_removed) == (("Go",), ("JavaScript",))
+        assert update.needed_added == update.needed_removed == ()
+        assert delete.op == "delete"
+        assert delete.offered_removed == ("Go", "Python")
+        assert temp_db.latest_change_seq() == 3
+
+    def test_reader_pages_from_seq(self, temp_db, sample_users):
+        temp_db.add_users(sample_users)
+        first = temp_db.changes_since(0, limit=2)
+        rest = temp_db.changes_since(first[-1].seq)
+
+        assert [c.seq for c in first + rest] == list(range(1, len(sample_users) + 1))
+        assert temp_db.changes_since(temp_db.latest_change_seq()) == []
+
+    def test_rolled_back_rows_leave_no_change(self, temp_db, sample_users):
+        temp_db.add_user(User(name="Existing", email=sample_users[0].email))
+        results = temp_db.add_users(sample_users)
+
+        logged = [c.entity_id for c in temp_db.changes_since(1)]
+        assert logged == [user_id for user_id, _ in results if user_id]
+
+    def test_compaction(self, temp_db, sample_users):
+        temp_db.add_users(sample_users)
+        latest = temp_db.latest_change_seq()
+
+        assert temp_db.compact_changes(keep_last=1) == latest - 1
+        assert [c.seq for c in temp_db.changes_since(latest - 1)] == [latest]
+        with pytest.raises(ChangeLogCompacted) as compacted:
+            temp_db.changes_since(0)
+        assert compacted.value.compacted_through == latest - 1
+        # Sequence numbers are never reused after compaction.
+        temp_db.compact_changes(keep_last=0)
+        temp_db.add_user(User(name="Late", email="late@example.com"))
+        assert temp_db.latest_change_seq() == latest + 1
+
+    def test_automatic_compaction(self, temp_db, sample_users, monkeypatch):
+        monkeypatch.setattr(DatabaseHandler, "CHANGE_LOG_COMPACT_EVERY", 2)
+        monkeypatch.setattr(DatabaseHandler, "CHANGE_LOG_RETENTION", 1)
+        temp_db.add_users(sample_users)
+        temp_db.add_user(User(name="Fourth", email="fourth@example.com"))
+
+        assert [c.seq for c in temp_db.changes_since(3)] == [4]
+        with pytest.raises(ChangeLogCompacted):
+            temp_db.changes_since(2)
+
+    def test_skill_stats_with_seq(self, temp_db, sample_user):
+        temp_db.add_user(sample_user)
+        seq, user_count, stats = temp_db.get_skill_stats_with_seq()
+
+        assert (seq, user_count) == (1, 1)
+        assert stats["Python"] == (1, 0)
+
+
+class TestWriteQueue:
+
+    @pytest.fixture
+    def queued_db(self, temp_db):
+        temp_db.start_write_queue()
+        yield temp_db
+        temp_db.close()
+
+    def test_concurrent_writes_share_commits(self, queued_db):
+        def insert(worker):
+            return [queued_db.add_user(User(name=f"User {worker}-{i}", email=f"u{worker}-{i}@example.com",
+                                            skills_offered=["Python"]))
+                    for i in range(10)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = [user_id for batch in pool.map(insert, range(8)) for user_id in batch]
+
+        assert sorted(ids) == list(range(1, 81))
+        assert len(queued_db.get_all_users()) == 80
+        assert queued_db.get_skill_stats() == (80, {"Python": (80, 0)})
+        assert queued_db.write_queue.writes_committed == 80
+        assert queued_db.write_queue.groups_committed <= 80
+
+    def test_failed_write_does_not_affect_its_group(self, queued_db, sample_users):
+        queued_db.add_user(User(name="Existing", email=sample_users[1].email))
+        futures = [queued_db.add_user_async(user) for user in sample_users]
+
+        assert futures[0].result() and futures[2].result()
+        with pytest.raises(sqlite3.IntegrityError):
+            futures[1].result()
+        assert len(queued_db.get_all_users()) == 3
+        assert queued_db.get_skill_stats()[0] == 3
+
+    def test_changes_published_before_future_resolves(self, queued_db, sample_user):
+        with queued_db.change_feed.subscribe() as subscription:
+            user_id = queued_db.add_user_async(sample_user).result()
+            changes, _ = subscription.drain()
+
+        assert [(c.op, c.user_id) for c in changes] == [("insert", user_id)]
+
+    def test_close_commits_queued_writes(self, temp_db):
+        temp_db.start_write_queue()
+        futures = [temp_db.save_match_async(Match(user1_id=1, user2_id=n, compatibility_score=0.5,
+                                                  matching_skills=[]))
+                   for n in range(2, 12)]
+        temp_db.close()
+
+        assert all(future.done() for future in futures)
+        assert len(temp_db.get_matches_for_user(1)) == 10
+        assert temp_db.write_queue is None
+
+
+class TestSnapshot:
+
+    def test_database_uses_wal(self, temp_db):
+        with temp_db.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_read_connection_rejects_writes(self, temp_db):
+        conn = temp_db.get_read_connection()
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("DELETE FROM users")
+        conn.close()
+
+    def test_snapshot_is_a_point_in_time_view(self, temp_db, sample_users):
+        first_id = temp_db.add_user(sample_users[0])
+        with temp_db.open_snapshot() as snapshot:
+            second_id = temp_db.add_user(sample_users[1])
+            temp_db.delete_user(first_id)
+
+            assert [u.user_id for u in snapshot.get_all_users()] == [first_id]
+            assert snapshot.get_skill_stats()[0] == 1
+            assert snapshot.board_version == temp_db.get_board_version() - 2
+            assert [c.entity_id for c in temp_db.changes_since(snapshot.change_seq)] == [second_id, first_id]
+
+        with temp_db.open_snapshot() as snapshot:
+            assert [u.user_id for u in snapshot.get_all_users()] == [second_id]
+
+    def test_reads_are_not_blocked_by_an_open_write(self, temp_db, sample_user):
+        temp_db.add_user(sample_user)
+        writer = temp_db.get_connection()
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM skills_offered")
+        try:
+            with temp_db.open_snapshot() as snapshot:
+                assert snapshot.get_user(1).skills_offered == ["JavaScript", "Python"]
+        finally:
+            writer.rollback()
+            writer.close()
+
+    def test_snapshot_is_read_only(self, temp_db, sample_user):
+        snapshot = temp_db.open_snapshot()
+        with pytest.raises(sqlite3.OperationalError):
+            snapshot.add_user(sample_user)
+        with pytest.raises(sqlite3.OperationalError):
+            snapshot.save_match_async(Match(user1_id=1, user2_id=2, compatibility_score=0.5,
+                                            matching_skills=[])).result()
+        snapshot.close()
+        snapshot.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            snapshot.get_all_users()
+        assert temp_db.get_all_users() == []
@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.database.db_handler import DatabaseHandler
+from src.models.user import User
+from src.utils.fuzzy import TrigramIndex, trigrams
+from src.utils.matchmaker import Matchmaker
+
+
+class TestTrigramIndex:
+
+    def test_trigrams_ignore_case_and_separators(self):
+        assert trigrams("machine-learning") == trigrams("Machine Learning")
+
+    def test_similar_finds_typos(self):
+        index = TrigramIndex(["JavaScript", "Python", "Machine Learning"])
+        assert index.similar("Javascrpt")[0][0] == "JavaScript"
+        assert index.similar("Cooking") == []
+
+    def test_threshold_is_configurable(self):
+        index = TrigramIndex(["JavaScript", "Java"], threshold=0.3)
+        assert [skill for skill, _ in index.similar("Javascrpt")] == ["JavaScript", "Java"]
+        assert index.similar("Javascrpt", threshold=0.9) == []
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            TrigramIndex(threshold=0)
+
+    def test_neighbours_are_precomputed_and_updated(self):
+        index = TrigramIndex(["JavaScript"])
+        assert index.neighbours("JavaScript") == {"JavaScript"}
+
+        index.add("Javascrpt")
+
+        assert index.neighbours("JavaScript") == {"JavaScript", "Javascrpt"}
+        assert index.neighbours("Javascrpt") == {"JavaScript", "Javascrpt"}
+
+    def test_refresh_reaches_skills_beyond_the_new_skills_top_neighbours(self):
+        index = TrigramIndex(["Pythonn", "Cython"], threshold=0.4, max_neighbours=1)
+        assert index.neighbours("Cython") == {"Cython"}
+
+        index.add("Python")
+
+        assert index.neighbours("Python") == {"Python", "Pythonn"}
+        assert index.neighbours("Cython") == {"Cython", "Python"}
+
+    def test_unknown_skill_neighbours_are_memoized_until_an_add(self, monkeypatch):
+        index = TrigramIndex(["JavaScript"], cache_size=1)
+        calls = []
+        compute = index._compute_neighbours
+        monkeypatch.setattr(index, "_compute_neighbours", lambda skill: calls.append(skill) or compute(skill))
+
+        assert index.neighbours("Javascrpt") == {"JavaScript", "Javascrpt"}
+        assert index.neighbours("Javascrpt") == {"JavaScript", "Javascrpt"}
+        assert calls == ["Javascrpt"]
+
+        index.neighbours("Pyhton")
+        index.neighbours("Javascrpt")
+        assert calls == ["Javascrpt", "Pyhton", "Javascrpt"]
+
+        index.add("Javascript")
+        assert index.neighbours("Javascrpt") == {"JavaScript", "Javascript", "Javascrpt"}
+
+    def test_concurrent_adds_and_lookups(self):
+        index = TrigramIndex(["JavaScript"])
+        skills = [f"Skill {i}" for i in range(100)]
+        errors = []
+
+        def read():
+            try:
+                for _ in range(100):
+                    index.similar("Skill 1")
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(index.add, skills))
+        for reader in readers:
+            reader.join()
+
+        assert errors == []
+        rebuilt = TrigramIndex(["JavaScript"] + skills)
+        assert all(index.neighbours(skill) == rebuilt.neighbours(skill) for skill in skills)
+
+
+class TestFuzzyMatching:
+
+    def test_near_miss_skills_match_only_when_enabled(self, temp_db):
+        learner = User(name="Learner", email="learner@example.com",
+                       skills_offered=["Cooking"], skills_needed=["Javascrpt"])
+        teacher = User(name="Teacher", email="teacher@example.com",
+                       skills_offered=["JavaScript"], skills_needed=["Cooking"])
+        learner_id = temp_db.add_user(learner)
+        teacher_id = temp_db.add_user(teacher)
+        matchmaker = Matchmaker(temp_db)
+
+        details = matchmaker.get_match_details(learner_id, teacher_id)
+        assert details["user1_can_learn"] == []
+
+        matchmaker.enable_fuzzy_matching(threshold=0.5)
+        details = matchmaker.get_match_details(learner_id, teacher_id)
+        assert details["user1_can_learn"] == ["Javascrpt"]
+        assert details["is_mutual_exchange"] is True
+        assert matchmaker.find_matches(learner_id)[0][0] == teacher_id
+
+    def test_index_picks_up_skills_written_by_other_processes(self, temp_db):
+        learner_id = temp_db.add_user(User(name="Learner", email="learner@example.com",
+                                           skills_offered=["Cooking"], skills_needed=["Kotlinn"]))
+        matchmaker = Matchmaker(temp_db)
+        matchmaker.enable_fuzzy_matching(threshold=0.5)
+
+        # A second handler stands in for another worker process writing to the database.
+        teacher_id = DatabaseHandler(temp_db.db_path).add_user(
+            User(name="Teacher", email="teacher@example.com", skills_offered=["Kotlin"]))
+
+        assert [user_id for user_id, _ in matchmaker.find_matches(learner_id)] == [teacher_id]
+        assert "Kotlin" in matchmaker.fuzzy_index
@@ -0,0 +1,131 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from src.models.job import Job
+from src.utils.jobs import JobRunner
+
+
+def wait_for_status(db, job_id, *statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = db.get_job(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {db.get_job(job_id).status}")
+
+
+@pytest.fixture
+def runner(temp_db):
+    runner = JobRunner(temp_db, workers=2, progress_interval=0)
+    yield runner
+    runner.shutdown()
+
+
+class TestJobRunner:
+
+    def test_success_records_result_and_progress(self, runner, temp_db):
+        def count(context, params):
+            for i in range(params["n"]):
+                context.progress((i + 1) / params["n"], f"{i + 1} done")
+            return {"counted": params["n"]}
+
+        runner.register("count", count, validate=lambda params: {"n": int(params.get("n", 3))})
+        job = runner.submit("count", {"n": "4"})
+        assert job.params == {"n": 4}
+
+        job = wait_for_status(temp_db, job.job_id, "succeeded")
+        assert job.result == {"counted": 4}
+        assert job.progress == 1.0
+        assert job.message == "4 done"
+        assert job.started_at <= job.finished_at
+
+    def test_failure_records_error(self, runner, temp_db):
+        def fail(context, params):
+            raise RuntimeError("disk full")
+
+        runner.register("fail", fail)
+        job = wait_for_status(temp_db, runner.submit("fail").job_id, "failed")
+        assert job.error == "RuntimeError: disk full"
+        assert job.result is None
+
+    def test_validation_and_unknown_kind(self, runner):
+        def reject(params):
+            raise ValueError("bad params")
+
+        runner.register("strict", lambda context, params: None, validate=reject)
+        with pytest.raises(ValueError):
+            runner.submit("strict")
+        with pytest.raises(KeyError):
+            runner.submit("missing")
+
+    def test_cancel_running_job(self, runner, temp_db):
+        started = threading.Event()
+
+        def spin(context, params):
+            started.set()
+            while True:
+                context.progress(0.5)
+                time.sleep(0.01)
+
+        runner.register("spin", spin)
+        job = runner.submit("spin")
+        started.wait(5)
+        assert runner.cancel(job.job_id)
+
+        job = wait_for_status(temp_db, job.job_id, "cancelled")
+        assert job.cancel_requested
+        assert not runner.cancel(job.job_id)
+
+    def test_cancel_seen_through_database(self, runner, temp_db):
+        """A cancel requested by another process only sets the flag in the table"""
+        started = threading.Event()
+
+        def spin(context, params):
+            started.set()
+            while True:
+                context.progress(0.5)
+                time.sleep(0.01)
+
+        runner.register("spin", spin)
+        job = runner.submit("spin")
+        started.wait(5)
+        temp_db.request_job_cancel(job.job_id)
+
+        assert wait_for_status(temp_db, job.job_id, "cancelled").status == "cancelled"
+
+    def test_queued_job_cancelled_before_it_starts(self, temp_db):
+        runner = JobRunner(temp_db, workers=1, progress_interval=0)
+        release = threading.Event()
+        runs = []
+        runner.register("block", lambda context, params: release.wait(5))
+        runner.register("record", lambda context, params: runs.append(1))
+        try:
+            blocker = runner.submit("block")
+            queued = runner.submit("record")
+            assert runner.cancel(queued.job_id)
+            release.set()
+            assert wait_for_status(temp_db, queued.job_id, "cancelled").started_at is not None
+            wait_for_status(temp_db, blocker.job_id, "succeeded")
+        finally:
+            release.set()
+            runner.shutdown()
+        assert runs == []
+
+    def test_retention_prunes_old_finished_jobs(self, runner, temp_db):
+        runner.register("noop", lambda context, params: None)
+        old = wait_for_status(temp_db, runner.submit("noop").job_id, "succeeded")
+        temp_db.update_job(old.job_id, finished_at=datetime.now() - timedelta(days=2))
+
+        runner.submit("noop")
+        assert temp_db.get_job(old.job_id) is None
+
+    def test_orphaned_jobs_are_failed(self, temp_db):
+        temp_db.create_job(Job(job_id="orphan", kind="noop", status="running", owner_pid=2 ** 22 + 1))
+        runner = JobRunner(temp_db)
+        runner.shutdown()
+
+        job = temp_db.get_job("orphan")
+        assert job.status == "failed"
+        assert job.error.startswith("Interrupted")
@@ -0,0 +1,95 @@
+import pytest
+from src.database.db_handler import DatabaseHandler
+from src.models.user import User
+from src.utils.lsh import MinHashLSH
+from src.utils.matchmaker import Matchmaker
+
+
+def make_user(user_id, offered, needed):
+    user = User(name=f"User {user_id}", email=f"user{user_id}@example.com",
+                skills_offered=offered, skills_needed=needed)
+    user.user_id = user_id
+    return user
+
+
+class TestMinHashLSH:
+
+    def test_signature_is_deterministic(self):
+        index = MinHashLSH(num_perm=32, bands=8)
+        assert index.signature(["Python", "Go"]) == index.signature(["Go", "Python"])
+        assert len(index.signature(["Python"])) == 32
+        assert index.signature([]) is None
+
+    def test_invalid_banding(self):
+        with pytest.raises(ValueError):
+            MinHashLSH(num_perm=30, bands=8)
+
+    def test_query_finds_complementary_users(self):
+        index = MinHashLSH()
+        learner = make_user(1, ["Guitar"], ["Python", "Docker"])
+        teacher = make_user(2, ["Python", "Docker"], ["Cooking"])
+        stranger = make_user(3, ["Painting"], ["Music"])
+        index.add_users([learner, teacher, stranger])
+
+        assert index.query(learner) == {2}
+        assert 1 in index.query(teacher)
+
+    def test_remove_user(self):
+        index = MinHashLSH()
+        learner = make_user(1, ["Guitar"], ["Python"])
+        teacher = make_user(2, ["Python"], ["Cooking"])
+        index.add_users([learner, teacher])
+
+        index.remove_user(2)
+
+        assert 2 not in index
+        assert index.query(learner) == set()
+
+
+class TestApproximateMatching:
+
+    def test_approximate_matches_agree_with_exact(self, temp_db, perfect_match_users, no_match_users):
+        for user in perfect_match_users + no_match_users:
+            user.user_id = temp_db.add_user(user)
+        matchmaker = Matchmaker(temp_db)
+
+        exact = matchmaker.find_matches(perfect_match_users[0].user_id)
+        approximate = matchmaker.find_matches(perfect_match_users[0].user_id, approximate=True)
+
+        assert approximate == exact
+        assert len(matchmaker.lsh_index) == 4
+
+    def test_index_user_keeps_index_fresh(self, temp_db, perfect_match_users):
+        first = perfect_match_users[0]
+        first.user_id = temp_db.add_user(first)
+        matchmaker = Matchmaker(temp_db)
+        matchmaker.build_lsh_index()
+
+        second = perfect_match_users[1]
+        second.user_id = temp_db.add_user(second)
+        matchmaker.index_user(second)
+
+        matches = matchmaker.find_matches(first.user_id, approximate=True)
+        assert [user_id for user_id, _ in matches] == [second.user_id]
+
+    def test_index_follows_writes_from_other_processes(self, temp_db, perfect_match_users, no_match_users):
+        first = perfect_match_users[0]
+        first.user_id = temp_db.add_user(first)
+        matchmaker = Matchmaker(temp_db, lsh_options={"num_perm": 32, "bands": 16})
+        matchmaker.build_lsh_index()
+
+        # A second handler stands in for another worker process writing to the database.
+        other = DatabaseHandler(temp_db.db_path)
+        second = perfect_match_users[1]
+        second.user_id = other.add_user(second)
+        stranger = no_match_users[0]
+        stranger.user_id = other.add_user(stranger)
+        matches = matchmaker.find_matches(first.user_id, approximate=True)
+        assert second.user_id in [user_id for user_id, _ in matches]
+        assert second.user_id in matchmaker.lsh_index and stranger.user_id in matchmaker.lsh_index
+
+        other.delete_user(second.user_id)
+        matches = matchmaker.find_matches(first.user_id, approximate=True)
+        assert second.user_id not in [user_id for user_id, _ in matches]
+        assert second.user_id not in matchmaker.lsh_index
+        assert (matchmaker.lsh_index.num_perm, matchmaker.lsh_index.bands) == (32, 16)
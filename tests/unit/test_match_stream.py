@@ -0,0 +1,97 @@
+import json
+from src.database.change_feed import UserChange
+from src.utils.match_stream import KEEPALIVE, MatchSnapshot, MatchStream, format_event
+
+
+def parse(messages):
+    """(event, data) pairs from a chunk of SSE messages"""
+    events = []
+    for block in messages.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def entry(user_id, score):
+    return {"user": {"user_id": user_id}, "score": score}
+
+
+class FakeBoard:
+
+    def __init__(self):
+        self.version = 1
+        self.skills = frozenset({"Python", "Go"})
+        self.entries = [entry(2, 0.5)]
+        self.computed = 0
+
+    def compute(self):
+        self.computed += 1
+        return MatchSnapshot(self.version, self.skills, list(self.entries))
+
+
+class TestMatchStream:
+
+    def test_format_event(self):
+        assert format_event("match", {"a": 1}, 7) == b'event: match\nid: 7\ndata: {"a":1}\n\n'
+
+    def test_start_sends_full_list(self):
+        board = FakeBoard()
+        stream = MatchStream(1, board.compute)
+        message = stream.start()
+
+        assert message.startswith(b"retry: 5000\n\n")
+        assert parse(message) == [("matches", [entry(2, 0.5)])]
+
+    def test_changes_are_diffed(self):
+        board = FakeBoard()
+        stream = MatchStream(1, board.compute)
+        stream.start()
+        board.version = 2
+        board.entries = [entry(3, 0.9), entry(2, 0.5)]
+
+        assert parse(stream.on_changes([UserChange("insert", 3, frozenset({"Go"}), 2)])) == [
+            ("match", entry(3, 0.9))]
+
+        board.version = 3
+        board.entries = [entry(3, 0.7)]
+        assert parse(stream.on_changes([UserChange("delete", 2, frozenset(), 3)])) == [
+            ("match", entry(3, 0.7)), ("unmatch", {"user_id": 2})]
+
+    def test_irrelevant_changes_skip_recomputation(self):
+        board = FakeBoard()
+        stream = MatchStream(1, board.compute)
+        stream.start()
+
+        assert stream.on_changes([UserChange("insert", 9, frozenset({"Cooking"}), 2)]) == b""
+        assert board.computed == 1
+        # The feed already reported version 2, so a heartbeat doesn't recompute either.
+        assert stream.check_version(2) == KEEPALIVE
+        assert board.computed == 1
+
+    def test_overflow_forces_recomputation(self):
+        board = FakeBoard()
+        stream = MatchStream(1, board.compute)
+        stream.start()
+        stream.on_changes([], overflowed=True)
+        assert board.computed == 2
+
+    def test_unseen_version_recomputes(self):
+        board = FakeBoard()
+        stream = MatchStream(1, board.compute)
+        stream.start()
+        board.version = 5
+        board.entries = []
+
+        assert parse(stream.check_version(5)) == [("unmatch", {"user_id": 2})]
+        assert stream.check_version(5) == KEEPALIVE
+
+    def test_deleted_user_ends_stream(self):
+        board = FakeBoard()
+        stream = MatchStream(1, board.compute)
+        stream.start()
+        board.skills = None
+
+        assert parse(stream.on_changes([UserChange("delete", 1, frozenset(), 2)])) == [
+            ("end", {"error": "User not found"})]
+        assert stream.closed
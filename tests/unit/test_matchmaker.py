@@ -109,6 +109,25 @@ class TestMatchmaker:
             assert isinstance(score, float)
             assert 0 <= score <= 1.0
     
+    def test_find_matches_filters_and_limit(self, temp_db):
+        matchmaker = Matchmaker(temp_db)
+        target_id = temp_db.add_user(User(name="Target", email="t@example.com",
+                                          skills_offered=["Go"], skills_needed=["Python", "SQL"]))
+        mutual_id = temp_db.add_user(User(name="Mutual", email="m@example.com",
+                                          skills_offered=["Python"], skills_needed=["Go"]))
+        teacher_id = temp_db.add_user(User(name="Teacher", email="te@example.com",
+                                           skills_offered=["Python", "SQL"]))
+        temp_db.add_user(User(name="Partial", email="p@example.com", skills_offered=["SQL"]))
+        
+        everyone = matchmaker.find_matches(target_id, min_score=0.0)
+        assert [score for _, score in everyone] == sorted((s for _, s in everyone), reverse=True)
+        assert len(everyone) == 3
+        
+        assert matchmaker.find_matches(target_id, min_score=0.0, limit=2) == everyone[:2]
+        assert [uid for uid, _ in matchmaker.find_matches(target_id, mutual_only=True)] == [mutual_id]
+        assert all(score >= 0.9 for _, score in matchmaker.find_matches(target_id, min_score=0.9))
+        assert teacher_id in dict(everyone)
+    
     def test_get_match_details(self, temp_db):
         matchmaker = Matchmaker(temp_db)
     
@@ -0,0 +1,52 @@
+import pytest
+from src.database.db_handler import DatabaseHandler
+from src.utils.metrics import MetricsRegistry, instrument_methods
+
+
+class TestMetricsRegistry:
+    
+    def test_counter_renders_labels(self):
+        registry = MetricsRegistry()
+        requests = registry.counter('requests_total', 'Requests', ('route',))
+        requests.inc(route='/a')
+        requests.inc(2, route='/a')
+        
+        assert requests.value(route='/a') == 3
+        assert 'requests_total{route="/a"} 3' in registry.render()
+    
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+        
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1.0"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert 'latency_seconds_count 4' in text
+        assert 'latency_seconds_sum 3.65' in text
+    
+    def test_collected_values_are_read_at_render(self):
+        registry = MetricsRegistry()
+        state = {'open': 1}
+        registry.collected('open_things', 'Open things', lambda: {(): state['open']})
+        state['open'] = 5
+        
+        assert 'open_things 5' in registry.render()
+    
+    def test_duplicate_names_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter('x_total', 'X')
+        with pytest.raises(ValueError):
+            registry.counter('x_total', 'X')
+    
+    def test_instrument_methods_times_instance_only(self, temp_db):
+        registry = MetricsRegistry()
+        histogram = registry.histogram('calls_seconds', 'Calls', ('method',))
+        instrument_methods(temp_db, ['get_all_users'], histogram)
+        
+        assert temp_db.get_all_users() == []
+        assert histogram.count(method='get_all_users') == 1
+        assert 'get_all_users' in vars(temp_db)
+        assert 'get_all_users' not in vars(DatabaseHandler(temp_db.db_path))
@@ -0,0 +1,72 @@
+import sys
+import threading
+import time
+import pytest
+from src.utils.profiler import ProfileSession, SamplingProfiler, collapse_stack
+
+
+class TestSamplingProfiler:
+    
+    def test_collapse_stack_is_outermost_first(self):
+        def inner():
+            return collapse_stack(sys._getframe())
+        
+        frames = inner().split(';')
+        assert frames[-1].startswith('inner (test_profiler.py:')
+        assert frames[-2].startswith('test_collapse_stack_is_outermost_first ')
+    
+    def test_samples_only_registered_threads(self):
+        profiler = SamplingProfiler()
+        profiler.sample()
+        assert profiler.samples == 0
+        
+        profiler.add_thread(threading.get_ident())
+        profiler.sample()
+        profiler.sample()
+        profiler.discard_thread(threading.get_ident())
+        profiler.sample()
+        
+        assert profiler.samples == 2
+        stack, count = profiler.collapsed().strip().rsplit(' ', 1)
+        assert count == '2'
+        assert 'test_samples_only_registered_threads' in stack
+    
+    def test_background_thread_samples_busy_thread(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.add_thread(threading.get_ident())
+        profiler.start()
+        deadline = time.monotonic() + 0.1
+        while time.monotonic() < deadline:
+            sum(range(1000))
+        profiler.stop()
+        
+        assert profiler.samples > 0
+
+
+class TestProfileSession:
+    
+    def test_request_count_mode(self):
+        session = ProfileSession(requests=2)
+        for _ in range(2):
+            assert session.begin_request()
+            session.end_request()
+        
+        assert not session.begin_request()
+        assert session.done
+        assert session.status()['profiled_requests'] == 2
+        assert isinstance(session.result(), str)
+    
+    def test_time_window_mode(self):
+        session = ProfileSession(seconds=0.01)
+        assert session.begin_request()
+        session.end_request()
+        time.sleep(0.02)
+        
+        assert session.done
+        assert not session.begin_request()
+    
+    def test_requires_exactly_one_limit(self):
+        with pytest.raises(ValueError):
+            ProfileSession()
+        with pytest.raises(ValueError):
+            ProfileSession(requests=1, seconds=1)
@@ -0,0 +1,61 @@
+import json
+from src.database.db_handler import DatabaseHandler
+from src.database.tracing import QueryTracer
+from src.models.user import User
+
+
+class TestQueryTracer:
+    
+    def _traced_db(self, temp_db, **options):
+        tracer = QueryTracer(keep_queries=True, **options)
+        return tracer, DatabaseHandler(temp_db.db_path, tracer=tracer)
+    
+    def test_request_summary_counts_statements(self, temp_db, sample_user):
+        tracer, db = self._traced_db(temp_db)
+        db.add_user(sample_user)
+        
+        tracer.start_request()
+        db.get_all_users()
+        summary = tracer.finish_request()
+        
+        assert summary.count == 3
+        assert [q.sql for q in summary.queries][0] == "SELECT * FROM users ORDER BY created_at"
+        assert {q.caller for q in summary.queries} == {"get_all_users"}
+        assert summary.total_ms == sum(q.duration_ms for q in summary.queries)
+        assert summary.server_timing().startswith("db;dur=")
+        assert tracer.finish_request() is None
+    
+    def test_commit_is_recorded(self, temp_db, sample_user):
+        tracer, db = self._traced_db(temp_db)
+        tracer.start_request()
+        db.add_user(sample_user)
+        
+        queries = tracer.finish_request().queries
+        assert queries[-1].sql == "COMMIT"
+        assert queries[-1].caller == "add_user"
+    
+    def test_slow_query_log(self, temp_db, sample_user, tmp_path):
+        log_path = tmp_path / "slow.jsonl"
+        tracer, db = self._traced_db(temp_db, slow_query_ms=0, slow_log_path=str(log_path))
+        db.get_user(1)
+        
+        entries = [json.loads(line) for line in log_path.read_text().splitlines()]
+        assert entries[0]["sql"] == "SELECT * FROM users WHERE user_id = ?"
+        assert entries[0]["caller"] == "get_user"
+        assert {"duration_ms", "vm_steps", "ts"} <= set(entries[0])
+    
+    def test_no_log_below_threshold(self, temp_db, tmp_path):
+        log_path = tmp_path / "slow.jsonl"
+        tracer, db = self._traced_db(temp_db, slow_query_ms=60_000, slow_log_path=str(log_path))
+        db.get_all_users()
+        
+        assert not log_path.exists()
+    
+    def test_progress_handler_counts_vm_steps(self, temp_db):
+        tracer, db = self._traced_db(temp_db, progress_steps=10)
+        db.add_users([User(name=f"User {i}", email=f"u{i}@example.com", skills_offered=["Go"])
+                      for i in range(50)])
+        
+        tracer.start_request()
+        db.get_all_users()
+        assert sum(q.vm_steps for q in tracer.finish_request().queries) > 0
@@ -0,0 +1,104 @@
+import threading
+import time
+import pytest
+from src.utils.single_flight import SingleFlight, SingleFlightTimeout
+
+
+def run_concurrently(flight, key, fn, callers, timeout=None):
+    """Start `callers` threads calling flight.do; returns their results or exceptions"""
+    outcomes = [None] * callers
+
+    def call(index):
+        try:
+            outcomes[index] = flight.do(key, fn, timeout=timeout)
+        except Exception as error:
+            outcomes[index] = error
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class TestSingleFlight:
+
+    def test_single_call_returns_result(self):
+        flight = SingleFlight()
+        assert flight.do("key", lambda: 42) == 42
+        assert (flight.leaders, flight.coalesced) == (1, 0)
+        assert flight.in_flight() == 0
+
+    def test_concurrent_callers_share_one_run(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        runs = []
+
+        def compute():
+            runs.append(1)
+            started.set()
+            release.wait(5)
+            return ["result"]
+
+        threads, outcomes = run_concurrently(flight, "key", compute, 1)
+        started.wait(5)
+        followers, follower_outcomes = run_concurrently(flight, "key", compute, 4)
+        wait_until(lambda: flight.coalesced == 4)
+        release.set()
+        for thread in threads + followers:
+            thread.join(5)
+
+        assert len(runs) == 1
+        assert outcomes + follower_outcomes == [["result"]] * 5
+        assert (flight.leaders, flight.coalesced) == (1, 4)
+
+    def test_error_reaches_every_waiter(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise ValueError("boom")
+
+        threads, outcomes = run_concurrently(flight, "key", fail, 1)
+        started.wait(5)
+        followers, follower_outcomes = run_concurrently(flight, "key", fail, 2)
+        wait_until(lambda: flight.coalesced == 2)
+        release.set()
+        for thread in threads + followers:
+            thread.join(5)
+
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes + follower_outcomes)
+        # A failed run is not remembered.
+        assert flight.do("key", lambda: "ok") == "ok"
+
+    def test_waiter_times_out_but_leader_finishes(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return "late"
+
+        threads, outcomes = run_concurrently(flight, "key", compute, 1)
+        started.wait(5)
+        with pytest.raises(SingleFlightTimeout):
+            flight.do("key", compute, timeout=0.05)
+        release.set()
+        threads[0].join(5)
+
+        assert outcomes == ["late"]
+
+    def test_different_keys_run_independently(self):
+        flight = SingleFlight()
+        assert flight.do("a", lambda: 1) == 1
+        assert flight.do("b", lambda: 2) == 2
+        assert flight.leaders == 2
@@ -0,0 +1,112 @@
+import sqlite3
+import pytest
+from src.models.user import User
+from src.utils.skill_canonicalizer import SkillCanonicalizer, normalize_skill, skill_key
+
+
+class TestSkillCanonicalizer:
+
+    def test_normalize_collapses_whitespace(self):
+        assert normalize_skill("  Machine \t Learning ") == "Machine Learning"
+        assert skill_key("Machine  LEARNING") == "machine learning"
+
+    def test_synonyms_and_case_folding(self):
+        canonicalizer = SkillCanonicalizer()
+        for spelling in ["python", "Python", "PYTHON", "Python 3", "py"]:
+            assert canonicalizer.canonicalize(spelling) == "Python"
+
+    def test_unknown_skill_keeps_spelling(self):
+        canonicalizer = SkillCanonicalizer()
+        assert canonicalizer.canonicalize(" Rust  Embedded ") == "Rust Embedded"
+
+    def test_canonicalize_all_dedups(self):
+        canonicalizer = SkillCanonicalizer()
+        skills = canonicalizer.canonicalize_all(["py", "Python", "", "Go", "go"])
+        assert skills == ["Python", "Go"]
+
+    def test_add_synonym(self):
+        canonicalizer = SkillCanonicalizer({})
+        assert canonicalizer.canonicalize("golang") == "golang"
+        canonicalizer.add_synonym("Golang", "Go")
+        assert canonicalizer.canonicalize("golang") == "Go"
+
+    def test_cache_is_bounded(self):
+        canonicalizer = SkillCanonicalizer(cache_size=3)
+        for i in range(10):
+            canonicalizer.canonicalize(f"skill {i}")
+        assert len(canonicalizer._cache) == 3
+        assert canonicalizer.canonicalize("skill 9") == "skill 9"
+        assert canonicalizer.hits == 1
+
+
+class TestUserCanonicalization:
+
+    def test_user_skills_are_canonicalized(self):
+        user = User(name="Py Fan", email="py@example.com",
+                    skills_offered=["python", "Python 3"], skills_needed=["js"])
+        assert user.skills_offered == ["Python"]
+        assert user.skills_needed == ["JavaScript"]
+
+    @pytest.mark.parametrize("skills", [[1], ["Python", None], "Python", None])
+    def test_non_string_skills_are_rejected(self, skills):
+        with pytest.raises(ValueError, match="skills_offered must be a list of strings"):
+            User(name="Py Fan", email="py@example.com", skills_offered=skills)
+
+    def test_add_skill_ignores_case_variants(self):
+        user = User(name="Py Fan", email="py@example.com")
+        user.add_skill_offered("py")
+        user.add_skill_offered("PYTHON")
+        assert user.skills_offered == ["Python"]
+
+        user.remove_skill_offered("python")
+        assert user.skills_offered == []
+
+
+class TestDatabaseCanonicalization:
+
+    def test_first_spelling_becomes_canonical(self, temp_db):
+        first = User(name="A", email="a@example.com", skills_offered=["Rust Embedded"])
+        second = User(name="B", email="b@example.com", skills_needed=["rust  embedded"])
+        temp_db.add_user(first)
+        second_id = temp_db.add_user(second)
+
+        assert temp_db.get_user(second_id).skills_needed == ["Rust Embedded"]
+
+    def test_synonym_table_is_persisted(self, temp_db):
+        temp_db.add_synonym("golang", "Go")
+        user_id = temp_db.add_user(User(name="A", email="a@example.com", skills_offered=["golang"]))
+
+        assert temp_db.get_user(user_id).skills_offered == ["Go"]
+
+    def test_migration_merges_duplicates(self, temp_db):
+        user_id = temp_db.add_user(User(name="A", email="a@example.com"))
+        conn = sqlite3.connect(temp_db.db_path)
+        conn.executemany("INSERT INTO skills_offered (user_id, skill) VALUES (?, ?)",
+                         [(user_id, "python"), (user_id, "Python 3"), (user_id, " Docker ")])
+        conn.commit()
+        conn.close()
+
+        changed = temp_db.canonicalize_existing_skills()
+
+        assert changed == 3
+        assert sorted(temp_db.get_user(user_id).skills_offered) == ["Docker", "Python"]
+        assert temp_db.canonicalize_existing_skills() == 0
+
+    @pytest.mark.parametrize("stored", [["py", "Python"], ["Python", "py"]])
+    def test_migration_merges_alias_into_existing_canonical_row(self, temp_db, stored):
+        user_id = temp_db.add_user(User(name="A", email="a@example.com", skills_needed=["Go"]))
+        conn = sqlite3.connect(temp_db.db_path)
+        conn.executemany("INSERT INTO skills_offered (user_id, skill) VALUES (?, ?)",
+                         [(user_id, skill) for skill in stored])
+        conn.executemany("INSERT INTO skills_needed (user_id, skill) VALUES (?, ?)",
+                         [(user_id, "GO ")])
+        conn.commit()
+        conn.close()
+
+        changed = temp_db.canonicalize_existing_skills()
+
+        assert changed == 2
+        user = temp_db.get_user(user_id)
+        assert user.skills_offered == ["Python"]
+        assert user.skills_needed == ["Go"]
+        assert temp_db.get_skill_stats()[1] == {"Python": (1, 0), "Go": (0, 1)}
@@ -0,0 +1,39 @@
+from src.utils.skill_trie import SkillTrie
+
+
+class TestSkillTrie:
+
+    def test_suggest_ranks_by_popularity(self):
+        trie = SkillTrie.from_counts({"Python": 10, "PyTorch": 3, "Pandas": 5, "Go": 7})
+
+        assert trie.suggest("p") == [("Python", 10), ("Pandas", 5), ("PyTorch", 3)]
+        assert trie.suggest("PY") == [("Python", 10), ("PyTorch", 3)]
+        assert trie.suggest("Rust") == []
+        assert len(trie) == 4
+
+    def test_limit_and_top_k(self):
+        trie = SkillTrie.from_counts({f"Skill {i}": i for i in range(1, 30)}, top_k=5)
+
+        assert [skill for skill, _ in trie.suggest("skill")] == [
+            "Skill 29", "Skill 28", "Skill 27", "Skill 26", "Skill 25"]
+        assert len(trie.suggest("skill", limit=2)) == 2
+
+    def test_incremental_updates(self):
+        trie = SkillTrie.from_counts({"Python": 2, "PyTorch": 1})
+
+        trie.add(["PyTorch", "PyTorch", "PySpark"])
+        assert trie.suggest("py") == [("PyTorch", 3), ("Python", 2), ("PySpark", 1)]
+
+        trie.add(["PyTorch"], delta=-3)
+        assert trie.suggest("py") == [("Python", 2), ("PySpark", 1)]
+
+    def test_bulk_build_matches_incremental_build(self):
+        counts = {"Docker": 4, "Django": 2, "Data Science": 6, "Deep Learning": 1}
+        incremental = SkillTrie()
+        for skill, popularity in counts.items():
+            incremental.set_popularity(skill, popularity)
+
+        bulk = SkillTrie.from_counts(counts)
+
+        for prefix in ["", "d", "da", "de", "do"]:
+            assert incremental.suggest(prefix) == bulk.suggest(prefix)
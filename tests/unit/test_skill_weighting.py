@@ -0,0 +1,89 @@
+import pytest
+from src.models.user import User
+from src.utils.matchmaker import Matchmaker
+
+
+class TestSkillStats:
+
+    def test_stats_follow_add_update_delete(self, temp_db):
+        first = User(name="A", email="a@example.com",
+                     skills_offered=["Python", "Rust"], skills_needed=["Go"])
+        second = User(name="B", email="b@example.com",
+                      skills_offered=["Python"], skills_needed=["Rust"])
+        first_id = temp_db.add_user(first)
+        temp_db.add_user(second)
+
+        user_count, stats = temp_db.get_skill_stats()
+        assert user_count == 2
+        assert stats["Python"] == (2, 0)
+        assert stats["Rust"] == (1, 1)
+
+        first.user_id = first_id
+        first.skills_offered = ["Python"]
+        temp_db.update_user(first)
+
+        user_count, stats = temp_db.get_skill_stats()
+        assert stats["Rust"] == (0, 1)
+
+        temp_db.delete_user(first_id)
+
+        user_count, stats = temp_db.get_skill_stats()
+        assert user_count == 1
+        assert "Go" not in stats
+        assert stats["Python"] == (1, 0)
+
+    def test_board_version_changes_on_writes(self, temp_db, sample_user):
+        before = temp_db.get_board_version()
+        user_id = temp_db.add_user(sample_user)
+        assert temp_db.get_board_version() > before
+
+        before = temp_db.get_board_version()
+        temp_db.delete_user(user_id)
+        assert temp_db.get_board_version() > before
+
+
+class TestIdfWeighting:
+
+    def test_unknown_weighting(self, temp_db):
+        with pytest.raises(ValueError):
+            Matchmaker(temp_db, weighting='bm25')
+
+    def test_equally_common_skills_score_like_uniform(self, temp_db, perfect_match_users):
+        ids = [temp_db.add_user(user) for user in perfect_match_users]
+
+        uniform = Matchmaker(temp_db).find_matches(ids[0])
+        weighted = Matchmaker(temp_db, weighting='idf').find_matches(ids[0])
+
+        assert weighted[0][0] == uniform[0][0]
+        assert weighted[0][1] == pytest.approx(uniform[0][1])
+
+    def test_rare_skill_outweighs_common_skill(self, temp_db):
+        learner = User(name="Learner", email="learner@example.com",
+                       skills_needed=["Python", "Rust Embedded"])
+        learner_id = temp_db.add_user(learner)
+        common_id = temp_db.add_user(User(name="Common", email="common@example.com",
+                                          skills_offered=["Python"]))
+        rare_id = temp_db.add_user(User(name="Rare", email="rare@example.com",
+                                        skills_offered=["Rust Embedded"]))
+        for i in range(5):
+            temp_db.add_user(User(name=f"Pythonista {i}", email=f"py{i}@example.com",
+                                  skills_offered=["Python"]))
+
+        uniform = dict(Matchmaker(temp_db).find_matches(learner_id))
+        assert uniform[common_id] == uniform[rare_id]
+
+        weighted = dict(Matchmaker(temp_db, weighting='idf').find_matches(learner_id))
+        assert weighted[rare_id] > weighted[common_id]
+
+    def test_weights_are_cached_until_board_changes(self, temp_db, sample_users):
+        ids = [temp_db.add_user(user) for user in sample_users]
+        matchmaker = Matchmaker(temp_db, weighting='idf')
+
+        matchmaker.find_matches(ids[0])
+        weights = matchmaker._skill_weights
+        matchmaker.find_matches(ids[1])
+        assert matchmaker._skill_weights is weights
+
+        temp_db.add_user(User(name="New", email="new@example.com", skills_offered=["Python"]))
+        matchmaker.find_matches(ids[0])
+        assert matchmaker._skill_weights is not weights
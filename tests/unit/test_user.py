@@ -90,3 +90,10 @@ class TestUser:
         assert user_dict['user_id'] == 1
         assert user_dict['skills_offered'] == ["Python"]
         assert user_dict['skills_needed'] == ["Docker"]
+    
+    def test_to_dict_projection(self):
+        """Test projecting a subset of fields"""
+        user = User(name="Malachai", email="malachai@example.com", bio="Long bio")
+        user.user_id = 1
+        
+        assert user.to_dict(['user_id', 'name']) == {'user_id': 1, 'name': "Malachai"}
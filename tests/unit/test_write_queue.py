@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+import pytest
+from src.database.write_queue import WriteQueue, WriteQueueClosed
+
+
+@pytest.fixture
+def connect(tmp_path):
+    path = str(tmp_path / "queue.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (value INTEGER UNIQUE)")
+    conn.close()
+    return lambda: sqlite3.connect(path, check_same_thread=False)
+
+
+def insert(value):
+    def write(cursor):
+        cursor.execute("INSERT INTO items (value) VALUES (?)", (value,))
+        return value
+    return write
+
+
+def stored(connect):
+    return [row[0] for row in connect().execute("SELECT value FROM items ORDER BY value")]
+
+
+def blocked_queue(connect, **kwargs):
+    """A queue whose writer is stuck on a first write until the returned event is set"""
+    queue = WriteQueue(connect, **kwargs)
+    started, release = threading.Event(), threading.Event()
+
+    def block(cursor):
+        started.set()
+        release.wait(5)
+        return 'blocker'
+
+    blocker = queue.submit(block)
+    started.wait(5)
+    return queue, blocker, release
+
+
+class TestWriteQueue:
+
+    def test_writes_queued_together_share_a_commit(self, connect):
+        queue, blocker, release = blocked_queue(connect)
+        futures = [queue.submit(insert(n)) for n in range(10)]
+        release.set()
+
+        assert [future.result(5) for future in futures] == list(range(10))
+        assert blocker.result(5) == 'blocker'
+        queue.close()
+        assert queue.groups_committed == 2
+        assert queue.writes_committed == 11
+        assert stored(connect) == list(range(10))
+
+    def test_groups_are_bounded_by_size(self, connect):
+        queue, _, release = blocked_queue(connect, max_batch=4)
+        futures = [queue.submit(insert(n)) for n in range(10)]
+        release.set()
+        queue.close()
+
+        assert all(future.done() for future in futures)
+        assert queue.groups_committed == 1 + 3
+
+    def test_delay_gathers_writes_that_arrive_later(self, connect):
+        queue = WriteQueue(connect, max_delay=0.5)
+        first = queue.submit(insert(1))
+        second = queue.submit(insert(2))
+        assert (first.result(5), second.result(5)) == (1, 2)
+        queue.close()
+        assert queue.groups_committed == 1
+
+    def test_failing_write_is_rolled_back_alone(self, connect):
+        queue, _, release = blocked_queue(connect)
+        futures = [queue.submit(insert(n)) for n in (1, 1, 2)]
+        release.set()
+
+        assert futures[0].result(5) == 1
+        with pytest.raises(sqlite3.IntegrityError):
+            futures[1].result(5)
+        assert futures[2].result(5) == 2
+        queue.close()
+        assert stored(connect) == [1, 2]
+
+    def test_cancelled_write_is_skipped(self, connect):
+        queue, _, release = blocked_queue(connect)
+        cancelled = queue.submit(insert(1))
+        kept = queue.submit(insert(2))
+        assert cancelled.cancel()
+        release.set()
+
+        assert kept.result(5) == 2
+        queue.close()
+        assert stored(connect) == [2]
+
+    def test_finish_transforms_results(self, connect):
+        queue = WriteQueue(connect, finish=lambda value: value * 10)
+        assert queue.submit(insert(3)).result(5) == 30
+        queue.close()
+
+    def test_write_lock_timeout_fails_the_group(self, connect, tmp_path):
+        other_process = connect()
+        other_process.execute("BEGIN EXCLUSIVE")
+        queue = WriteQueue(lambda: sqlite3.connect(str(tmp_path / "queue.db"), timeout=0.05))
+        future = queue.submit(insert(1))
+
+        with pytest.raises(sqlite3.OperationalError):
+            future.result(5)
+        other_process.rollback()
+        assert queue.submit(insert(2)).result(5) == 2
+        queue.close()
+        assert stored(connect) == [2]
+
+    def test_submit_after_close(self, connect):
+        queue = WriteQueue(connect)
+        queue.close()
+        queue.close()
+        with pytest.raises(WriteQueueClosed):
+            queue.submit(insert(1))